@@ -0,0 +1,492 @@
+"""Local Civitai API stub for offline testing and network-path benchmarks
+
+Serves canned model versions on the Civitai routes LoRA Manager uses, with
+configurable latency, errors, rate limiting (429 + Retry-After) and large
+download bodies. Versions are seeded from refs/*.json, from responses
+recorded earlier with --record, and optionally from synthetic copies.
+
+Point LoRA Manager at the stub with the `civitai_base_url` setting:
+
+    python civitai_stub.py --port 8199 --synthetic 1000 --latency 0.05 --rate-limit 5
+    settings.json: "civitai_base_url": "http://127.0.0.1:8199"
+
+Fault settings can be changed while running with POST /__stub/config (JSON
+with any StubConfig field); GET /__stub/stats reports per-route counts,
+served errors and peak concurrency, and POST /__stub/reset clears them.
+"""
+import argparse
+import asyncio
+import copy
+import glob
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger("civitai_stub")
+
+# Smallest valid PNG (1x1, transparent), served for preview and example images
+TINY_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6300010000050001'
+    '0d0a2db40000000049454e44ae426082'
+)
+# Block repeated to build download bodies
+BODY_BLOCK_SIZE = 1024 * 1024
+# First id given to synthetic versions and models
+SYNTHETIC_ID_BASE = 90_000_000
+
+
+@dataclass
+class StubConfig:
+    """Fault injection and body settings"""
+    latency: float = 0.0       # Seconds added to every API and download response
+    jitter: float = 0.0        # Extra random latency, up to this many seconds
+    error_rate: float = 0.0    # Fraction of requests answered with a 500
+    rate_limit: float = 0.0    # Requests per second before answering 429 (0 = unlimited)
+    retry_after: int = 1       # Retry-After sent with 429 responses
+    file_size: int = 8 * 1024 * 1024  # Size of download bodies in bytes
+    bandwidth: int = 0         # Download throughput cap in bytes per second (0 = unlimited)
+    ranges: bool = True        # Honor Range requests on downloads
+    consistent_hashes: bool = False  # Report the SHA256/size of the served body in file metadata
+    drop_after: int = 0        # Cut download connections after this many bytes (0 = never)
+
+
+def _parse_size(value: str) -> int:
+    """Parse sizes like 512, 64KB, 200MB or 2GB"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*', value.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(float(number) * {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}[unit])
+
+
+class CivitaiStub:
+    """In-memory Civitai API backed by canned model versions"""
+
+    def __init__(self, config: StubConfig, record_dir: Optional[str] = None,
+                 upstream: str = "https://civitai.com"):
+        self.config = config
+        self.record_dir = record_dir
+        self.upstream = upstream.rstrip('/')
+        self.versions: Dict[int, Dict] = {}
+        self.version_by_hash: Dict[str, int] = {}
+        # Recorded (status, body) of GET API requests by path and query
+        self.recorded: Dict[str, Tuple[int, object]] = {}
+        # version id -> (sha256, size) of its download body, when computed
+        self._body_hashes: Dict[int, Tuple[str, int]] = {}
+        # Body SHA256 -> version id with --consistent-hashes, and the (file size, version count) it was built for
+        self._body_hash_index: Dict[str, int] = {}
+        self._body_hash_index_key: Optional[Tuple[int, int]] = None
+        self._tokens = 0.0
+        self._tokens_at = time.monotonic()
+        self.reset_stats()
+
+    # Seeding
+
+    def add_version(self, version: Dict) -> None:
+        """Serve a model version (also by each of its file hashes)"""
+        version_id = version['id']
+        self.versions[version_id] = version
+        for file_info in version.get('files', []):
+            for hash_value in (file_info.get('hashes') or {}).values():
+                if isinstance(hash_value, str):
+                    self.version_by_hash[hash_value.lower()] = version_id
+
+    def load_seed_files(self, pattern: str) -> int:
+        """Add every model version JSON file matching a glob pattern"""
+        count = 0
+        for path in sorted(glob.glob(pattern)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if isinstance(data, dict) and 'modelId' in data and 'files' in data:
+                self.add_version(data)
+                count += 1
+        return count
+
+    def load_recorded(self) -> int:
+        """Load responses recorded by an earlier --record run"""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(self.record_dir, '*.json'))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self.recorded[entry['path']] = (entry['status'], entry['body'])
+            body = entry['body']
+            if entry['status'] == 200 and isinstance(body, dict) and 'modelId' in body and 'files' in body:
+                self.add_version(body)
+            count += 1
+        return count
+
+    def add_synthetic(self, count: int) -> None:
+        """Add copies of the seeded versions with new ids and hashes"""
+        templates = list(self.versions.values())
+        if not templates:
+            return
+        for i in range(count):
+            version = copy.deepcopy(templates[i % len(templates)])
+            version_id = SYNTHETIC_ID_BASE + i
+            version['id'] = version_id
+            version['modelId'] = SYNTHETIC_ID_BASE + i // 2
+            version['name'] = f"synthetic-{i}"
+            for file_index, file_info in enumerate(version.get('files', [])):
+                digest = hashlib.sha256(f"{version_id}:{file_index}".encode()).hexdigest().upper()
+                file_info['hashes'] = {'SHA256': digest, 'AutoV2': digest[:10], 'CRC32': digest[:8]}
+                file_info['name'] = f"synthetic_{i}_{file_index}.safetensors"
+            self.add_version(version)
+
+    # Serving helpers
+
+    def reset_stats(self) -> None:
+        self.stats = {'requests': {}, 'errors': 0, 'rate_limited': 0, 'bytes_sent': 0, 'downloads_dropped': 0,
+                      'in_flight': 0, 'peak_in_flight': 0, 'started_at': time.time()}
+
+    def _body_block(self, version_id: int) -> bytes:
+        """Deterministic 1MB block the download body of a version is made of"""
+        seed = hashlib.sha256(str(version_id).encode()).digest()
+        return (seed * (BODY_BLOCK_SIZE // len(seed) + 1))[:BODY_BLOCK_SIZE]
+
+    def _body_hash(self, version_id: int) -> Tuple[str, int]:
+        """SHA256 and size of a version's download body (computed once)"""
+        size = self.config.file_size
+        cached = self._body_hashes.get(version_id)
+        if cached is None or cached[1] != size:
+            block = self._body_block(version_id)
+            sha256 = hashlib.sha256()
+            remaining = size
+            while remaining > 0:
+                sha256.update(block[:min(remaining, BODY_BLOCK_SIZE)])
+                remaining -= BODY_BLOCK_SIZE
+            cached = self._body_hashes[version_id] = (sha256.hexdigest().upper(), size)
+        return cached
+
+    def find_version_id(self, hash_value: str) -> Optional[int]:
+        """Version id for a file hash, including the body SHA256 reported with --consistent-hashes"""
+        hash_value = hash_value.lower()
+        version_id = self.version_by_hash.get(hash_value)
+        if version_id is None and self.config.consistent_hashes:
+            size = self.config.file_size
+            if self._body_hash_index_key != (size, len(self.versions)):
+                self._body_hash_index = {
+                    self._body_hash(vid)[0].lower(): vid
+                    for vid, version in self.versions.items()
+                    if any(f.get('primary') for f in version.get('files', []))
+                }
+                self._body_hash_index_key = (size, len(self.versions))
+            version_id = self._body_hash_index.get(hash_value)
+        return version_id
+
+    def render_version(self, version: Dict, base: str) -> Dict:
+        """Copy a version with download and image URLs pointing at the stub"""
+        version = copy.deepcopy(version)
+        download_url = f"{base}/api/download/models/{version['id']}"
+        version['downloadUrl'] = download_url
+        for file_info in version.get('files', []):
+            file_info['downloadUrl'] = download_url
+            if self.config.consistent_hashes and file_info.get('primary'):
+                sha256, size = self._body_hash(version['id'])
+                file_info.setdefault('hashes', {})['SHA256'] = sha256
+                file_info['sizeKB'] = size / 1024
+        for index, image in enumerate(version.get('images', [])):
+            ext = os.path.splitext(image.get('url', ''))[1] or '.png'
+            image['url'] = f"{base}/images/{version['id']}/{index}{ext}"
+        return version
+
+    def _take_token(self) -> bool:
+        rate = self.config.rate_limit
+        if rate <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(rate, self._tokens + (now - self._tokens_at) * rate)
+        self._tokens_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def _record_or_404(self, request: web.Request, message: str) -> web.Response:
+        """Proxy an unknown request upstream when recording, otherwise answer 404"""
+        if not self.record_dir:
+            return web.json_response({'error': message}, status=404)
+
+        async with aiohttp.ClientSession() as session:
+            async with session.request(request.method, f"{self.upstream}{request.path_qs}",
+                                       data=await request.read() or None,
+                                       headers={'Content-Type': 'application/json'}) as response:
+                status = response.status
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    body = None
+
+        key = request.path_qs
+        self.recorded[key] = (status, body)
+        if status == 200 and isinstance(body, dict) and 'modelId' in body and 'files' in body:
+            self.add_version(body)
+        os.makedirs(self.record_dir, exist_ok=True)
+        file_name = re.sub(r'[^A-Za-z0-9._-]+', '_', key).strip('_')[:200] + '.json'
+        with open(os.path.join(self.record_dir, file_name), 'w', encoding='utf-8') as f:
+            json.dump({'path': key, 'status': status, 'body': body}, f)
+        return web.json_response(body, status=status)
+
+    @staticmethod
+    def _base(request: web.Request) -> str:
+        return f"{request.scheme}://{request.host}"
+
+    # Middleware and handlers
+
+    @web.middleware
+    async def faults(self, request: web.Request, handler):
+        """Count requests and inject latency, rate limiting and errors"""
+        if request.path.startswith('/__stub/'):
+            return await handler(request)
+
+        route = request.match_info.route.resource
+        route_name = route.canonical if route is not None else request.path
+        requests = self.stats['requests']
+        requests[route_name] = requests.get(route_name, 0) + 1
+        self.stats['in_flight'] += 1
+        self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+        try:
+            delay = self.config.latency + random.uniform(0, self.config.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._take_token():
+                self.stats['rate_limited'] += 1
+                return web.json_response({'error': 'Rate limited'}, status=429,
+                                         headers={'Retry-After': str(self.config.retry_after)})
+            if random.random() < self.config.error_rate:
+                self.stats['errors'] += 1
+                return web.json_response({'error': 'Injected server error'}, status=500)
+            # Replay recorded API responses
+            if request.method == 'GET' and request.path.startswith('/api/v1/') and request.path_qs in self.recorded:
+                status, body = self.recorded[request.path_qs]
+                return web.json_response(body, status=status)
+            return await handler(request)
+        finally:
+            self.stats['in_flight'] -= 1
+
+    async def get_version(self, request: web.Request) -> web.Response:
+        version = self.versions.get(int(request.match_info['version_id']))
+        if version is None:
+            return await self._record_or_404(request, 'Model not found')
+        return web.json_response(self.render_version(version, self._base(request)))
+
+    async def get_version_by_hash(self, request: web.Request) -> web.Response:
+        version_id = self.find_version_id(request.match_info['hash'])
+        if version_id is None:
+            return await self._record_or_404(request, 'Model not found')
+        return web.json_response(self.render_version(self.versions[version_id], self._base(request)))
+
+    async def post_versions_by_hash(self, request: web.Request) -> web.Response:
+        hashes = await request.json()
+        if not isinstance(hashes, list):
+            return web.json_response({'error': 'Expected a JSON array of hashes'}, status=400)
+        base = self._base(request)
+        version_ids = dict.fromkeys(
+            version_id for version_id in (self.find_version_id(h) for h in hashes if isinstance(h, str))
+            if version_id is not None
+        )
+        return web.json_response([self.render_version(self.versions[v], base) for v in version_ids])
+
+    async def get_model(self, request: web.Request) -> web.Response:
+        model_id = int(request.match_info['model_id'])
+        base = self._base(request)
+        versions = sorted(
+            (v for v in self.versions.values() if v.get('modelId') == model_id),
+            key=lambda v: v['id'], reverse=True
+        )
+        if not versions:
+            return await self._record_or_404(request, 'Model not found')
+        model = versions[0].get('model', {})
+        return web.json_response({
+            'id': model_id,
+            'name': model.get('name', f"Model {model_id}"),
+            'type': model.get('type', 'LORA'),
+            'nsfw': model.get('nsfw', False),
+            'description': f"<p>Stub description of model {model_id}</p>",
+            'tags': ['stub', 'style'],
+            'creator': {'username': 'stub-creator', 'image': None},
+            'modelVersions': [self.render_version(v, base) for v in versions]
+        })
+
+    async def get_images(self, request: web.Request) -> web.Response:
+        image_id = request.query.get('imageId', '')
+        for version in self.versions.values():
+            for image in version.get('images', []):
+                if os.path.splitext(os.path.basename(image.get('url', '')))[0] == image_id:
+                    return web.json_response({'items': [{**image, 'id': int(image_id), 'modelVersionId': version['id']}]})
+        return web.json_response({'items': []})
+
+    async def get_image(self, request: web.Request) -> web.Response:
+        self.stats['bytes_sent'] += len(TINY_PNG)
+        return web.Response(body=TINY_PNG, content_type='image/png')
+
+    async def download(self, request: web.Request) -> web.StreamResponse:
+        version_id = int(request.match_info['version_id'])
+        version = self.versions.get(version_id)
+        if version is None:
+            return web.json_response({'error': 'Model not found'}, status=404)
+
+        size = self.config.file_size
+        start, end = 0, size - 1
+        status = 200
+        range_header = request.headers.get('Range')
+        if range_header and self.config.ranges:
+            match = re.fullmatch(r'bytes=(\d*)-(\d*)', range_header.strip())
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                else:
+                    start = max(0, size - int(match.group(2)))
+                if start > end:
+                    return web.Response(status=416, headers={'Content-Range': f"bytes */{size}"})
+                status = 206
+
+        primary = next((f for f in version.get('files', []) if f.get('primary')), None)
+        file_name = (primary or {}).get('name') or f"model_{version_id}.safetensors"
+        headers = {
+            'Content-Disposition': f'attachment; filename="{file_name}"',
+            'Content-Length': str(end - start + 1),
+            'Content-Type': 'application/octet-stream',
+        }
+        if self.config.ranges:
+            headers['Accept-Ranges'] = 'bytes'
+        if status == 206:
+            headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+
+        block = self._body_block(version_id)
+        chunk_size = 64 * 1024
+        position = start
+        started = time.monotonic()
+        while position <= end:
+            offset = position % BODY_BLOCK_SIZE
+            length = min(chunk_size, end - position + 1, BODY_BLOCK_SIZE - offset)
+            await response.write(block[offset:offset + length])
+            position += length
+            self.stats['bytes_sent'] += length
+            if self.config.drop_after and position - start >= self.config.drop_after and position <= end:
+                # Simulate a dropped connection mid-transfer
+                self.stats['downloads_dropped'] += 1
+                request.transport.close()
+                return response
+            if self.config.bandwidth > 0:
+                # Sleep until the transfer is back under the bandwidth cap
+                ahead = (position - start) / self.config.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+        await response.write_eof()
+        return response
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            **self.stats,
+            'versions': len(self.versions),
+            'recorded': len(self.recorded),
+            'config': asdict(self.config)
+        })
+
+    async def update_config(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        for field in fields(StubConfig):
+            if field.name in data:
+                setattr(self.config, field.name, field.type(data[field.name]))
+        return web.json_response(asdict(self.config))
+
+    async def reset(self, request: web.Request) -> web.Response:
+        self.reset_stats()
+        return web.json_response({'success': True})
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.faults], client_max_size=16 * 1024 * 1024)
+        app.router.add_get('/api/v1/model-versions/by-hash/{hash}', self.get_version_by_hash)
+        app.router.add_post('/api/v1/model-versions/by-hash', self.post_versions_by_hash)
+        app.router.add_get('/api/v1/model-versions/{version_id:\\d+}', self.get_version)
+        app.router.add_get('/api/v1/models/{model_id:\\d+}', self.get_model)
+        app.router.add_get('/api/v1/images', self.get_images)
+        app.router.add_get('/api/download/models/{version_id:\\d+}', self.download)
+        app.router.add_get('/images/{version_id}/{name}', self.get_image)
+        app.router.add_get('/__stub/stats', self.get_stats)
+        app.router.add_post('/__stub/config', self.update_config)
+        app.router.add_post('/__stub/reset', self.reset)
+        return app
+
+
+def parse_args():
+    """Parse command line arguments"""
+    refs_pattern = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'refs', '*.json')
+    parser = argparse.ArgumentParser(description="Local Civitai API stub for LoRA Manager")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Host address to bind the stub to (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8199,
+                        help="Port to bind the stub to (default: 8199)")
+    parser.add_argument("--seed", type=str, default=refs_pattern,
+                        help="Glob of model version JSON files to serve (default: refs/*.json)")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Number of synthetic versions (copies of the seeded ones with new ids and hashes)")
+    parser.add_argument("--record", type=str, default=None, metavar="DIR",
+                        help="Proxy unknown requests to --upstream and save the responses in DIR; "
+                             "responses already in DIR are replayed")
+    parser.add_argument("--upstream", type=str, default="https://civitai.com",
+                        help="Upstream used when recording (default: https://civitai.com)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requests per second before answering 429 (default: unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--file-size", type=_parse_size, default=_parse_size("8MB"),
+                        help="Size of download bodies, e.g. 64KB or 2GB (default: 8MB)")
+    parser.add_argument("--bandwidth", type=_parse_size, default=0,
+                        help="Download throughput cap per connection, e.g. 10MB (default: unlimited)")
+    parser.add_argument("--no-ranges", action="store_true", help="Ignore Range requests on downloads")
+    parser.add_argument("--consistent-hashes", action="store_true",
+                        help="Report the SHA256 and size of the served body in file metadata")
+    parser.add_argument("--drop-after", type=_parse_size, default=0,
+                        help="Cut download connections after this many bytes, e.g. 3MB (default: never)")
+    parser.add_argument("--log-level", type=str, default="INFO",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="Logging level")
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point of the stub server"""
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level))
+
+    config = StubConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, retry_after=args.retry_after, file_size=args.file_size,
+        bandwidth=args.bandwidth, ranges=not args.no_ranges, consistent_hashes=args.consistent_hashes,
+        drop_after=args.drop_after
+    )
+    stub = CivitaiStub(config, record_dir=args.record, upstream=args.upstream)
+    seeded = stub.load_seed_files(args.seed)
+    recorded = stub.load_recorded() if args.record and os.path.isdir(args.record) else 0
+    stub.add_synthetic(args.synthetic)
+    logger.info(f"Serving {len(stub.versions)} model versions ({seeded} seeded, {recorded} recorded responses, "
+                f"{args.synthetic} synthetic) on http://{args.host}:{args.port}")
+
+    web.run_app(stub.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
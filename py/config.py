@@ -6,12 +6,16 @@ import logging
 import sys
 import json
 import urllib.parse
+from collections import OrderedDict
 
 # Check if running in standalone mode
 standalone_mode = 'nodes' not in sys.modules
 
 logger = logging.getLogger(__name__)
 
+# Preview paths whose static URL is remembered (least recently used are evicted first)
+STATIC_URL_CACHE_SIZE = 8192
+
 class Config:
     """Global configuration for LoRA Manager"""
     
@@ -22,6 +26,8 @@ class Config:
         self._path_mappings = {}
         # Static route mapping dictionary, target to route mapping
         self._route_mappings = {}
+        # Preview path -> static URL in LRU order, cleared whenever route mappings change
+        self._static_url_cache = OrderedDict()
         self.loras_roots = self._init_lora_paths()
         self.checkpoints_roots = None
         self.unet_roots = None
@@ -130,6 +136,8 @@ class Config:
         """Add a static route mapping"""
         normalized_path = os.path.normpath(path).replace(os.sep, '/')
         self._route_mappings[normalized_path] = route
+        # Previously resolved URLs may now map to a different route
+        self._static_url_cache.clear()
         # logger.info(f"Added route mapping: {normalized_path} -> {route}")
 
     def map_path_to_link(self, path: str) -> str:
@@ -272,16 +280,28 @@ class Config:
         if not preview_path:
             return ""
         
+        # Resolving the real path hits the filesystem, so remember the result per path
+        cached_url = self._static_url_cache.get(preview_path)
+        if cached_url is not None:
+            self._static_url_cache.move_to_end(preview_path)
+            return cached_url
+        
         real_path = os.path.realpath(preview_path).replace(os.sep, '/')
 
+        static_url = ""
         for path, route in self._route_mappings.items():
             if real_path.startswith(path):
                 relative_path = os.path.relpath(real_path, path).replace(os.sep, '/')
                 safe_parts = [urllib.parse.quote(part) for part in relative_path.split('/')]
                 safe_path = '/'.join(safe_parts)
-                return f'{route}/{safe_path}'
+                static_url = f'{route}/{safe_path}'
+                break
 
-        return ""
+        if static_url:
+            self._static_url_cache[preview_path] = static_url
+            if len(self._static_url_cache) > STATIC_URL_CACHE_SIZE:
+                self._static_url_cache.popitem(last=False)
+        return static_url
 
 # Global config instance
 config = Config()
@@ -3,6 +3,7 @@ import sys
 import os
 import logging
 from pathlib import Path
+from aiohttp import web
 from server import PromptServer # type: ignore
 
 from .config import config
@@ -16,6 +17,9 @@ from .services.service_registry import ServiceRegistry
 from .services.settings_manager import settings
 from .utils.example_images_migration import ExampleImagesMigration
 from .services.websocket_manager import ws_manager
+from .services.metrics import metrics, metrics_middleware
+from .services.thumbnail_service import thumbnail_service
+from .services.civitai_cache import civitai_cache
 
 logger = logging.getLogger(__name__)
 
@@ -149,6 +153,9 @@ class LoraManager:
         # Add static route for plugin assets
         app.router.add_static('/loras_static', config.static_path)
         
+        # Remember where our API routes start so metrics only cover them
+        route_start = len(app.router.resources())
+        
         # Register default model types with the factory
         register_default_model_types()
         
@@ -168,6 +175,9 @@ class LoraManager:
         app.router.add_get('/ws/download-progress', ws_manager.handle_download_connection)
         app.router.add_get('/ws/init-progress', ws_manager.handle_init_connection)
         
+        # Setup request metrics for the routes registered above
+        cls._setup_metrics(app, route_start)
+        
         # Schedule service initialization 
         app.on_startup.append(lambda app: cls._initialize_services())
         
@@ -176,6 +186,16 @@ class LoraManager:
         
         logger.info(f"LoRA Manager: Set up routes for {len(ModelServiceFactory.get_registered_types())} model types: {', '.join(ModelServiceFactory.get_registered_types())}")
     
+    @classmethod
+    def _setup_metrics(cls, app, route_start: int):
+        """Install the metrics middleware and track routes registered since route_start"""
+        resources = list(app.router.resources())[route_start:]
+        metrics.track_routes(
+            resource.canonical for resource in resources
+            if not isinstance(resource, web.StaticResource)
+        )
+        app.middlewares.append(metrics_middleware)
+    
     @classmethod
     async def _initialize_services(cls):
         """Initialize all services using the ServiceRegistry"""
@@ -221,6 +241,12 @@ class LoraManager:
             if civitai_client:
                 await civitai_client.close()
                 logger.info("Closed CivitaiClient connection")
+            
+            # Stop thumbnail workers
+            thumbnail_service.shutdown()
+            
+            # Close the Civitai response cache database
+            civitai_cache.close()
                 
         except Exception as e:
             logger.error(f"Error during cleanup: {e}", exc_info=True)
@@ -7,6 +7,8 @@ import re
 from typing import Dict, List, Any, Optional, Tuple
 from abc import ABC, abstractmethod
 from ..config import config
+from ..services.service_registry import ServiceRegistry
+from ..services.version_hash_resolver import extract_version_hash
 from ..utils.constants import VALID_LORA_TYPES
 
 logger = logging.getLogger(__name__)
@@ -36,6 +38,25 @@ class RecipeMetadataParser(ABC):
         """
         pass
     
+    async def fetch_version_infos(self, civitai_client, version_ids) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Fetch Civitai info for several model versions concurrently
+        
+        Duplicate ids are requested once, and resolved hashes are remembered by
+        the version hash resolver for later recipe scans.
+        
+        Args:
+            civitai_client: Civitai client (nothing is fetched if None)
+            version_ids: Model version ids to fetch
+            
+        Returns:
+            Dict of str(version_id) -> (version_info, error_msg)
+        """
+        if not civitai_client:
+            return {}
+        resolver = await ServiceRegistry.get_version_hash_resolver()
+        return await resolver.fetch_version_infos(version_ids, civitai_client)
+    
     async def populate_lora_from_civitai(self, lora_entry: Dict[str, Any], civitai_info_tuple: Tuple[Dict[str, Any], Optional[str]], 
                                          recipe_scanner=None, base_model_counts=None, hash_value=None) -> Optional[Dict[str, Any]]:
         """
@@ -60,6 +81,11 @@ class RecipeMetadataParser(ABC):
                 lora_entry['isDeleted'] = True
                 lora_entry['thumbnailUrl'] = '/loras_static/images/no-preview.png'
                 return lora_entry
+            
+            # Remember the version hash so recipe scans never need to request it
+            if civitai_info.get('id'):
+                resolver = await ServiceRegistry.get_version_hash_resolver()
+                resolver.record(civitai_info['id'], sha256=extract_version_hash(civitai_info))
                 
             # Get model type and validate
             model_type = civitai_info.get('model', {}).get('type', '').lower()
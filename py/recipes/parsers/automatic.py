@@ -198,6 +198,13 @@ class AutomaticMetadataParser(RecipeMetadataParser):
                             resource["modelVersionId"] = air_modelVersionId
                     # --- End added ---
 
+                # Fetch Civitai info for all LoRA versions up front (concurrent, deduplicated)
+                version_infos = await self.fetch_version_infos(civitai_client, [
+                    resource.get("modelVersionId") for resource in metadata.get("civitai_resources", [])
+                    if resource.get("type") in ["lora", "lycoris", "hypernet"]
+                ])
+
+                for resource in metadata.get("civitai_resources", []):
                     if resource.get("type") in ["lora", "lycoris", "hypernet"] and resource.get("modelVersionId"):
                         # Initialize lora entry
                         lora_entry = {
@@ -218,7 +225,7 @@ class AutomaticMetadataParser(RecipeMetadataParser):
                         # Get additional info from Civitai
                         if civitai_client:
                             try:
-                                civitai_info = await civitai_client.get_model_version_info(resource.get("modelVersionId"))
+                                civitai_info = version_infos[str(resource.get("modelVersionId"))]
                                 populated_entry = await self.populate_lora_from_civitai(
                                     lora_entry,
                                     civitai_info,
@@ -152,6 +152,12 @@ class CivitaiApiMetadataParser(RecipeMetadataParser):
             
             # Process civitaiResources array
             if "civitaiResources" in metadata and isinstance(metadata["civitaiResources"], list):
+                # Fetch Civitai info for all versions not added yet (concurrent, deduplicated)
+                version_infos = await self.fetch_version_infos(civitai_client, [
+                    resource.get("modelVersionId") for resource in metadata["civitaiResources"]
+                    if str(resource.get("modelVersionId", "")) not in added_loras
+                ])
+                
                 for resource in metadata["civitaiResources"]:
                     # Get unique identifier for deduplication
                     version_id = str(resource.get("modelVersionId", ""))
@@ -179,8 +185,7 @@ class CivitaiApiMetadataParser(RecipeMetadataParser):
                     # Try to get info from Civitai if modelVersionId is available
                     if version_id and civitai_client:
                         try:
-                            # Use get_model_version_info instead of get_model_version
-                            civitai_info, error = await civitai_client.get_model_version_info(version_id)
+                            civitai_info, error = version_infos[version_id]
                             
                             if error:
                                 logger.warning(f"Error getting model version info: {error}")
@@ -208,6 +213,16 @@ class CivitaiApiMetadataParser(RecipeMetadataParser):
             
             # Process additionalResources array
             if "additionalResources" in metadata and isinstance(metadata["additionalResources"], list):
+                # Fetch Civitai info for all URN version ids not added yet (concurrent, deduplicated)
+                urn_version_ids = []
+                for resource in metadata["additionalResources"]:
+                    name = resource.get("name", "")
+                    if name and "civitai:" in name:
+                        parts = name.split("@")
+                        if len(parts) > 1 and parts[1] not in added_loras:
+                            urn_version_ids.append(parts[1])
+                version_infos = await self.fetch_version_infos(civitai_client, urn_version_ids)
+                
                 for resource in metadata["additionalResources"]:
                     # Skip resources that aren't LoRAs or LyCORIS
                     if resource.get("type") not in ["lora", "lycoris"] and "type" not in resource:
@@ -245,8 +260,7 @@ class CivitaiApiMetadataParser(RecipeMetadataParser):
                     # If we have a version ID and civitai client, try to get more info
                     if version_id and civitai_client:
                         try:
-                            # Use get_model_version_info with the version ID
-                            civitai_info, error = await civitai_client.get_model_version_info(version_id)
+                            civitai_info, error = version_infos[version_id]
                             
                             if error:
                                 logger.warning(f"Error getting model version info: {error}")
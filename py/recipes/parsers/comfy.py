@@ -35,6 +35,14 @@ class ComfyMetadataParser(RecipeMetadataParser):
             if not lora_nodes:
                 return {"error": "No LoRA information found in this ComfyUI workflow", "loras": []}
             
+            # Fetch Civitai info for all referenced versions up front (concurrent, deduplicated)
+            version_ids = []
+            for node in lora_nodes.values():
+                lora_id_match = re.search(r'civitai:(\d+)@(\d+)', node.get('inputs', {}).get('lora_name', ''))
+                if lora_id_match:
+                    version_ids.append(lora_id_match.group(2))
+            version_infos = await self.fetch_version_infos(civitai_client, version_ids)
+            
             # Process each LoraLoader node
             for node_id, node in lora_nodes.items():
                 if 'inputs' not in node or 'lora_name' not in node['inputs']:
@@ -76,7 +84,7 @@ class ComfyMetadataParser(RecipeMetadataParser):
                 # Get additional info from Civitai if client is available
                 if civitai_client:
                     try:
-                        civitai_info_tuple = await civitai_client.get_model_version_info(model_version_id)
+                        civitai_info_tuple = version_infos[str(model_version_id)]
                         # Populate lora entry with Civitai info
                         populated_entry = await self.populate_lora_from_civitai(
                             lora_entry, 
@@ -38,6 +38,15 @@ class RecipeFormatParser(RecipeMetadataParser):
             if not recipe_metadata:
                 return {"error": "No recipe metadata found", "loras": []}
                 
+            # Fetch Civitai info for LoRAs missing from the library up front (concurrent, deduplicated)
+            version_infos = {}
+            if recipe_scanner and civitai_client:
+                lora_scanner = recipe_scanner._lora_scanner
+                version_infos = await self.fetch_version_infos(civitai_client, [
+                    lora.get('modelVersionId') for lora in recipe_metadata.get('loras', [])
+                    if lora.get('hash') and not lora_scanner.has_hash(lora['hash'])
+                ])
+                
             # Process the recipe metadata
             loras = []
             for lora in recipe_metadata.get('loras', []):
@@ -73,7 +82,7 @@ class RecipeFormatParser(RecipeMetadataParser):
                         # Try to get additional info from Civitai if we have a model version ID
                         if lora.get('modelVersionId') and civitai_client:
                             try:
-                                civitai_info_tuple = await civitai_client.get_model_version_info(lora['modelVersionId'])
+                                civitai_info_tuple = version_infos[str(lora['modelVersionId'])]
                                 # Populate lora entry with Civitai info
                                 populated_entry = await self.populate_lora_from_civitai(
                                     lora_entry, 
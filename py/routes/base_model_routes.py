@@ -3,17 +3,23 @@ import asyncio
 import json
 import logging
 from aiohttp import web
-from typing import Dict
+from typing import Dict, Optional
 
 import jinja2
 
 from ..utils.routes_common import ModelRouteUtils
+from ..utils.civitai_slimming import load_remainder, restore_civitai_data
 from ..services.websocket_manager import ws_manager
 from ..services.settings_manager import settings
+from ..services.thumbnail_service import thumbnail_service
+from ..services.civitai_fetch_job import civitai_fetch_jobs
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# Number of items formatted and written per chunk when streaming exports
+EXPORT_CHUNK_SIZE = 200
+
 class BaseModelRoutes(ABC):
     """Base route controller for all model types"""
     
@@ -39,6 +45,7 @@ class BaseModelRoutes(ABC):
         """
         # Common model management routes
         app.router.add_get(f'/api/{prefix}/list', self.get_models)
+        app.router.add_get(f'/api/{prefix}/export', self.export_models)
         app.router.add_post(f'/api/{prefix}/delete', self.delete_model)
         app.router.add_post(f'/api/{prefix}/exclude', self.exclude_model)
         app.router.add_post(f'/api/{prefix}/fetch-civitai', self.fetch_civitai)
@@ -68,6 +75,9 @@ class BaseModelRoutes(ABC):
         
         # CivitAI integration routes
         app.router.add_post(f'/api/{prefix}/fetch-all-civitai', self.fetch_all_civitai)
+        app.router.add_get(f'/api/{prefix}/fetch-all-civitai/{{job_id}}', self.get_fetch_all_civitai_status)
+        app.router.add_post(f'/api/{prefix}/fetch-all-civitai/{{job_id}}/cancel', self.cancel_fetch_all_civitai)
+        app.router.add_get(f'/api/{prefix}/civitai-full', self.get_full_civitai_data)
         # app.router.add_get(f'/api/civitai/versions/{{model_id}}', self.get_civitai_versions)
         
         # Add generic page route
@@ -138,13 +148,17 @@ class BaseModelRoutes(ABC):
         try:
             # Parse common query parameters
             params = self._parse_common_params(request)
+            fields = self._parse_fields(request)
+            card_size = thumbnail_service.parse_card_size(request.query.get('card_size'))
             
             # Get data from service
             result = await self.service.get_paginated_data(**params)
             
             # Format response items
+            items = [await self._format_model_item(item, fields, card_size) for item in result['items']]
+            
             formatted_result = {
-                'items': [await self.service.format_response(item) for item in result['items']],
+                'items': items,
                 'total': result['total'],
                 'page': result['page'],
                 'page_size': result['page_size'],
@@ -157,6 +171,74 @@ class BaseModelRoutes(ABC):
             logger.error(f"Error in get_{self.model_type}s: {e}", exc_info=True)
             return web.json_response({"error": str(e)}, status=500)
     
+    async def export_models(self, request: web.Request) -> web.StreamResponse:
+        """Stream all models matching the list filters as NDJSON
+        
+        Accepts the same query parameters as the list endpoint (pagination is
+        ignored). Items are formatted and written in small chunks so memory
+        stays bounded regardless of library size.
+        """
+        response = None
+        try:
+            params = self._parse_common_params(request)
+            params.pop('page', None)
+            params.pop('page_size', None)
+            fields = self._parse_fields(request)
+            card_size = thumbnail_service.parse_card_size(request.query.get('card_size'))
+            
+            # Snapshot references so concurrent cache updates don't affect iteration
+            filtered_data = list(await self.service.get_filtered_data(**params))
+            
+            response = web.StreamResponse(headers={
+                'Content-Type': 'application/x-ndjson; charset=utf-8',
+                'Content-Disposition': f'attachment; filename="{self.model_type}s.ndjson"'
+            })
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            
+            for start in range(0, len(filtered_data), EXPORT_CHUNK_SIZE):
+                chunk = filtered_data[start:start + EXPORT_CHUNK_SIZE]
+                lines = [
+                    json.dumps(await self._format_model_item(item, fields, card_size), ensure_ascii=False)
+                    for item in chunk
+                ]
+                await response.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            
+            await response.write_eof()
+            return response
+            
+        except ConnectionResetError:
+            logger.debug(f"Client disconnected during {self.model_type} export")
+            return response
+        except Exception as e:
+            logger.error(f"Error exporting {self.model_type}s: {e}", exc_info=True)
+            if response is not None and response.prepared:
+                # Headers already sent, nothing useful can be returned
+                return response
+            return web.json_response({"error": str(e)}, status=500)
+    
+    async def _format_model_item(self, item: Dict, fields: Optional[set] = None, card_size: Optional[int] = None) -> Dict:
+        """Format a model for list responses, adding thumbnail_url when a card size was requested"""
+        formatted = await self.service.format_response(item, fields)
+        if card_size and (fields is None or 'thumbnail_url' in fields):
+            formatted['thumbnail_url'] = thumbnail_service.get_thumbnail_url(
+                item.get('preview_url', ''), card_size
+            )
+        return formatted
+    
+    @staticmethod
+    def _parse_fields(request: web.Request) -> Optional[set]:
+        """Parse the optional comma-separated `fields` projection parameter
+        
+        Returns:
+            Set of requested response keys, or None to return all fields
+        """
+        fields_param = request.query.get('fields', '').strip()
+        if not fields_param:
+            return None
+        fields = {field.strip() for field in fields_param.split(',') if field.strip()}
+        return fields or None
+    
     def _parse_common_params(self, request: web.Request) -> Dict:
         """Parse common query parameters"""
         # Parse basic pagination and sorting
@@ -538,82 +620,73 @@ class BaseModelRoutes(ABC):
             }, status=500)
     
     async def fetch_all_civitai(self, request: web.Request) -> web.Response:
-        """Fetch CivitAI metadata for all models in the background"""
+        """Start fetching CivitAI metadata for all models as a background job
+        
+        Returns the job id right away; progress is broadcast over the websocket
+        and can be polled with fetch-all-civitai/{job_id}.
+        """
         try:
             cache = await self.service.scanner.get_cached_data()
-            total = len(cache.raw_data)
-            processed = 0
-            success = 0
-            needs_resort = False
             
             # Prepare models to process
             to_process = [
                 model for model in cache.raw_data 
                 if model.get('sha256') and (not model.get('civitai') or 'id' not in model.get('civitai')) and model.get('from_civitai', True)
             ]
-            total_to_process = len(to_process)
-            
-            # Send initial progress
-            await ws_manager.broadcast({
-                'status': 'started',
-                'total': total_to_process,
-                'processed': 0,
-                'success': 0
-            })
             
-            # Process each model
-            for model in to_process:
-                try:
-                    original_name = model.get('model_name')
-                    if await ModelRouteUtils.fetch_and_update_model(
-                        sha256=model['sha256'],
-                        file_path=model['file_path'],
-                        model_data=model,
-                        update_cache_func=self.service.scanner.update_single_model_cache
-                    ):
-                        success += 1
-                        if original_name != model.get('model_name'):
-                            needs_resort = True
-                    
-                    processed += 1
-                    
-                    # Send progress update
-                    await ws_manager.broadcast({
-                        'status': 'processing',
-                        'total': total_to_process,
-                        'processed': processed,
-                        'success': success,
-                        'current_name': model.get('model_name', 'Unknown')
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error fetching CivitAI data for {model['file_path']}: {e}")
-            
-            if needs_resort:
-                await cache.resort()
-            
-            # Send completion message
-            await ws_manager.broadcast({
-                'status': 'completed',
-                'total': total_to_process,
-                'processed': processed,
-                'success': success
-            })
-                    
+            job, started = civitai_fetch_jobs.start(self.model_type, self.service.scanner, to_process)
             return web.json_response({
-                "success": True,
-                "message": f"Successfully updated {success} of {processed} processed {self.model_type}s (total: {total})"
+                'success': True,
+                'job_id': job.id,
+                'already_running': not started,
+                'status': job.to_dict()
             })
             
         except Exception as e:
-            # Send error message
-            await ws_manager.broadcast({
-                'status': 'error',
+            logger.error(f"Error in fetch_all_civitai for {self.model_type}s: {e}", exc_info=True)
+            return web.json_response({
+                'success': False,
                 'error': str(e)
-            })
-            logger.error(f"Error in fetch_all_civitai for {self.model_type}s: {e}")
-            return web.Response(text=str(e), status=500)
+            }, status=500)
     
+    async def get_fetch_all_civitai_status(self, request: web.Request) -> web.Response:
+        """Get the progress of a fetch all from CivitAI job"""
+        job = civitai_fetch_jobs.get(request.match_info['job_id'])
+        if job is None or job.model_type != self.model_type:
+            return web.json_response({'success': False, 'error': 'Job not found'}, status=404)
+        return web.json_response({'success': True, 'status': job.to_dict()})
+    
+    async def cancel_fetch_all_civitai(self, request: web.Request) -> web.Response:
+        """Cancel a running fetch all from CivitAI job (already fetched models are kept)"""
+        job = civitai_fetch_jobs.get(request.match_info['job_id'])
+        if job is None or job.model_type != self.model_type:
+            return web.json_response({'success': False, 'error': 'Job not found'}, status=404)
+        if not job.cancel():
+            return web.json_response({
+                'success': False,
+                'error': f"Job is already {job.status}",
+                'status': job.to_dict()
+            }, status=400)
+        return web.json_response({'success': True, 'status': job.to_dict()})
+    
+    async def get_full_civitai_data(self, request: web.Request) -> web.Response:
+        """Get a model's complete Civitai data, including the part trimmed at ingest"""
+        try:
+            file_path = request.query.get('file_path')
+            if not file_path:
+                return web.json_response({'success': False, 'error': 'file_path is required'}, status=400)
+
+            cache = await self.service.scanner.get_cached_data()
+            model = cache.get_item_by_path(file_path)
+            if model is None:
+                return web.json_response({'success': False, 'error': 'Model not found'}, status=404)
+
+            civitai = restore_civitai_data(model.get('civitai'), load_remainder(file_path))
+            return web.json_response({'success': True, 'civitai': civitai})
+        except Exception as e:
+            logger.error(f"Error getting full Civitai data: {e}", exc_info=True)
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
     async def get_civitai_versions(self, request: web.Request) -> web.Response:
         """Get available versions for a Civitai model with local availability info"""
         # This will be implemented by subclasses as they need CivitAI client access
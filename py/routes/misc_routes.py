@@ -10,8 +10,13 @@ from ..services.settings_manager import settings
 from ..utils.usage_stats import UsageStats
 from ..utils.lora_metadata import extract_trained_words
 from ..config import config
-from ..utils.constants import SUPPORTED_MEDIA_EXTENSIONS, NODE_TYPES, DEFAULT_NODE_COLOR
+from ..utils.constants import SUPPORTED_MEDIA_EXTENSIONS, NODE_TYPES, DEFAULT_NODE_COLOR, THUMBNAIL_SIZES
 from ..services.service_registry import ServiceRegistry
+from ..services.metrics import metrics
+from ..services.thumbnail_service import thumbnail_service
+from ..services.civitai_cache import civitai_cache
+from ..services.recipe_snapshot import SNAPSHOT_FILENAME
+from ..services.rate_limiter import civitai_download_limiter, civitai_limiter, civitai_media_limiter
 import re
 
 logger = logging.getLogger(__name__)
@@ -91,8 +96,15 @@ class MiscRoutes:
         
         # Add new route for clearing cache
         app.router.add_post('/api/clear-cache', MiscRoutes.clear_cache)
+        app.router.add_get('/api/civitai-cache', MiscRoutes.get_civitai_cache_stats)
 
         app.router.add_get('/api/health-check', lambda request: web.json_response({'status': 'ok'}))
+        
+        # Prometheus metrics endpoint
+        app.router.add_get('/api/lm/metrics', MiscRoutes.get_metrics)
+        
+        # Preview thumbnail variants
+        app.router.add_get('/api/lm/thumbnail', MiscRoutes.get_thumbnail)
 
         # Usage stats routes
         app.router.add_post('/api/update-usage-stats', MiscRoutes.update_usage_stats)
@@ -114,6 +126,73 @@ class MiscRoutes:
         # Add new route for checking if a model exists in the library
         app.router.add_get('/api/check-model-exists', MiscRoutes.check_model_exists)
 
+    @staticmethod
+    async def get_metrics(request):
+        """Expose request metrics and cache gauges in Prometheus text format"""
+        try:
+            # Refresh cache gauges from the registered scanners
+            for service_name, cache_name in (
+                ('lora_scanner', 'lora'),
+                ('checkpoint_scanner', 'checkpoint'),
+                ('embedding_scanner', 'embedding'),
+                ('recipe_scanner', 'recipe'),
+            ):
+                scanner = await ServiceRegistry.get_service(service_name)
+                if scanner is None:
+                    continue
+                cache = getattr(scanner, '_cache', None)
+                item_count = len(cache.raw_data) if cache is not None else 0
+                metrics.set_gauge('lm_cache_items', item_count, {'cache': cache_name},
+                                  'Number of items in each cache')
+                metrics.set_gauge('lm_cache_initializing', int(bool(getattr(scanner, '_is_initializing', False))),
+                                  {'cache': cache_name}, 'Whether the cache is currently being built')
+            
+            metrics.set_gauge('lm_metrics_enabled', int(metrics.enabled), help_text='Whether request metrics are recorded')
+            
+            return web.Response(
+                text=metrics.render_prometheus(),
+                content_type='text/plain',
+                headers={'Cache-Control': 'no-store'}
+            )
+        except Exception as e:
+            logger.error(f"Error rendering metrics: {e}", exc_info=True)
+            return web.Response(status=500, text=str(e))
+
+    @staticmethod
+    async def get_thumbnail(request):
+        """Serve a resized preview variant from the thumbnail cache"""
+        try:
+            source_path = request.query.get('path', '')
+            try:
+                width = int(request.query.get('w', str(THUMBNAIL_SIZES[-1])))
+            except ValueError:
+                return web.Response(status=400, text='Invalid width')
+            
+            if width not in THUMBNAIL_SIZES:
+                return web.Response(status=400, text=f'Width must be one of {list(THUMBNAIL_SIZES)}')
+            
+            real_path = os.path.realpath(source_path).replace(os.sep, '/')
+            if not source_path or not thumbnail_service.is_allowed_source(real_path):
+                return web.Response(status=403, text='Path not allowed')
+            
+            thumbnail_path = await thumbnail_service.get_thumbnail_path(real_path, width)
+            if not thumbnail_path:
+                return web.Response(status=404, text='Source image not found')
+            
+            # Versioned URLs never change content, so they can be cached forever
+            if request.query.get('v'):
+                cache_control = 'public, max-age=31536000, immutable'
+            else:
+                cache_control = 'public, max-age=300'
+            
+            return web.FileResponse(thumbnail_path, headers={
+                'Cache-Control': cache_control,
+                'Content-Type': 'image/webp'
+            })
+        except Exception as e:
+            logger.error(f"Error serving thumbnail: {e}", exc_info=True)
+            return web.Response(status=500, text=str(e))
+
     @staticmethod
     async def clear_cache(request):
         """Clear all cache files from the cache folder"""
@@ -127,13 +206,19 @@ class MiscRoutes:
                 logger.info("Cache folder does not exist, nothing to clear")
                 return web.json_response({'success': True, 'message': 'No cache folder found'})
             
+            # Empty the Civitai response cache (the database itself stays open)
+            loop = asyncio.get_event_loop()
+            civitai_entries = await loop.run_in_executor(None, civitai_cache.clear)
+            logger.info(f"Cleared {civitai_entries} cached Civitai responses")
+            
             # Get list of cache files before deleting for reporting
             cache_files = [f for f in os.listdir(cache_folder) if os.path.isfile(os.path.join(cache_folder, f))]
             deleted_files = []
             
-            # Delete each .msgpack file in the cache folder
+            # Delete each .msgpack file and the recipe snapshot (other JSON files there are persistent)
+            snapshot_files = (SNAPSHOT_FILENAME, f"{SNAPSHOT_FILENAME}.tmp")
             for filename in cache_files:
-                if filename.endswith('.msgpack'):
+                if filename.endswith('.msgpack') or filename in snapshot_files:
                     file_path = os.path.join(cache_folder, filename)
                     try:
                         os.remove(file_path)
@@ -149,7 +234,8 @@ class MiscRoutes:
             return web.json_response({
                 'success': True,
                 'message': f"Successfully cleared {len(deleted_files)} cache files",
-                'deleted_files': deleted_files
+                'deleted_files': deleted_files,
+                'civitai_responses_cleared': civitai_entries
             })
             
         except Exception as e:
@@ -159,6 +245,27 @@ class MiscRoutes:
                 'error': str(e)
             }, status=500)
 
+    @staticmethod
+    async def get_civitai_cache_stats(request):
+        """Summarize the Civitai response cache, request coalescing, connection reuse and rate limiter state"""
+        try:
+            loop = asyncio.get_event_loop()
+            stats = await loop.run_in_executor(None, civitai_cache.stats)
+            # Lookups per endpoint and how many shared an identical in-flight request
+            civitai_client = await ServiceRegistry.get_civitai_client()
+            stats['requests'] = civitai_client.request_counts
+            stats['connections'] = civitai_client.connection_counts
+            stats['rate_limits'] = {
+                limiter.name: limiter.stats() for limiter in (civitai_limiter, civitai_media_limiter, civitai_download_limiter)
+            }
+            return web.json_response({'success': True, **stats})
+        except Exception as e:
+            logger.error(f"Error getting Civitai cache stats: {e}", exc_info=True)
+            return web.json_response({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
     @staticmethod
     async def update_settings(request):
         """Update application settings"""
@@ -10,13 +10,13 @@ from aiohttp import web
 from typing import Dict
 import tempfile
 import json
-import asyncio
 import sys
 from ..utils.exif_utils import ExifUtils
 from ..recipes import RecipeParserFactory
 from ..utils.constants import CARD_PREVIEW_WIDTH
 
 from ..services.settings_manager import settings
+from ..services.thumbnail_service import thumbnail_service
 from ..config import config
 
 # Check if running in standalone mode
@@ -33,6 +33,9 @@ if not standalone_mode:
 
 logger = logging.getLogger(__name__)
 
+# Number of recipes formatted and written per chunk when streaming exports
+EXPORT_CHUNK_SIZE = 200
+
 class RecipeRoutes:
     """API route handlers for Recipe management"""
 
@@ -60,6 +63,7 @@ class RecipeRoutes:
         app.router.add_get('/loras/recipes', routes.handle_recipes_page)
 
         app.router.add_get('/api/recipes', routes.get_recipes)
+        app.router.add_get('/api/recipes/export', routes.export_recipes)
         app.router.add_get('/api/recipe/{recipe_id}', routes.get_recipe_detail)
         app.router.add_post('/api/recipes/analyze-image', routes.analyze_recipe_image)
         app.router.add_post('/api/recipes/analyze-local-image', routes.analyze_local_image)
@@ -96,6 +100,7 @@ class RecipeRoutes:
         
         # Add route to get recipes for a specific Lora
         app.router.add_get('/api/recipes/for-lora', routes.get_recipes_for_lora)
+        app.router.add_post('/api/recipes/counts-for-loras', routes.get_recipe_counts_for_loras)
         
         # Add new endpoint for scanning and rebuilding the recipe cache
         app.router.add_get('/api/recipes/scan', routes.scan_recipes)
@@ -170,69 +175,147 @@ class RecipeRoutes:
             # Get query parameters with defaults
             page = int(request.query.get('page', '1'))
             page_size = int(request.query.get('page_size', '20'))
-            sort_by = request.query.get('sort_by', 'date')
-            search = request.query.get('search', None)
-            
-            # Get search options (renamed for better clarity)
-            search_title = request.query.get('search_title', 'true').lower() == 'true'
-            search_tags = request.query.get('search_tags', 'true').lower() == 'true'  
-            search_lora_name = request.query.get('search_lora_name', 'true').lower() == 'true'
-            search_lora_model = request.query.get('search_lora_model', 'true').lower() == 'true'
-            
-            # Get filter parameters
-            base_models = request.query.get('base_models', None)
-            tags = request.query.get('tags', None)
-            
-            # New parameter: get LoRA hash filter
-            lora_hash = request.query.get('lora_hash', None)
-            
-            # Parse filter parameters
-            filters = {}
-            if base_models:
-                filters['base_model'] = base_models.split(',')
-            if tags:
-                filters['tags'] = tags.split(',')
-            
-            # Add search options to filters
-            search_options = {
-                'title': search_title,
-                'tags': search_tags,
-                'lora_name': search_lora_name,
-                'lora_model': search_lora_model
-            }
+            filter_params, fields, projection = self._parse_recipe_list_params(request)
+            card_size = thumbnail_service.parse_card_size(request.query.get('card_size'))
 
             # Get paginated data with the new lora_hash parameter
             result = await self.recipe_scanner.get_paginated_data(
                 page=page,
                 page_size=page_size,
-                sort_by=sort_by,
-                search=search,
-                filters=filters,
-                search_options=search_options,
-                lora_hash=lora_hash
+                fields=projection,
+                **filter_params
             )
             
             # Format the response data with static URLs for file paths
             for item in result['items']:
-                # Always ensure file_url is set
-                if 'file_path' in item:
-                    item['file_url'] = self._format_recipe_file_url(item['file_path'])
-                else:
-                    item['file_url'] = '/loras_static/images/no-preview.png'
-                
-                # 确保 loras 数组存在
-                if 'loras' not in item:
-                    item['loras'] = []
-                    
-                # 确保有 base_model 字段
-                if 'base_model' not in item:
-                    item['base_model'] = ""
+                self._format_recipe_list_item(item, fields, card_size)
             
             return web.json_response(result)
         except Exception as e:
             logger.error(f"Error retrieving recipes: {e}", exc_info=True)
             return web.json_response({"error": str(e)}, status=500)
 
+    async def export_recipes(self, request: web.Request) -> web.StreamResponse:
+        """Stream all recipes matching the list filters as NDJSON"""
+        response = None
+        try:
+            # Ensure services are initialized
+            await self.init_services()
+            
+            filter_params, fields, projection = self._parse_recipe_list_params(request)
+            card_size = thumbnail_service.parse_card_size(request.query.get('card_size'))
+            filtered_data = list(await self.recipe_scanner.get_filtered_data(**filter_params))
+            
+            response = web.StreamResponse(headers={
+                'Content-Type': 'application/x-ndjson; charset=utf-8',
+                'Content-Disposition': 'attachment; filename="recipes.ndjson"'
+            })
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            
+            for start in range(0, len(filtered_data), EXPORT_CHUNK_SIZE):
+                chunk = self.recipe_scanner.prepare_list_items(
+                    filtered_data[start:start + EXPORT_CHUNK_SIZE], projection
+                )
+                lines = []
+                for item in chunk:
+                    # Copy before formatting so cached entries are not modified
+                    item = self._format_recipe_list_item(dict(item), fields, card_size)
+                    lines.append(json.dumps(item, ensure_ascii=False))
+                await response.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            
+            await response.write_eof()
+            return response
+        except ConnectionResetError:
+            logger.debug("Client disconnected during recipe export")
+            return response
+        except Exception as e:
+            logger.error(f"Error exporting recipes: {e}", exc_info=True)
+            if response is not None and response.prepared:
+                return response
+            return web.json_response({"error": str(e)}, status=500)
+
+    def _parse_recipe_list_params(self, request: web.Request):
+        """Parse the filter and projection parameters shared by list and export
+        
+        Returns:
+            Tuple of (filter kwargs for the scanner, requested fields, scanner projection)
+        """
+        sort_by = request.query.get('sort_by', 'date')
+        search = request.query.get('search', None)
+        
+        # Get search options (renamed for better clarity)
+        search_title = request.query.get('search_title', 'true').lower() == 'true'
+        search_tags = request.query.get('search_tags', 'true').lower() == 'true'  
+        search_lora_name = request.query.get('search_lora_name', 'true').lower() == 'true'
+        search_lora_model = request.query.get('search_lora_model', 'true').lower() == 'true'
+        
+        # Get filter parameters
+        base_models = request.query.get('base_models', None)
+        tags = request.query.get('tags', None)
+        
+        # New parameter: get LoRA hash filter
+        lora_hash = request.query.get('lora_hash', None)
+        
+        # Optional field projection (comma-separated list of keys)
+        fields_param = request.query.get('fields', '').strip()
+        fields = {f.strip() for f in fields_param.split(',') if f.strip()} or None
+        # file_url and thumbnail_url are derived from file_path, so fetch it when needed
+        projection = fields
+        if fields is not None and fields & {'file_url', 'thumbnail_url'}:
+            projection = fields | {'file_path'}
+        
+        # Parse filter parameters
+        filters = {}
+        if base_models:
+            filters['base_model'] = base_models.split(',')
+        if tags:
+            filters['tags'] = tags.split(',')
+        
+        # Add search options to filters
+        search_options = {
+            'title': search_title,
+            'tags': search_tags,
+            'lora_name': search_lora_name,
+            'lora_model': search_lora_model
+        }
+        
+        filter_params = {
+            'sort_by': sort_by,
+            'search': search,
+            'filters': filters,
+            'search_options': search_options,
+            'lora_hash': lora_hash
+        }
+        return filter_params, fields, projection
+
+    def _format_recipe_list_item(self, item: Dict, fields: set = None, card_size: int = None) -> Dict:
+        """Add derived list fields (file_url, thumbnail_url, defaults) to a recipe item in place"""
+        # Always ensure file_url is set
+        if fields is None or 'file_url' in fields:
+            if 'file_path' in item:
+                item['file_url'] = self._format_recipe_file_url(item['file_path'])
+            else:
+                item['file_url'] = '/loras_static/images/no-preview.png'
+        
+        # Reference the thumbnail variant matching the requested card size
+        if card_size and (fields is None or 'thumbnail_url' in fields):
+            thumbnail_url = thumbnail_service.get_thumbnail_url(item.get('file_path', ''), card_size)
+            item['thumbnail_url'] = thumbnail_url or '/loras_static/images/no-preview.png'
+        
+        if fields is not None and 'file_path' not in fields:
+            item.pop('file_path', None)
+        
+        # 确保 loras 数组存在
+        if 'loras' not in item and (fields is None or 'loras' in fields):
+            item['loras'] = []
+            
+        # 确保有 base_model 字段
+        if 'base_model' not in item and (fields is None or 'base_model' in fields):
+            item['base_model'] = ""
+        
+        return item
+
     async def get_recipe_detail(self, request: web.Request) -> web.Response:
         """Get detailed information about a specific recipe"""
         try:
@@ -721,8 +804,7 @@ class RecipeRoutes:
             # Save the recipe JSON
             json_filename = f"{recipe_id}.recipe.json"
             json_path = os.path.join(recipes_dir, json_filename)
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=4, ensure_ascii=False)
+            await self.recipe_scanner.write_recipe_file(json_path, recipe_data)
 
             # Add recipe metadata to the image
             ExifUtils.append_recipe_metadata(image_path, recipe_data)
@@ -735,15 +817,9 @@ class RecipeRoutes:
                 if recipe_id in matching_recipes:
                     matching_recipes.remove(recipe_id)
             
-            # Simplified cache update approach
-            # Instead of trying to update the cache directly, just set it to None
-            # to force a refresh on the next get_cached_data call
+            # Update cache if it exists
             if self.recipe_scanner._cache is not None:
-                # Add the recipe to the raw data if the cache exists
-                # This is a simple direct update without locks or timeouts
-                self.recipe_scanner._cache.raw_data.append(recipe_data)
-                # Schedule a background task to resort the cache
-                asyncio.create_task(self.recipe_scanner._cache.resort())
+                await self.recipe_scanner._cache.add_recipe(recipe_data)
                 logger.info(f"Added recipe {recipe_id} to cache")
             
             return web.json_response({
@@ -784,7 +860,7 @@ class RecipeRoutes:
             image_path = recipe_data.get('file_path')
             
             # Delete recipe JSON file
-            os.remove(recipe_json_path)
+            await self.recipe_scanner.remove_recipe_file(recipe_json_path)
             logger.info(f"Deleted recipe JSON file: {recipe_json_path}")
             
             # Delete recipe image if it exists
@@ -792,15 +868,9 @@ class RecipeRoutes:
                 os.remove(image_path)
                 logger.info(f"Deleted recipe image: {image_path}")
             
-            # Simplified cache update approach
+            # Update cache if it exists
             if self.recipe_scanner._cache is not None:
-                # Remove the recipe from raw_data if it exists
-                self.recipe_scanner._cache.raw_data = [
-                    r for r in self.recipe_scanner._cache.raw_data 
-                    if str(r.get('id', '')) != recipe_id
-                ]
-                # Schedule a background task to resort the cache
-                asyncio.create_task(self.recipe_scanner._cache.resort())
+                await self.recipe_scanner._cache.remove_recipe(recipe_id)
                 logger.info(f"Removed recipe {recipe_id} from cache")
             
             return web.json_response({"success": True, "message": "Recipe deleted successfully"})
@@ -820,17 +890,11 @@ class RecipeRoutes:
             # Get all recipes from cache
             cache = await self.recipe_scanner.get_cached_data()
             
-            # Count tag occurrences
-            tag_counts = {}
-            for recipe in cache.raw_data:
-                if 'tags' in recipe and recipe['tags']:
-                    for tag in recipe['tags']:
-                        tag_counts[tag] = tag_counts.get(tag, 0) + 1
-            
-            # Sort tags by count and limit results
-            sorted_tags = [{'tag': tag, 'count': count} for tag, count in tag_counts.items()]
-            sorted_tags.sort(key=lambda x: x['count'], reverse=True)
-            top_tags = sorted_tags[:limit]
+            # Read tag counts from the maintained facet index
+            top_tags = [
+                {'tag': tag, 'count': count}
+                for tag, count in cache.facets.get_top('tags', limit)
+            ]
             
             return web.json_response({
                 'success': True,
@@ -852,16 +916,11 @@ class RecipeRoutes:
             # Get all recipes from cache
             cache = await self.recipe_scanner.get_cached_data()
             
-            # Count base model occurrences
-            base_model_counts = {}
-            for recipe in cache.raw_data:
-                if 'base_model' in recipe and recipe['base_model']:
-                    base_model = recipe['base_model']
-                    base_model_counts[base_model] = base_model_counts.get(base_model, 0) + 1
-            
-            # Sort base models by count
-            sorted_models = [{'name': model, 'count': count} for model, count in base_model_counts.items()]
-            sorted_models.sort(key=lambda x: x['count'], reverse=True)
+            # Read base model counts from the maintained facet index
+            sorted_models = [
+                {'name': model, 'count': count}
+                for model, count in cache.facets.get_top('base_model')
+            ]
             
             return web.json_response({
                 'success': True,
@@ -886,7 +945,7 @@ class RecipeRoutes:
             cache = await self.recipe_scanner.get_cached_data()
             
             # Find the specific recipe
-            recipe = next((r for r in cache.raw_data if str(r.get('id', '')) == recipe_id), None)
+            recipe = cache.get_recipe(recipe_id)
             
             if not recipe:
                 return web.json_response({"error": "Recipe not found"}, status=404)
@@ -956,7 +1015,7 @@ class RecipeRoutes:
             
             # Get recipe to determine filename
             cache = await self.recipe_scanner.get_cached_data()
-            recipe = next((r for r in cache.raw_data if str(r.get('id', '')) == recipe_id), None)
+            recipe = cache.get_recipe(recipe_id)
             
             # Set filename for download
             filename = f"recipe_{recipe.get('title', '').replace(' ', '_').lower() if recipe else recipe_id}"
@@ -1169,18 +1228,14 @@ class RecipeRoutes:
             # Save the recipe JSON
             json_filename = f"{recipe_id}.recipe.json"
             json_path = os.path.join(recipes_dir, json_filename)
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=4, ensure_ascii=False)
+            await self.recipe_scanner.write_recipe_file(json_path, recipe_data)
 
             # Add recipe metadata to the image
             ExifUtils.append_recipe_metadata(image_path, recipe_data)
             
             # Update cache
             if self.recipe_scanner._cache is not None:
-                # Add the recipe to the raw data if the cache exists
-                self.recipe_scanner._cache.raw_data.append(recipe_data)
-                # Schedule a background task to resort the cache
-                asyncio.create_task(self.recipe_scanner._cache.resort())
+                await self.recipe_scanner._cache.add_recipe(recipe_data)
                 logger.info(f"Added recipe {recipe_id} to cache")
             
             return web.json_response({
@@ -1207,7 +1262,7 @@ class RecipeRoutes:
             cache = await self.recipe_scanner.get_cached_data()
             
             # Find the specific recipe
-            recipe = next((r for r in cache.raw_data if str(r.get('id', '')) == recipe_id), None)
+            recipe = cache.get_recipe(recipe_id)
             
             if not recipe:
                 return web.json_response({"error": "Recipe not found"}, status=404)
@@ -1343,37 +1398,39 @@ class RecipeRoutes:
             if not target_lora:
                 return web.json_response({"error": f"Local LoRA not found with name: {target_name}"}, status=404)
                 
-            # Load recipe data
-            with open(recipe_path, 'r', encoding='utf-8') as f:
-                recipe_data = json.load(f)
-
-            lora = recipe_data.get("loras", [])[lora_index] if lora_index < len(recipe_data.get('loras', [])) else None
+            reconnected = {}
 
-            if lora is None:
-                return web.json_response({"error": "LoRA index out of range in recipe"}, status=404)
+            def reconnect(recipe_data: Dict) -> bool:
+                loras = recipe_data.get('loras', [])
+                if lora_index >= len(loras):
+                    return False
+                lora = loras[lora_index]
 
-            # Update LoRA data
-            lora['isDeleted'] = False
-            lora['exclude'] = False
-            lora['file_name'] = target_name
-            
-            # Update with information from the target LoRA
-            if 'sha256' in target_lora:
-                lora['hash'] = target_lora['sha256'].lower()
-            if target_lora.get("civitai"):
-                lora['modelName'] = target_lora['civitai']['model']['name']
-                lora['modelVersionName'] = target_lora['civitai']['name']
-                lora['modelVersionId'] = target_lora['civitai']['id']
-            
-            updated_lora = dict(lora)  # Make a copy for response
+                # Update LoRA data
+                lora['isDeleted'] = False
+                lora['exclude'] = False
+                lora['file_name'] = target_name
+                
+                # Update with information from the target LoRA
+                if 'sha256' in target_lora:
+                    lora['hash'] = target_lora['sha256'].lower()
+                if target_lora.get("civitai"):
+                    lora['modelName'] = target_lora['civitai']['model']['name']
+                    lora['modelVersionName'] = target_lora['civitai']['name']
+                    lora['modelVersionId'] = target_lora['civitai']['id']
+                
+                reconnected['lora'] = dict(lora)  # Make a copy for response
 
-            # Recalculate recipe fingerprint after updating LoRA
-            from ..utils.utils import calculate_recipe_fingerprint
-            recipe_data['fingerprint'] = calculate_recipe_fingerprint(recipe_data.get('loras', []))
+                # Recalculate recipe fingerprint after updating LoRA
+                from ..utils.utils import calculate_recipe_fingerprint
+                recipe_data['fingerprint'] = calculate_recipe_fingerprint(loras)
+                return True
                 
-            # Save updated recipe
-            with open(recipe_path, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=4, ensure_ascii=False)
+            # Load, update and save the recipe
+            recipe_data = await scanner.modify_recipe_file(recipe_path, reconnect)
+            if 'lora' not in reconnected:
+                return web.json_response({"error": "LoRA index out of range in recipe"}, status=404)
+            updated_lora = reconnected['lora']
 
             updated_lora['inLibrary'] = True
             updated_lora['preview_url'] = config.get_preview_static_url(target_lora['preview_url'])
@@ -1381,16 +1438,14 @@ class RecipeRoutes:
                 
             # Update in cache if it exists
             if scanner._cache is not None:
-                for cache_item in scanner._cache.raw_data:
-                    if cache_item.get('id') == recipe_id:
-                        # Replace loras array with updated version
-                        cache_item['loras'] = recipe_data['loras']
-                        # Update fingerprint in cache
-                        cache_item['fingerprint'] = recipe_data['fingerprint']
-                        
-                        # Resort the cache
-                        asyncio.create_task(scanner._cache.resort())
-                        break
+                cache_item = scanner._cache.get_recipe(recipe_id)
+                if cache_item is not None:
+                    # Replace loras array with updated version
+                    cache_item['loras'] = recipe_data['loras']
+                    # Update fingerprint in cache
+                    cache_item['fingerprint'] = recipe_data['fingerprint']
+                    # The reconnected LoRA has a new hash
+                    scanner._cache.reindex_recipe(recipe_id)
                         
             # Update EXIF metadata if image exists
             image_path = recipe_data.get('file_path')
@@ -1435,15 +1490,8 @@ class RecipeRoutes:
             # Get all recipes from cache
             cache = await self.recipe_scanner.get_cached_data()
             
-            # Filter recipes that use this Lora by hash
-            matching_recipes = []
-            for recipe in cache.raw_data:
-                # Check if any of the recipe's loras match this hash
-                loras = recipe.get('loras', [])
-                for lora in loras:
-                    if lora.get('hash', '').lower() == lora_hash.lower():
-                        matching_recipes.append(recipe)
-                        break  # No need to check other loras in this recipe
+            # Look up recipes that use this Lora through the hash index
+            matching_recipes = cache.get_recipes_by_lora_hash(lora_hash)
             
             # Process the recipes similar to get_paginated_data to ensure all needed data is available
             for recipe in matching_recipes:
@@ -1466,6 +1514,27 @@ class RecipeRoutes:
             logger.error(f"Error getting recipes for Lora: {str(e)}")
             return web.json_response({'success': False, 'error': str(e)}, status=500)
 
+    async def get_recipe_counts_for_loras(self, request: web.Request) -> web.Response:
+        """Get the number of recipes using each of several LoRAs (for card badges)
+
+        Expects a JSON body of the form {"hashes": ["<sha256>", ...]}.
+        """
+        try:
+            await self.init_services()
+
+            data = await request.json()
+            hashes = data.get('hashes', [])
+            if not isinstance(hashes, list):
+                return web.json_response({'success': False, 'error': 'hashes must be a list'}, status=400)
+
+            cache = await self.recipe_scanner.get_cached_data()
+            counts = cache.count_recipes_for_hashes(h for h in hashes if isinstance(h, str))
+
+            return web.json_response({'success': True, 'counts': counts})
+        except Exception as e:
+            logger.error(f"Error getting recipe counts for LoRAs: {e}", exc_info=True)
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
     async def scan_recipes(self, request: web.Request) -> web.Response:
         """API endpoint for scanning and rebuilding the recipe cache"""
         try:
@@ -1495,6 +1564,7 @@ class RecipeRoutes:
             
             # Get all duplicate recipes
             duplicate_groups = await self.recipe_scanner.find_all_duplicate_recipes()
+            cache = await self.recipe_scanner.get_cached_data()
             
             # Create response data with additional recipe information
             response_data = []
@@ -1507,13 +1577,13 @@ class RecipeRoutes:
                 # Get recipe details for each recipe in the group
                 recipes = []
                 for recipe_id in recipe_ids:
-                    recipe = await self.recipe_scanner.get_recipe_by_id(recipe_id)
+                    recipe = cache.get_recipe(recipe_id)
                     if recipe:
                         # Add only needed fields to keep response size manageable
                         recipes.append({
                             'id': recipe.get('id'),
                             'title': recipe.get('title'),
-                            'file_url': recipe.get('file_url') or self._format_recipe_file_url(recipe.get('file_path', '')),
+                            'file_url': self._format_recipe_file_url(recipe.get('file_path', '')),
                             'modified': recipe.get('modified'),
                             'created_date': recipe.get('created_date'),
                             'lora_count': len(recipe.get('loras', [])),
@@ -1594,7 +1664,7 @@ class RecipeRoutes:
                     image_path = recipe_data.get('file_path')
                     
                     # Delete recipe JSON file
-                    os.remove(recipe_json_path)
+                    await self.recipe_scanner.remove_recipe_file(recipe_json_path)
                     
                     # Delete recipe image if it exists
                     if image_path and os.path.exists(image_path):
@@ -1610,13 +1680,8 @@ class RecipeRoutes:
             
             # Update cache if any recipes were deleted
             if deleted_recipes and self.recipe_scanner._cache is not None:
-                # Remove deleted recipes from raw_data
-                self.recipe_scanner._cache.raw_data = [
-                    r for r in self.recipe_scanner._cache.raw_data 
-                    if r.get('id') not in deleted_recipes
-                ]
-                # Resort the cache
-                asyncio.create_task(self.recipe_scanner._cache.resort())
+                # Remove deleted recipes in one batch (one pass over raw_data)
+                await self.recipe_scanner._cache.remove_recipes(deleted_recipes)
                 logger.info(f"Removed {len(deleted_recipes)} recipes from cache")
             
             return web.json_response({
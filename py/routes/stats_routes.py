@@ -210,16 +210,10 @@ class StatsRoutes:
             checkpoint_cache = await self.checkpoint_scanner.get_cached_data()
             embedding_cache = await self.embedding_scanner.get_cached_data()
             
-            # Count tag frequencies
-            all_tags = []
-            for lora in lora_cache.raw_data:
-                all_tags.extend(lora.get('tags', []))
-            for cp in checkpoint_cache.raw_data:
-                all_tags.extend(cp.get('tags', []))
-            for emb in embedding_cache.raw_data:
-                all_tags.extend(emb.get('tags', []))
-            
-            tag_counts = Counter(all_tags)
+            # Combine the maintained tag facets of each cache
+            tag_counts = Counter(lora_cache.facets.get_counts('tags'))
+            tag_counts.update(checkpoint_cache.facets.get_counts('tags'))
+            tag_counts.update(embedding_cache.facets.get_counts('tags'))
             
             # Get top 50 tags
             top_tags = [{'tag': tag, 'count': count} for tag, count in tag_counts.most_common(50)]
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Type
+from typing import Callable, Dict, List, Optional, Type
 import logging
 
 from ..utils.models import BaseModelMetadata
@@ -48,6 +48,23 @@ class BaseModelService(ABC):
         Returns:
             Dict containing paginated results
         """
+        filtered_data = await self.get_filtered_data(
+            sort_by=sort_by, folder=folder, search=search, fuzzy_search=fuzzy_search,
+            base_models=base_models, tags=tags, search_options=search_options,
+            hash_filters=hash_filters, favorites_only=favorites_only, **kwargs
+        )
+        return self._paginate(filtered_data, page, page_size)
+    
+    async def get_filtered_data(self, sort_by: str = 'name', folder: str = None,
+                                search: str = None, fuzzy_search: bool = False,
+                                base_models: list = None, tags: list = None,
+                                search_options: dict = None, hash_filters: dict = None,
+                                favorites_only: bool = False, **kwargs) -> List[Dict]:
+        """Get the full sorted and filtered model list without pagination
+        
+        Accepts the same filters as get_paginated_data. The returned list holds
+        references to cached entries, so callers must not mutate them.
+        """
         cache = await self.scanner.get_cached_data()
 
         # Parse sort_by into sort_key and order
@@ -77,8 +94,8 @@ class BaseModelService(ABC):
         if hash_filters:
             filtered_data = await self._apply_hash_filters(filtered_data, hash_filters)
             
-            # Jump to pagination for hash filters
-            return self._paginate(filtered_data, page, page_size)
+            # Hash filters bypass all other filters
+            return filtered_data
         
         # Apply common filters
         filtered_data = await self._apply_common_filters(
@@ -94,7 +111,7 @@ class BaseModelService(ABC):
         # Apply model-specific filters
         filtered_data = await self._apply_specific_filters(filtered_data, **kwargs)
         
-        return self._paginate(filtered_data, page, page_size)
+        return filtered_data
     
     async def _apply_hash_filters(self, data: List[Dict], hash_filters: Dict) -> List[Dict]:
         """Apply hash-based filtering"""
@@ -237,10 +254,27 @@ class BaseModelService(ABC):
         }
     
     @abstractmethod
-    async def format_response(self, model_data: Dict) -> Dict:
-        """Format model data for API response - must be implemented by subclasses"""
+    async def format_response(self, model_data: Dict, fields: Optional[set] = None) -> Dict:
+        """Format model data for API response - must be implemented by subclasses
+        
+        Args:
+            model_data: Cached model entry
+            fields: Optional set of response keys to include (None = all)
+        """
         pass
     
+    @staticmethod
+    def _project_fields(builders: Dict[str, Callable], fields: Optional[set] = None) -> Dict:
+        """Build a response dict, only evaluating builders for requested fields
+        
+        Args:
+            builders: Mapping of response key to a zero-arg callable producing its value
+            fields: Optional set of keys to include (None = all)
+        """
+        if fields is None:
+            return {key: build() for key, build in builders.items()}
+        return {key: build() for key, build in builders.items() if key in fields}
+    
     # Common service methods that delegate to scanner
     async def get_top_tags(self, limit: int = 20) -> List[Dict]:
         """Get top tags sorted by frequency"""
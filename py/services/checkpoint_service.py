@@ -20,27 +20,27 @@ class CheckpointService(BaseModelService):
         """
         super().__init__("checkpoint", scanner, CheckpointMetadata)
     
-    async def format_response(self, checkpoint_data: Dict) -> Dict:
+    async def format_response(self, checkpoint_data: Dict, fields: Optional[set] = None) -> Dict:
         """Format Checkpoint data for API response"""
-        return {
-            "model_name": checkpoint_data["model_name"],
-            "file_name": checkpoint_data["file_name"],
-            "preview_url": config.get_preview_static_url(checkpoint_data.get("preview_url", "")),
-            "preview_nsfw_level": checkpoint_data.get("preview_nsfw_level", 0),
-            "base_model": checkpoint_data.get("base_model", ""),
-            "folder": checkpoint_data["folder"],
-            "sha256": checkpoint_data.get("sha256", ""),
-            "file_path": checkpoint_data["file_path"].replace(os.sep, "/"),
-            "file_size": checkpoint_data.get("size", 0),
-            "modified": checkpoint_data.get("modified", ""),
-            "tags": checkpoint_data.get("tags", []),
-            "modelDescription": checkpoint_data.get("modelDescription", ""),
-            "from_civitai": checkpoint_data.get("from_civitai", True),
-            "notes": checkpoint_data.get("notes", ""),
-            "model_type": checkpoint_data.get("model_type", "checkpoint"),
-            "favorite": checkpoint_data.get("favorite", False),
-            "civitai": ModelRouteUtils.filter_civitai_data(checkpoint_data.get("civitai", {}))
-        }
+        return self._project_fields({
+            "model_name": lambda: checkpoint_data["model_name"],
+            "file_name": lambda: checkpoint_data["file_name"],
+            "preview_url": lambda: config.get_preview_static_url(checkpoint_data.get("preview_url", "")),
+            "preview_nsfw_level": lambda: checkpoint_data.get("preview_nsfw_level", 0),
+            "base_model": lambda: checkpoint_data.get("base_model", ""),
+            "folder": lambda: checkpoint_data["folder"],
+            "sha256": lambda: checkpoint_data.get("sha256", ""),
+            "file_path": lambda: checkpoint_data["file_path"].replace(os.sep, "/"),
+            "file_size": lambda: checkpoint_data.get("size", 0),
+            "modified": lambda: checkpoint_data.get("modified", ""),
+            "tags": lambda: checkpoint_data.get("tags", []),
+            "modelDescription": lambda: checkpoint_data.get("modelDescription", ""),
+            "from_civitai": lambda: checkpoint_data.get("from_civitai", True),
+            "notes": lambda: checkpoint_data.get("notes", ""),
+            "model_type": lambda: checkpoint_data.get("model_type", "checkpoint"),
+            "favorite": lambda: checkpoint_data.get("favorite", False),
+            "civitai": lambda: ModelRouteUtils.filter_civitai_data(checkpoint_data.get("civitai", {}))
+        }, fields)
     
     def find_duplicate_hashes(self) -> Dict:
         """Find Checkpoints with duplicate SHA256 hashes"""
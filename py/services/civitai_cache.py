@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Default freshness per endpoint in seconds (overridable with the `civitai_cache_ttls` setting)
+DEFAULT_TTLS = {
+    'by_hash': 6 * 3600,
+    'model_version': 6 * 3600,
+    'model': 3600,
+}
+# How long a 404 is remembered
+NEGATIVE_TTL = 3600
+
+
+class CivitaiResponseCache:
+    """Disk-backed cache of Civitai API responses
+
+    Entries are keyed by request URL and carry the endpoint name, status,
+    decoded JSON body and validators (ETag / Last-Modified). Fresh entries are
+    served directly; stale ones are revalidated with a conditional request.
+    404 responses are cached for a shorter time so deleted or unknown models
+    are not requested over and over.
+    """
+
+    def __init__(self):
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.db_path = os.path.join(project_dir, 'cache', 'civitai_responses.sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.get('civitai_cache_enabled', True))
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY,'
+                ' endpoint TEXT NOT NULL,'
+                ' status INTEGER NOT NULL,'
+                ' body TEXT,'
+                ' etag TEXT,'
+                ' last_modified TEXT,'
+                ' fetched_at REAL NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def get_ttl(endpoint: str, status: int) -> float:
+        """Get the freshness lifetime for a response"""
+        if status == 404:
+            return NEGATIVE_TTL
+        ttls = {**DEFAULT_TTLS, **(settings.get('civitai_cache_ttls') or {})}
+        return ttls.get(endpoint, 0)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Get a cached response
+
+        Returns:
+            Dict with status, data, etag, last_modified and fresh, or None if not cached
+        """
+        try:
+            with self._lock:
+                row = self._get_conn().execute(
+                    'SELECT status, body, etag, last_modified, expires_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache lookup failed: {e}")
+            return None
+        if row is None:
+            return None
+        status, body, etag, last_modified, expires_at = row
+        return {
+            'status': status,
+            'data': json.loads(body) if body is not None else None,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': expires_at > time.time()
+        }
+
+    def lookup_many(self, keys: List[str]) -> Dict[str, Dict]:
+        """Get several cached responses at once (same entry format as lookup)
+
+        Returns:
+            Dict of key -> entry for the keys that are cached
+        """
+        entries = {}
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                # Stay well below SQLite's bound parameter limit
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows = conn.execute(
+                        'SELECT key, status, body, etag, last_modified, expires_at FROM responses '
+                        f'WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                    ).fetchall()
+                    for key, status, body, etag, last_modified, expires_at in rows:
+                        entries[key] = {
+                            'status': status,
+                            'data': json.loads(body) if body is not None else None,
+                            'etag': etag,
+                            'last_modified': last_modified,
+                            'fresh': expires_at > now
+                        }
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache lookup failed: {e}")
+        return entries
+
+    def store(self, key: str, endpoint: str, status: int, data, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> None:
+        """Store a response (only 200 and 404 responses are worth caching)"""
+        ttl = self.get_ttl(endpoint, status)
+        if ttl <= 0:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, endpoint, status, json.dumps(data) if data is not None else None,
+                     etag, last_modified, now, now + ttl)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache store failed: {e}")
+
+    def refresh(self, key: str, endpoint: str) -> None:
+        """Extend a stale entry after the server confirmed it is unchanged (304)"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute(
+                    'UPDATE responses SET fetched_at = ?, expires_at = ? WHERE key = ?',
+                    (now, now + self.get_ttl(endpoint, 200), key)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache refresh failed: {e}")
+
+    def clear(self) -> int:
+        """Delete all cached responses
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                removed = conn.execute('DELETE FROM responses').rowcount
+                conn.commit()
+                conn.execute('VACUUM')
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache clear failed: {e}")
+            return 0
+
+    def stats(self) -> Dict:
+        """Summarize cached entries per endpoint"""
+        now = time.time()
+        endpoints = {}
+        try:
+            with self._lock:
+                rows = self._get_conn().execute(
+                    'SELECT endpoint, status, expires_at > ?, COUNT(*), COALESCE(SUM(LENGTH(body)), 0) '
+                    'FROM responses GROUP BY endpoint, status, expires_at > ?', (now, now)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Civitai cache stats failed: {e}")
+            rows = []
+        for endpoint, status, fresh, count, size in rows:
+            summary = endpoints.setdefault(endpoint, {'entries': 0, 'fresh': 0, 'not_found': 0, 'bytes': 0})
+            summary['entries'] += count
+            summary['bytes'] += size
+            if fresh:
+                summary['fresh'] += count
+            if status == 404:
+                summary['not_found'] += count
+        return {
+            'enabled': self.enabled,
+            'path': self.db_path,
+            'endpoints': endpoints,
+            'ttls': {**DEFAULT_TTLS, **(settings.get('civitai_cache_ttls') or {})},
+            'negative_ttl': NEGATIVE_TTL
+        }
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global instance
+civitai_cache = CivitaiResponseCache()
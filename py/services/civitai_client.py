@@ -3,12 +3,29 @@ import aiohttp
 import os
 import logging
 import asyncio
+import copy
+import hashlib
+import json
 from email.parser import Parser
-from typing import Optional, Dict, Tuple, List
+from typing import Any, Optional, Dict, Iterable, Tuple, List
 from urllib.parse import unquote
+from .civitai_cache import civitai_cache
+from .metrics import metrics
+from .rate_limiter import civitai_download_limiter, civitai_media_limiter, limited_get, limited_request
 
 logger = logging.getLogger(__name__)
 
+# Hashes sent per batched by-hash lookup
+BY_HASH_BATCH_SIZE = 100
+# Suffixes of an unfinished download and of its resume state (`<file>.part`, `<file>.part.json`)
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.json'
+# Smallest byte range fetched on its own connection by segmented downloads
+DEFAULT_MIN_SEGMENT_SIZE = 32 * 1024 * 1024
+
+class RemoteFileChangedError(Exception):
+    """A server answered a resume range request with a different file"""
+
 class CivitaiClient:
     _instance = None
     _lock = asyncio.Lock()
@@ -27,24 +44,37 @@ class CivitaiClient:
             return
         self._initialized = True
         
-        self.base_url = "https://civitai.com/api/v1"
         self.headers = {
             'User-Agent': 'ComfyUI-LoRA-Manager/1.0'
         }
         self._session = None
-        self._session_created_at = None
+        self._session_loop = None
         # Set default buffer size to 1MB for higher throughput
         self.chunk_size = 1024 * 1024
+        # In-flight API requests by event loop and URL, shared by concurrent callers
+        self._in_flight: Dict[Tuple[asyncio.AbstractEventLoop, str], List] = {}
+        # endpoint -> {'requests': int, 'coalesced': int}
+        self.request_counts: Dict[str, Dict[str, int]] = {}
+        # Connection pool usage, updated by the session's trace hooks
+        self.connection_counts = {'created': 0, 'reused': 0}
+    
+    @property
+    def base_url(self) -> str:
+        """Civitai API root; the `civitai_base_url` setting can point it at another host (e.g. a local stub)"""
+        from .settings_manager import settings
+        return f"{(settings.get('civitai_base_url') or 'https://civitai.com').rstrip('/')}/api/v1"
     
     @property
     async def session(self) -> aiohttp.ClientSession:
-        """Lazy initialize the session"""
+        """Lazy initialize the shared session"""
         if self._session is None:
-            # Optimize TCP connection parameters
+            from .settings_manager import settings
+            # One pooled connector shared by every caller and kept for the app's lifetime
             connector = aiohttp.TCPConnector(
                 ssl=True,
-                limit=8,  # Increase from 3 to 8 for better parallelism
+                limit=max(1, int(settings.get('civitai_pool_size', 8))),
                 ttl_dns_cache=300,  # Enable DNS caching with reasonable timeout
+                keepalive_timeout=60,  # Keep idle connections around between bursts
                 force_close=False,  # Keep connections for reuse
                 enable_cleanup_closed=True
             )
@@ -54,21 +84,56 @@ class CivitaiClient:
             self._session = aiohttp.ClientSession(
                 connector=connector, 
                 trust_env=trust_env,
-                timeout=timeout
+                timeout=timeout,
+                trace_configs=[self._create_trace_config()]
             )
-            self._session_created_at = datetime.now()
+            self._session_loop = asyncio.get_running_loop()
         return self._session
     
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace hooks counting new and reused pool connections"""
+        async def on_connection_create_end(session, context, params):
+            self.connection_counts['created'] += 1
+            metrics.inc_counter('lm_civitai_connections_created_total', 1,
+                                help_text='New connections opened by the Civitai session pool')
+        
+        async def on_connection_reuseconn(session, context, params):
+            self.connection_counts['reused'] += 1
+            metrics.inc_counter('lm_civitai_connections_reused_total', 1,
+                                help_text='Requests served over a kept-alive pooled connection')
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+    
     async def _ensure_fresh_session(self):
-        """Refresh session if it's been open too long"""
+        """Get the shared session, recreating it only if it is no longer usable
+        
+        The session is long-lived so keep-alive connections and the DNS cache
+        survive between requests; it is only replaced when it was closed or
+        belongs to another (e.g. finished temporary) event loop.
+        """
         if self._session is not None:
-            if not hasattr(self, '_session_created_at') or \
-               (datetime.now() - self._session_created_at).total_seconds() > 300:  # 5 minutes
-                await self.close()
+            if self._session.closed:
                 self._session = None
+            elif self._session_loop is not asyncio.get_running_loop():
+                self._release_foreign_session()
         
         return await self.session
 
+    def _release_foreign_session(self) -> None:
+        """Drop a session created on another event loop, closing it on that loop"""
+        session, owner_loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if owner_loop is None or owner_loop.is_closed():
+            # Its connections can't be closed without their loop anymore
+            logger.debug("Dropping Civitai session of a closed event loop")
+            return
+        # A session must be closed on its own loop; this runs there once the loop gets to it
+        asyncio.run_coroutine_threadsafe(session.close(), owner_loop)
+
     def _parse_content_disposition(self, header: str) -> str:
         """Parse filename from content-disposition header"""
         if not header:
@@ -101,101 +166,675 @@ class CivitaiClient:
             
         return headers
 
-    async def _download_file(self, url: str, save_dir: str, default_filename: str, progress_callback=None) -> Tuple[bool, str]:
-        """Download file with content-disposition support and progress tracking
+    async def _request_json(self, endpoint: str, url: str, headers: Optional[dict] = None) -> Tuple[int, Optional[Any]]:
+        """GET a Civitai API URL and decode its JSON body through the response cache
+        
+        Fresh cached responses (including cached 404s) are returned without a
+        request; stale ones are revalidated with If-None-Match / If-Modified-Since.
+        If revalidation fails on a network error, the stale response is used.
+        Concurrent calls for the same URL share a single request.
+        
+        Args:
+            endpoint: Cache endpoint name used for TTLs (by_hash, model_version, model)
+            url: Request URL
+            headers: Optional request headers (their API key is part of the cache key)
+            
+        Returns:
+            Tuple[int, Optional[Any]]: HTTP status and decoded body (None if not JSON)
+        """
+        counts = self.request_counts.setdefault(endpoint, {'requests': 0, 'coalesced': 0})
+        counts['requests'] += 1
+        metrics.inc_counter('lm_civitai_requests_total', 1, {'endpoint': endpoint},
+                            help_text='Civitai API lookups by endpoint')
+        
+        key = self._cache_key(url, headers)
+        # Futures can only be awaited on their own loop, so requests are shared per loop
+        flight_key = (asyncio.get_running_loop(), key)
+        entry = self._in_flight.get(flight_key)
+        if entry is not None:
+            entry[1] += 1
+            counts['coalesced'] += 1
+            metrics.inc_counter('lm_civitai_requests_coalesced_total', 1, {'endpoint': endpoint},
+                                help_text='Civitai API lookups served by an identical in-flight request')
+        else:
+            future = asyncio.ensure_future(self._fetch_json(endpoint, url, headers))
+            # [shared future, number of callers waiting on it]
+            entry = self._in_flight[flight_key] = [future, 1]
+            future.add_done_callback(lambda _: self._in_flight.pop(flight_key, None))
+        
+        # Shield the shared request so one cancelled caller doesn't cancel it for the others
+        status, data = await asyncio.shield(entry[0])
+        if entry[1] > 1 and data is not None:
+            # Callers may enrich the body in place, so each gets its own copy
+            data = copy.deepcopy(data)
+        return status, data
+
+    async def _fetch_json(self, endpoint: str, url: str, headers: Optional[dict] = None) -> Tuple[int, Optional[Any]]:
+        """Perform a cached request for _request_json (see there)"""
+        loop = asyncio.get_event_loop()
+        key = self._cache_key(url, headers)
+        cached = None
+        if civitai_cache.enabled:
+            cached = await loop.run_in_executor(None, civitai_cache.lookup, key)
+            if cached and cached['fresh']:
+                return cached['status'], cached['data']
+        
+        request_headers = dict(headers or {})
+        if cached and cached['status'] == 200:
+            if cached['etag']:
+                request_headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                request_headers['If-Modified-Since'] = cached['last_modified']
+        
+        try:
+            session = await self._ensure_fresh_session()
+            async with limited_get(session, url, headers=request_headers) as response:
+                if response.status == 304 and cached:
+                    await loop.run_in_executor(None, civitai_cache.refresh, key, endpoint)
+                    return cached['status'], cached['data']
+                
+                try:
+                    data = await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, ValueError):
+                    data = None
+                
+                # A 200 whose body didn't parse is not worth keeping
+                cacheable = response.status == 404 or (response.status == 200 and data is not None)
+                if civitai_cache.enabled and cacheable:
+                    await loop.run_in_executor(
+                        None, civitai_cache.store, key, endpoint, response.status, data,
+                        response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    )
+                return response.status, data
+        except aiohttp.ClientError as e:
+            if cached:
+                logger.warning(f"Using stale Civitai response for {url} after network error: {e}")
+                return cached['status'], cached['data']
+            raise
+
+    @staticmethod
+    def _cache_key(url: str, headers: Optional[dict] = None) -> str:
+        """Get the response cache key of a request
+        
+        Anonymous requests are keyed by URL alone; authenticated ones also by a
+        digest of their API key, since Civitai answers them differently (e.g.
+        early-access versions are a 404 without a key).
+        """
+        auth = (headers or {}).get('Authorization')
+        if not auth:
+            return url
+        return f"{url}#auth={hashlib.sha256(auth.encode('utf-8')).hexdigest()[:16]}"
+
+    async def _download_file(self, url: str, save_dir: str, default_filename: str, progress_callback=None,
+                             expected_sha256: Optional[str] = None) -> Tuple[bool, str]:
+        """Download file with content-disposition support, progress tracking and resume
+
+        The file is streamed to `<default_filename>.part`, with the server's
+        validators and the bytes safely written kept in a `.part.json` state
+        file. A dropped connection is resumed with a Range request (up to the
+        `download_resume_retries` setting), and so is a later download of the
+        same URL into the same folder, even after a restart. The finished file
+        is checked against the announced size and, if given, the SHA256 hash
+        before it is renamed into place.
+
+        With the `download_segments` setting above 1, large files are fetched
+        as byte ranges over several connections (see _download_segmented);
+        servers without range support get the single stream.
 
         Args:
             url: Download URL
             save_dir: Directory to save the file
             default_filename: Fallback filename if none provided in headers
             progress_callback: Optional async callback function for progress updates (0-100)
+            expected_sha256: Optional SHA256 the downloaded file must match
 
         Returns:
             Tuple[bool, str]: (success, save_path or error message)
         """
-        logger.debug(f"Resolving DNS for: {url}")
+        from .settings_manager import settings
+        part_path = os.path.join(save_dir, default_filename) + PART_SUFFIX
+        state_path = part_path + STATE_SUFFIX
+        retries = max(0, int(settings.get('download_resume_retries', 5)))
+        max_segments = max(1, int(settings.get('download_segments', 1)))
+
+        result = None
+        state = self._load_download_state(state_path)
+        if max_segments > 1 or (state and state.get('segments')):
+            try:
+                result = await self._download_segmented(url, part_path, state_path, progress_callback,
+                                                        max_segments, retries, bool(expected_sha256))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Network error during download: {e}")
+                return False, f"Network error: {str(e)}"
+            except Exception as e:
+                logger.error(f"Download error: {e}")
+                return False, str(e)
+
+        failures = 0
+        while result is None:
+            size_before = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            try:
+                result = await self._download_to_part(url, part_path, state_path, progress_callback,
+                                                      bool(expected_sha256))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Only attempts in a row that got no new bytes count against the retries
+                if os.path.exists(part_path) and os.path.getsize(part_path) > size_before:
+                    failures = 0
+                failures += 1
+                if failures > retries:
+                    logger.error(f"Network error during download: {e}")
+                    return False, f"Network error: {str(e)}"
+                delay = min(2 ** (failures - 1), 30)
+                logger.warning(f"Download of {url} interrupted ({e}), resuming in {delay}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Download error: {e}")
+                return False, str(e)
+
+        success, filename, sha256 = result
+        if not success:
+            return False, filename
+
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            logger.error(f"Hash mismatch for {url}: expected {expected_sha256.lower()}, got {sha256}")
+            self._discard_partial(part_path)
+            return False, "Downloaded file is corrupted (SHA256 mismatch)"
+
+        save_path = os.path.join(save_dir, filename)
+        os.replace(part_path, save_path)
+        self._discard_partial(part_path)
+
+        # Ensure 100% progress is reported
+        if progress_callback:
+            await progress_callback(100)
+
+        return True, save_path
+
+    async def _download_segmented(self, url: str, part_path: str, state_path: str, progress_callback,
+                                  max_segments: int, retries: int,
+                                  compute_hash: bool) -> Optional[Tuple[bool, str, Optional[str]]]:
+        """Fetch a file as byte ranges over up to `max_segments` connections into a preallocated .part file
+
+        The file is split into segments of at least `download_segment_min_size`
+        bytes; segment positions are kept in the state file so an interrupted
+        download resumes every segment. A connection that finishes its segment
+        takes over half of the largest remaining one, and a connection that
+        keeps failing hands its segment back and retires, so the number of
+        parallel connections adapts to what the server tolerates.
+
+        Returns:
+            Optional[Tuple[bool, str, Optional[str]]]: Same as _download_to_part, or None when the
+            server doesn't support ranges or the file is too small to split (use a single stream)
+        """
+        from .settings_manager import settings
+        min_segment_size = max(1, int(settings.get('download_segment_min_size', DEFAULT_MIN_SEGMENT_SIZE)))
         session = await self._ensure_fresh_session()
+        headers = self._get_request_headers()
+        headers['Accept-Encoding'] = 'identity'
+
+        state = self._load_download_state(state_path)
+        if state and state.get('url') == url and not state.get('segments'):
+            # A single stream download is already under way, let it continue
+            return None
+        if not (state and state.get('url') == url and os.path.exists(part_path)):
+            state = None
+
+        # Probe with a one byte range: tells whether ranges work, the size and where the file lives
+        probe_headers = {**headers, 'Range': 'bytes=0-0'}
+        validator = state and (state.get('etag') or state.get('last_modified'))
+        if validator:
+            probe_headers['If-Range'] = validator
+        async with limited_get(session, url, civitai_download_limiter, headers=probe_headers, allow_redirects=True) as response:
+            start, total_size = self._parse_content_range(response.headers.get('Content-Range'))
+            if response.status != 206 or start != 0 or not total_size:
+                # No range support, the file changed, or an error the single stream will report
+                if state:
+                    self._discard_partial(part_path)
+                return None
+            filename = (self._parse_content_disposition(response.headers.get('Content-Disposition'))
+                        or os.path.basename(part_path)[:-len(PART_SUFFIX)])
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            # Fetch the segments straight from where the download redirected to (e.g. the CDN)
+            resolved_url = str(response.url)
+
+        if state and state.get('total_size') != total_size:
+            self._discard_partial(part_path)
+            state = None
+        if state is None:
+            count = min(max_segments, total_size // min_segment_size)
+            if count < 2:
+                return None
+            segment_size = -(-total_size // count)
+            state = {
+                'url': url,
+                'filename': filename,
+                'total_size': total_size,
+                # Weak ETags can't be used with If-Range
+                'etag': etag if etag and not etag.startswith('W/') else None,
+                'last_modified': last_modified,
+                'segments': [
+                    {'start': i * segment_size, 'end': min(total_size, (i + 1) * segment_size) - 1,
+                     'position': i * segment_size}
+                    for i in range(count)
+                ]
+            }
+            # Preallocate the whole file so every segment can write at its own offset
+            with open(part_path, 'wb') as f:
+                f.truncate(total_size)
+            self._save_download_state(state_path, state)
+        else:
+            metrics.inc_counter('lm_download_resumes_total', 1, help_text='Model downloads resumed from a partial file')
+            logger.info(f"Resuming segmented download of {url}")
+
+        segment_headers = dict(headers)
+        if resolved_url != url:
+            # Redirect targets are pre-signed and must not receive the API key
+            segment_headers.pop('Authorization', None)
+        validator = state.get('etag') or state.get('last_modified')
+        if validator:
+            segment_headers['If-Range'] = validator
+
+        segments = state['segments']
+        pending = [segment for segment in segments if segment['position'] <= segment['end']]
+        remaining = sum(segment['end'] - segment['position'] + 1 for segment in pending)
+        worker_count = max(1, min(max_segments, max(len(pending), remaining // min_segment_size)))
+        active = {'workers': worker_count}
+        last_progress_report_time = datetime.now()
+
+        async def report_progress():
+            nonlocal last_progress_report_time
+            now = datetime.now()
+            if (now - last_progress_report_time).total_seconds() >= 1.0:
+                last_progress_report_time = now
+                self._save_download_state(state_path, state)
+                if progress_callback:
+                    done = sum(segment['position'] - segment['start'] for segment in segments)
+                    await progress_callback((done / total_size) * 100)
+
+        async def worker():
+            try:
+                with open(part_path, 'r+b', buffering=0) as f:
+                    while True:
+                        segment = pending.pop(0) if pending else self._split_segment(segments, min_segment_size)
+                        if segment is None:
+                            return
+                        failures = 0
+                        while segment['position'] <= segment['end']:
+                            position_before = segment['position']
+                            try:
+                                await self._fetch_segment(session, resolved_url, segment_headers, segment, f,
+                                                          report_progress)
+                            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                                # Only attempts in a row that got no new bytes count against the retries
+                                if segment['position'] > position_before:
+                                    failures = 0
+                                failures += 1
+                                if failures > retries:
+                                    if active['workers'] > 1:
+                                        # Leave the segment to the connections still running
+                                        logger.warning(f"Dropping a download connection for {url} after: {e}")
+                                        pending.append(segment)
+                                        return
+                                    raise
+                                delay = min(2 ** (failures - 1), 30)
+                                logger.warning(f"Download segment of {url} interrupted ({e}), resuming in {delay}s")
+                                await asyncio.sleep(delay)
+            finally:
+                active['workers'] -= 1
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(worker_count)]
+        discard = False
         try:
-            headers = self._get_request_headers()
+            await asyncio.gather(*tasks)
+        except RemoteFileChangedError:
+            # The server no longer serves ranges of the same file, so the next attempt starts over
+            discard = True
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if discard:
+                self._discard_partial(part_path)
+            else:
+                self._save_download_state(state_path, state)
+
+        if any(segment['position'] <= segment['end'] for segment in segments):
+            raise aiohttp.ClientPayloadError("Segmented download ended with missing ranges")
+
+        sha256 = None
+        if compute_hash:
+            sha256_hash = hashlib.sha256()
+            await asyncio.get_event_loop().run_in_executor(
+                None, self._hash_file_prefix, sha256_hash, part_path, total_size
+            )
+            sha256 = sha256_hash.hexdigest()
+        return True, state.get('filename') or filename, sha256
+
+    async def _fetch_segment(self, session: aiohttp.ClientSession, url: str, headers: dict, segment: Dict,
+                             f, report_progress) -> None:
+        """Stream one segment's missing bytes into the file, stopping at its (possibly shrinking) end"""
+        request_headers = {**headers, 'Range': f"bytes={segment['position']}-{segment['end']}"}
+        async with limited_get(session, url, civitai_download_limiter, headers=request_headers, allow_redirects=True) as response:
+            start, _ = self._parse_content_range(response.headers.get('Content-Range'))
+            if response.status == 200 or (response.status == 206 and start != segment['position']):
+                raise RemoteFileChangedError("The file changed on the server, please retry the download")
+            if response.status != 206:
+                raise aiohttp.ClientPayloadError(f"Range request failed with status {response.status}")
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                # Another connection may have taken over the tail of this segment meanwhile
+                chunk = chunk[:segment['end'] - segment['position'] + 1]
+                if chunk:
+                    f.seek(segment['position'])
+                    f.write(chunk)
+                    segment['position'] += len(chunk)
+                if segment['position'] > segment['end']:
+                    return
+                await report_progress()
+        if segment['position'] <= segment['end']:
+            raise aiohttp.ClientPayloadError(f"Segment ended at byte {segment['position']} of {segment['end']}")
+
+    @staticmethod
+    def _split_segment(segments: List[Dict], min_segment_size: int) -> Optional[Dict]:
+        """Split off the second half of the largest unfinished segment for an idle connection"""
+        largest = max(segments, key=lambda segment: segment['end'] - segment['position'], default=None)
+        if largest is None or largest['end'] - largest['position'] + 1 < 2 * min_segment_size:
+            return None
+        middle = largest['position'] + (largest['end'] - largest['position'] + 1) // 2
+        segment = {'start': middle, 'end': largest['end'], 'position': middle}
+        largest['end'] = middle - 1
+        segments.append(segment)
+        return segment
+
+    async def _download_to_part(self, url: str, part_path: str, state_path: str, progress_callback,
+                                compute_hash: bool) -> Tuple[bool, str, Optional[str]]:
+        """Fetch the missing bytes of a partial download (see _download_file)
+
+        Network errors and early ends of the stream are raised so the caller can resume.
+
+        Returns:
+            Tuple[bool, str, Optional[str]]: (success, filename or error message, SHA256 if computed)
+        """
+        session = await self._ensure_fresh_session()
+        headers = self._get_request_headers()
+        # Byte ranges refer to the raw file, so compression must stay off
+        headers['Accept-Encoding'] = 'identity'
+
+        state = self._load_download_state(state_path)
+        offset = 0
+        if state and state.get('url') == url and os.path.exists(part_path):
+            # Only trust bytes known to be flushed to disk
+            offset = min(os.path.getsize(part_path), int(state.get('downloaded', 0)))
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            # Resume only if the file on the server is still the same one
+            validator = state.get('etag') or state.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+
+        logger.debug(f"Starting download from: {url}" + (f" at byte {offset}" if offset else ""))
+        async with limited_get(session, url, civitai_download_limiter, headers=headers, allow_redirects=True) as response:
+            if response.status == 416 and offset and offset == state.get('total_size'):
+                # Everything was already downloaded before the last interruption
+                total_size = offset
+            elif response.status == 416:
+                self._discard_partial(part_path)
+                raise aiohttp.ClientPayloadError("Partial download no longer matches the server file, restarting")
+            elif response.status == 206 and offset:
+                start, total_size = self._parse_content_range(response.headers.get('Content-Range'))
+                if start != offset:
+                    self._discard_partial(part_path)
+                    raise aiohttp.ClientPayloadError(f"Server resumed at byte {start} instead of {offset}, restarting")
+                metrics.inc_counter('lm_download_resumes_total', 1, help_text='Model downloads resumed from a partial file')
+                logger.info(f"Resuming download of {url} at {offset} of {total_size or 'unknown'} bytes")
+            elif response.status == 200:
+                # New download, or the server ignored the range because the file changed
+                offset = 0
+                total_size = int(response.headers.get('content-length', 0)) or None
+            else:
+                # Handle 401 unauthorized responses
+                if response.status == 401:
+                    logger.warning(f"Unauthorized access to resource: {url} (Status 401)")
+                    return False, "Invalid or missing CivitAI API key, or early access restriction.", None
+
+                # Handle other client errors that might be permission-related
+                if response.status == 403:
+                    logger.warning(f"Forbidden access to resource: {url} (Status 403)")
+                    return False, "Access forbidden: You don't have permission to download this file.", None
+
+                # Generic error response for other status codes
+                logger.error(f"Download failed for {url} with status {response.status}")
+                return False, f"Download failed with status {response.status}", None
+
+            # Get filename from content-disposition header
+            filename = (self._parse_content_disposition(response.headers.get('Content-Disposition'))
+                        or (state or {}).get('filename')
+                        or os.path.basename(part_path)[:-len(PART_SUFFIX)])
+
+            if response.status == 200:
+                etag = response.headers.get('ETag')
+                state = {
+                    'url': url,
+                    'filename': filename,
+                    'total_size': total_size,
+                    # Weak ETags can't be used with If-Range
+                    'etag': etag if etag and not etag.startswith('W/') else None,
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'downloaded': 0
+                }
+                self._save_download_state(state_path, state)
+
+            sha256_hash = None
+            if compute_hash:
+                sha256_hash = hashlib.sha256()
+                if offset:
+                    # Hash the bytes kept from before so the whole file is verified
+                    await asyncio.get_event_loop().run_in_executor(
+                        None, self._hash_file_prefix, sha256_hash, part_path, offset
+                    )
+
+            current_size = offset
+            last_progress_report_time = datetime.now()
+
+            # Stream download to file with progress updates using larger buffer
+            with open(part_path, 'r+b' if offset else 'wb') as f:
+                f.seek(offset)
+                f.truncate()
+                try:
+                    if response.status != 416:
+                        async for chunk in response.content.iter_chunked(self.chunk_size):
+                            if chunk:
+                                f.write(chunk)
+                                current_size += len(chunk)
+                                if sha256_hash:
+                                    sha256_hash.update(chunk)
+
+                                # Limit progress update (and state persistence) frequency to reduce overhead
+                                now = datetime.now()
+                                time_diff = (now - last_progress_report_time).total_seconds()
+
+                                if time_diff >= 1.0:
+                                    f.flush()
+                                    state['downloaded'] = current_size
+                                    self._save_download_state(state_path, state)
+                                    if progress_callback and total_size:
+                                        await progress_callback((current_size / total_size) * 100)
+                                    last_progress_report_time = now
+                finally:
+                    # Record what was written, also when the connection dropped
+                    f.flush()
+                    state['downloaded'] = current_size
+                    self._save_download_state(state_path, state)
+
+            if total_size and current_size < total_size:
+                raise aiohttp.ClientPayloadError(f"Download ended at {current_size} of {total_size} bytes")
+            if total_size and current_size > total_size:
+                self._discard_partial(part_path)
+                return False, f"Downloaded {current_size} bytes, expected {total_size}", None
+
+            return True, filename, sha256_hash.hexdigest() if sha256_hash else None
+
+    @staticmethod
+    def _parse_content_range(header: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """Parse `bytes start-end/total` into (start, total); total is None if unknown"""
+        try:
+            unit, _, spec = (header or '').partition(' ')
+            byte_range, _, total = spec.partition('/')
+            if unit != 'bytes':
+                return None, None
+            return int(byte_range.split('-')[0]), int(total) if total not in ('', '*') else None
+        except ValueError:
+            return None, None
+
+    @staticmethod
+    def _hash_file_prefix(sha256_hash, path: str, length: int) -> None:
+        """Feed the first `length` bytes of a file into a hash object"""
+        with open(path, 'rb') as f:
+            while length > 0:
+                block = f.read(min(length, 1024 * 1024))
+                if not block:
+                    break
+                sha256_hash.update(block)
+                length -= len(block)
+
+    @staticmethod
+    def _load_download_state(state_path: str) -> Optional[Dict]:
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_download_state(state_path: str, state: Dict) -> None:
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+
+    @staticmethod
+    def _discard_partial(part_path: str) -> None:
+        """Remove a partial download and its state file"""
+        for path in (part_path, part_path + STATE_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def get_model_by_hash(self, model_hash: str) -> Optional[Dict]:
+        try:
+            # Lowercase like get_models_by_hashes, so both share the cached responses
+            model_hash = model_hash.lower()
+            status, data = await self._request_json(
+                'by_hash', f"{self.base_url}/model-versions/by-hash/{model_hash}", headers=self._get_request_headers()
+            )
+            if status == 200:
+                return data
+            return None
+        except Exception as e:
+            logger.error(f"API Error: {str(e)}")
+            return None
+
+    async def get_models_by_hashes(self, model_hashes: Iterable[str], refresh: bool = False) -> Dict[str, Optional[Dict]]:
+        """Look up many model hashes with batched requests
+        
+        Fresh cached single-hash responses are used as is; the other hashes are
+        sent BY_HASH_BATCH_SIZE at a time to the POST by-hash endpoint. Batch
+        results are stored in the response cache under the single-hash URL, so
+        later get_model_by_hash calls reuse them. If a batch request fails, its
+        hashes are looked up one by one.
+        
+        Args:
+            model_hashes: Model hashes (any hash type Civitai knows, e.g. SHA256 or AutoV2)
+            refresh: Ignore cached responses (e.g. when the cached data is known to be stale)
             
-            # Add Range header to allow resumable downloads
-            headers['Accept-Encoding'] = 'identity'  # Disable compression for better chunked downloads
+        Returns:
+            Dict[str, Optional[Dict]]: Lowercase hash -> model version data, or None if not on Civitai
+        """
+        hashes = list(dict.fromkeys(model_hash.lower() for model_hash in model_hashes if model_hash))
+        results = {}
+        pending = hashes
+        loop = asyncio.get_event_loop()
+        
+        if civitai_cache.enabled and hashes and not refresh:
+            keys = {model_hash: self._by_hash_cache_key(model_hash) for model_hash in hashes}
+            cached = await loop.run_in_executor(None, civitai_cache.lookup_many, list(keys.values()))
+            pending = []
+            for model_hash in hashes:
+                entry = cached.get(keys[model_hash])
+                if entry and entry['fresh']:
+                    results[model_hash] = entry['data'] if entry['status'] == 200 else None
+                else:
+                    pending.append(model_hash)
+        
+        for i in range(0, len(pending), BY_HASH_BATCH_SIZE):
+            batch = pending[i:i + BY_HASH_BATCH_SIZE]
+            found = await self._post_by_hash_batch(batch)
+            if found is None:
+                # Batch lookup unavailable: fall back to single lookups
+                singles = await asyncio.gather(*(self.get_model_by_hash(model_hash) for model_hash in batch))
+                results.update(zip(batch, singles))
+                continue
             
-            logger.debug(f"Starting download from: {url}")
-            async with session.get(url, headers=headers, allow_redirects=True) as response:
-                if response.status != 200:
-                    # Handle 401 unauthorized responses
-                    if response.status == 401:
-                        logger.warning(f"Unauthorized access to resource: {url} (Status 401)")
-                        
-                        return False, "Invalid or missing CivitAI API key, or early access restriction."
-                    
-                    # Handle other client errors that might be permission-related
-                    if response.status == 403:
-                        logger.warning(f"Forbidden access to resource: {url} (Status 403)")
-                        return False, "Access forbidden: You don't have permission to download this file."
-                    
-                    # Generic error response for other status codes
-                    logger.error(f"Download failed for {url} with status {response.status}")
-                    return False, f"Download failed with status {response.status}"
-
-                # Get filename from content-disposition header
-                content_disposition = response.headers.get('Content-Disposition')
-                filename = self._parse_content_disposition(content_disposition)
-                if not filename:
-                    filename = default_filename
-                
-                save_path = os.path.join(save_dir, filename)
-                
-                # Get total file size for progress calculation
-                total_size = int(response.headers.get('content-length', 0))
-                current_size = 0
-                last_progress_report_time = datetime.now()
-
-                # Stream download to file with progress updates using larger buffer
-                with open(save_path, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(self.chunk_size):
-                        if chunk:
-                            f.write(chunk)
-                            current_size += len(chunk)
-                            
-                            # Limit progress update frequency to reduce overhead
-                            now = datetime.now()
-                            time_diff = (now - last_progress_report_time).total_seconds()
-                            
-                            if progress_callback and total_size and time_diff >= 1.0:
-                                progress = (current_size / total_size) * 100
-                                await progress_callback(progress)
-                                last_progress_report_time = now
-                
-                # Ensure 100% progress is reported
-                if progress_callback:
-                    await progress_callback(100)
-                        
-                return True, save_path
-                
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error during download: {e}")
-            return False, f"Network error: {str(e)}"
-        except Exception as e:
-            logger.error(f"Download error: {e}")
-            return False, str(e)
+            for model_hash in batch:
+                results[model_hash] = found.get(model_hash)
+            if civitai_cache.enabled:
+                await loop.run_in_executor(None, self._store_by_hash_results, batch, found)
+        
+        return results
 
-    async def get_model_by_hash(self, model_hash: str) -> Optional[Dict]:
+    async def _post_by_hash_batch(self, hashes: List[str]) -> Optional[Dict[str, Dict]]:
+        """Send one batched by-hash request
+        
+        Returns:
+            Dict of requested hash -> model version for the hashes Civitai knows,
+            or None if the request failed
+        """
+        counts = self.request_counts.setdefault('by_hash_batch', {'requests': 0, 'coalesced': 0})
+        counts['requests'] += 1
+        metrics.inc_counter('lm_civitai_requests_total', 1, {'endpoint': 'by_hash_batch'},
+                            help_text='Civitai API lookups by endpoint')
         try:
             session = await self._ensure_fresh_session()
-            async with session.get(f"{self.base_url}/model-versions/by-hash/{model_hash}") as response:
-                if response.status == 200:
-                    return await response.json()
-                return None
+            async with limited_request(session, 'POST', f"{self.base_url}/model-versions/by-hash",
+                                       json=hashes, headers=self._get_request_headers()) as response:
+                if response.status != 200:
+                    logger.warning(f"Batched hash lookup failed (status {response.status}), using single lookups")
+                    return None
+                data = await response.json(content_type=None)
         except Exception as e:
-            logger.error(f"API Error: {str(e)}")
+            logger.warning(f"Batched hash lookup failed ({e}), using single lookups")
             return None
+        
+        if not isinstance(data, list):
+            return None
+        
+        # Match each returned version to the requested hashes of its files
+        requested = set(hashes)
+        found = {}
+        for version in data:
+            for file_info in version.get('files', []):
+                for hash_value in (file_info.get('hashes') or {}).values():
+                    if isinstance(hash_value, str) and hash_value.lower() in requested:
+                        found.setdefault(hash_value.lower(), version)
+        return found
+
+    def _by_hash_cache_key(self, model_hash: str) -> str:
+        """Get the cache key of a single-hash lookup (as sent by get_model_by_hash)"""
+        return self._cache_key(f"{self.base_url}/model-versions/by-hash/{model_hash}", self._get_request_headers())
+
+    def _store_by_hash_results(self, hashes: List[str], found: Dict[str, Dict]) -> None:
+        """Cache batch results as if each hash had been requested on its own"""
+        for model_hash in hashes:
+            data = found.get(model_hash)
+            civitai_cache.store(
+                self._by_hash_cache_key(model_hash), 'by_hash',
+                200 if data is not None else 404, data
+            )
 
     async def download_preview_image(self, image_url: str, save_path: str):
         try:
             session = await self._ensure_fresh_session()
-            async with session.get(image_url) as response:
+            async with limited_get(session, image_url, civitai_media_limiter) as response:
                 if response.status == 200:
                     content = await response.read()
                     with open(save_path, 'wb') as f:
@@ -209,16 +848,14 @@ class CivitaiClient:
     async def get_model_versions(self, model_id: str) -> List[Dict]:
         """Get all versions of a model with local availability info"""
         try:
-            session = await self._ensure_fresh_session()  # Use fresh session
-            async with session.get(f"{self.base_url}/models/{model_id}") as response:
-                if response.status != 200:
-                    return None
-                data = await response.json()
-                # Also return model type along with versions
-                return {
-                    'modelVersions': data.get('modelVersions', []),
-                    'type': data.get('type', '')
-                }
+            status, data = await self._request_json('model', f"{self.base_url}/models/{model_id}")
+            if status != 200:
+                return None
+            # Also return model type along with versions
+            return {
+                'modelVersions': data.get('modelVersions', []),
+                'type': data.get('type', '')
+            }
         except Exception as e:
             logger.error(f"Error fetching model versions: {e}")
             return None
@@ -234,38 +871,35 @@ class CivitaiClient:
             Optional[Dict]: The model version data with additional fields or None if not found
         """
         try:
-            session = await self._ensure_fresh_session()
-            
             # Step 1: Get model data to find version_id if not provided and get additional metadata
-            async with session.get(f"{self.base_url}/models/{model_id}") as response:
-                if response.status != 200:
-                    return None
-                    
-                data = await response.json()
-                model_versions = data.get('modelVersions', [])
+            status, data = await self._request_json('model', f"{self.base_url}/models/{model_id}")
+            if status != 200:
+                return None
                 
-                # Step 2: Determine the version_id to use
-                target_version_id = version_id
-                if target_version_id is None:
-                    target_version_id = model_versions[0].get('id')
+            model_versions = data.get('modelVersions', [])
+            
+            # Step 2: Determine the version_id to use
+            target_version_id = version_id
+            if target_version_id is None:
+                target_version_id = model_versions[0].get('id')
             
             # Step 3: Get detailed version info using the version_id
             headers = self._get_request_headers()
-            async with session.get(f"{self.base_url}/model-versions/{target_version_id}", headers=headers) as response:
-                if response.status != 200:
-                    return None
-                
-                version = await response.json()
-                
-                # Step 4: Enrich version_info with model data
-                # Add description and tags from model data
-                version['model']['description'] = data.get("description")
-                version['model']['tags'] = data.get("tags", [])
-                
-                # Add creator from model data
-                version['creator'] = data.get("creator")
-                
-                return version
+            status, version = await self._request_json(
+                'model_version', f"{self.base_url}/model-versions/{target_version_id}", headers
+            )
+            if status != 200:
+                return None
+            
+            # Step 4: Enrich version_info with model data
+            # Add description and tags from model data
+            version['model']['description'] = data.get("description")
+            version['model']['tags'] = data.get("tags", [])
+            
+            # Add creator from model data
+            version['creator'] = data.get("creator")
+            
+            return version
                 
         except Exception as e:
             logger.error(f"Error fetching model version: {e}")
@@ -283,30 +917,25 @@ class CivitaiClient:
                 - An error message if there was an error, or None on success
         """
         try:
-            session = await self._ensure_fresh_session()
             url = f"{self.base_url}/model-versions/{version_id}"
             headers = self._get_request_headers()
             
-            logger.debug(f"Resolving DNS for model version info: {url}")
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    logger.debug(f"Successfully fetched model version info for: {version_id}")
-                    return await response.json(), None
-                
-                # Handle specific error cases
-                if response.status == 404:
-                    # Try to parse the error message
-                    try:
-                        error_data = await response.json()
-                        error_msg = error_data.get('error', f"Model not found (status 404)")
-                        logger.warning(f"Model version not found: {version_id} - {error_msg}")
-                        return None, error_msg
-                    except:
-                        return None, "Model not found (status 404)"
-                
-                # Other error cases
-                logger.error(f"Failed to fetch model info for {version_id} (status {response.status})")
-                return None, f"Failed to fetch model info (status {response.status})"
+            status, data = await self._request_json('model_version', url, headers)
+            if status == 200:
+                logger.debug(f"Successfully fetched model version info for: {version_id}")
+                return data, None
+            
+            # Handle specific error cases
+            if status == 404:
+                error_msg = "Model not found (status 404)"
+                if isinstance(data, dict):
+                    error_msg = data.get('error', error_msg)
+                logger.warning(f"Model version not found: {version_id} - {error_msg}")
+                return None, error_msg
+            
+            # Other error cases
+            logger.error(f"Failed to fetch model info for {version_id} (status {status})")
+            return None, f"Failed to fetch model info (status {status})"
         except Exception as e:
             error_msg = f"Error fetching model version info: {e}"
             logger.error(error_msg)
@@ -324,34 +953,30 @@ class CivitaiClient:
                 - The HTTP status code from the request
         """
         try:
-            session = await self._ensure_fresh_session()
             headers = self._get_request_headers()
             url = f"{self.base_url}/models/{model_id}"
             
-            async with session.get(url, headers=headers) as response:
-                status_code = response.status
-                
-                if status_code != 200:
-                    logger.warning(f"Failed to fetch model metadata: Status {status_code}")
-                    return None, status_code
-                
-                data = await response.json()
-                
-                # Extract relevant metadata
-                metadata = {
-                    "description": data.get("description") or "No model description available",
-                    "tags": data.get("tags", []),
-                    "creator": {
-                        "username": data.get("creator", {}).get("username"),
-                        "image": data.get("creator", {}).get("image")
-                    }
+            status_code, data = await self._request_json('model', url, headers)
+            
+            if status_code != 200:
+                logger.warning(f"Failed to fetch model metadata: Status {status_code}")
+                return None, status_code
+            
+            # Extract relevant metadata
+            metadata = {
+                "description": data.get("description") or "No model description available",
+                "tags": data.get("tags", []),
+                "creator": {
+                    "username": data.get("creator", {}).get("username"),
+                    "image": data.get("creator", {}).get("image")
                 }
-                
-                if metadata["description"] or metadata["tags"] or metadata["creator"]["username"]:
-                    return metadata, status_code
-                else:
-                    logger.warning(f"No metadata found for model {model_id}")
-                    return None, status_code
+            }
+            
+            if metadata["description"] or metadata["tags"] or metadata["creator"]["username"]:
+                return metadata, status_code
+            else:
+                logger.warning(f"No metadata found for model {model_id}")
+                return None, status_code
                 
         except Exception as e:
             logger.error(f"Error fetching model metadata: {e}", exc_info=True)
@@ -364,10 +989,13 @@ class CivitaiClient:
         return metadata.get("description") if metadata else None
 
     async def close(self):
-        """Close the session if it exists"""
+        """Close the shared session (only on shutdown; callers must not close it after use)"""
         if self._session is not None:
-            await self._session.close()
-            self._session = None
+            if self._session_loop is asyncio.get_running_loop():
+                await self._session.close()
+                self._session = None
+            else:
+                self._release_foreign_session()
 
     async def _get_hash_from_civitai(self, model_version_id: str) -> Optional[str]:
         """Get hash from Civitai API"""
@@ -408,7 +1036,7 @@ class CivitaiClient:
             url = f"{self.base_url}/images?imageId={image_id}&nsfw=X"
             
             logger.debug(f"Fetching image info for ID: {image_id}")
-            async with session.get(url, headers=headers) as response:
+            async with limited_get(session, url, headers=headers) as response:
                 if response.status == 200:
                     data = await response.json()
                     if data and "items" in data and len(data["items"]) > 0:
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .civitai_client import BY_HASH_BATCH_SIZE
+from .rate_limiter import background_priority
+from .service_registry import ServiceRegistry
+from .settings_manager import settings
+from .websocket_manager import ws_manager
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two progress broadcasts of a job
+BROADCAST_INTERVAL = 0.5
+# Finished jobs kept around for polling
+MAX_FINISHED_JOBS = 20
+
+
+class CivitaiFetchJob:
+    """Background "fetch all from Civitai" run for one model type
+
+    Models are handled in chunks: the hashes of a chunk are looked up with
+    one batched request, then processed by a bounded pool of workers. Cache
+    updates are collected and merged in one batch (with a single resort) when
+    the job ends, and progress broadcasts are throttled to BROADCAST_INTERVAL.
+    """
+
+    def __init__(self, model_type: str, scanner, models: List[Dict]):
+        self.id = uuid.uuid4().hex
+        self.model_type = model_type
+        self.scanner = scanner
+        self.models = models
+        self.status = 'running'  # running, completed, cancelled, error
+        self.processed = 0
+        self.success = 0
+        self.current_name = ''
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._task: Optional[asyncio.Task] = None
+        # (file_path, metadata) of updated models, merged into the cache at the end
+        self._updates: List[Tuple[str, Dict]] = []
+        self._last_broadcast = 0.0
+        self._broadcast_handle: Optional[asyncio.TimerHandle] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'model_type': self.model_type,
+            'status': self.status,
+            'total': len(self.models),
+            'processed': self.processed,
+            'success': self.success,
+            'current_name': self.current_name,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == 'running'
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def cancel(self) -> bool:
+        """Stop the job; models already updated are still merged into the cache"""
+        if not self.is_running or self._task is None:
+            return False
+        self._task.cancel()
+        return True
+
+    async def _collect_update(self, original_path: str, new_path: str, metadata: Dict) -> bool:
+        """update_cache_func for fetch_and_update_model: defer the cache update to the final merge"""
+        self._updates.append((new_path, metadata))
+        return True
+
+    async def _worker(self, queue: asyncio.Queue, prefetched: Dict[str, Optional[Dict]]) -> None:
+        from ..utils.routes_common import ModelRouteUtils
+
+        while True:
+            try:
+                model = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                if await ModelRouteUtils.fetch_and_update_model(
+                    sha256=model['sha256'],
+                    file_path=model['file_path'],
+                    model_data=model,
+                    update_cache_func=self._collect_update,
+                    prefetched=prefetched
+                ):
+                    self.success += 1
+            except Exception as e:
+                logger.error(f"Error fetching CivitAI data for {model['file_path']}: {e}")
+            self.processed += 1
+            self.current_name = model.get('model_name', 'Unknown')
+            self._schedule_broadcast()
+
+    async def _run(self) -> None:
+        await self._broadcast({'status': 'started', 'total': len(self.models), 'processed': 0, 'success': 0})
+        try:
+            # Bulk job: let interactive Civitai requests go first
+            with background_priority():
+                client = await ServiceRegistry.get_civitai_client()
+                worker_count = max(1, int(settings.get('civitai_fetch_workers', 4)))
+                for i in range(0, len(self.models), BY_HASH_BATCH_SIZE):
+                    chunk = self.models[i:i + BY_HASH_BATCH_SIZE]
+                    # One batched hash lookup per chunk instead of a request per model
+                    prefetched = await client.get_models_by_hashes(model['sha256'] for model in chunk)
+                    queue = asyncio.Queue()
+                    for model in chunk:
+                        queue.put_nowait(model)
+                    await asyncio.gather(*(
+                        self._worker(queue, prefetched) for _ in range(min(worker_count, len(chunk)))
+                    ))
+            self.status = 'completed'
+        except asyncio.CancelledError:
+            self.status = 'cancelled'
+        except Exception as e:
+            logger.error(f"Error in fetch all from Civitai job for {self.model_type}s: {e}", exc_info=True)
+            self.status = 'error'
+            self.error = str(e)
+        finally:
+            if self._broadcast_handle is not None:
+                self._broadcast_handle.cancel()
+                self._broadcast_handle = None
+            await self._merge_updates()
+            self.finished_at = time.time()
+
+        if self.status == 'error':
+            await self._broadcast({'status': 'error', 'error': self.error})
+        else:
+            await self._broadcast({
+                'status': self.status,
+                'total': len(self.models),
+                'processed': self.processed,
+                'success': self.success
+            })
+        logger.info(f"Fetch all from Civitai for {self.model_type}s {self.status}: "
+                    f"updated {self.success} of {self.processed} processed (total: {len(self.models)})")
+
+    async def _merge_updates(self) -> None:
+        """Apply all collected cache updates at once"""
+        if not self._updates:
+            return
+        try:
+            await self.scanner.update_models_cache_batch(self._updates)
+        except Exception as e:
+            logger.error(f"Error merging Civitai updates into the {self.model_type} cache: {e}", exc_info=True)
+        self._updates = []
+
+    def _schedule_broadcast(self) -> None:
+        """Broadcast progress now, or once the throttle interval has passed"""
+        if self._broadcast_handle is not None:
+            return
+        delay = self._last_broadcast + BROADCAST_INTERVAL - time.monotonic()
+        loop = asyncio.get_running_loop()
+        if delay <= 0:
+            self._send_progress()
+        else:
+            self._broadcast_handle = loop.call_later(delay, self._send_progress)
+
+    def _send_progress(self) -> None:
+        self._broadcast_handle = None
+        if not self.is_running:
+            return
+        self._last_broadcast = time.monotonic()
+        asyncio.ensure_future(self._broadcast({
+            'status': 'processing',
+            'total': len(self.models),
+            'processed': self.processed,
+            'success': self.success,
+            'current_name': self.current_name
+        }))
+
+    async def _broadcast(self, message: Dict) -> None:
+        try:
+            await ws_manager.broadcast({**message, 'job_id': self.id, 'model_type': self.model_type})
+        except Exception as e:
+            logger.debug(f"Error broadcasting fetch progress: {e}")
+
+
+class CivitaiFetchJobManager:
+    """Tracks "fetch all from Civitai" jobs, at most one running job per model type"""
+
+    def __init__(self):
+        self._jobs: Dict[str, CivitaiFetchJob] = OrderedDict()
+
+    def start(self, model_type: str, scanner, models: List[Dict]) -> Tuple[CivitaiFetchJob, bool]:
+        """Start a job for a model type unless one is already running
+
+        Returns:
+            Tuple[CivitaiFetchJob, bool]: The job and whether it was newly started
+        """
+        running = self.get_running(model_type)
+        if running is not None:
+            return running, False
+
+        self._prune()
+        job = CivitaiFetchJob(model_type, scanner, models)
+        self._jobs[job.id] = job
+        job.start()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[CivitaiFetchJob]:
+        return self._jobs.get(job_id)
+
+    def get_running(self, model_type: str) -> Optional[CivitaiFetchJob]:
+        return next((job for job in self._jobs.values() if job.model_type == model_type and job.is_running), None)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.is_running]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+# Global instance
+civitai_fetch_jobs = CivitaiFetchJobManager()
@@ -9,6 +9,7 @@ from ..utils.constants import CARD_PREVIEW_WIDTH, VALID_LORA_TYPES, CIVITAI_MODE
 from ..utils.exif_utils import ExifUtils
 from ..utils.metadata_manager import MetadataManager
 from .service_registry import ServiceRegistry
+from .civitai_client import PART_SUFFIX, STATE_SUFFIX
 from .settings_manager import settings
 
 # Download to temporary file first
@@ -442,11 +443,12 @@ class DownloadManager:
                 download_url, 
                 save_dir,
                 os.path.basename(save_path),
-                progress_callback=lambda p: self._handle_download_progress(p, progress_callback)
+                progress_callback=lambda p: self._handle_download_progress(p, progress_callback),
+                expected_sha256=metadata.sha256
             )
 
             if not success:
-                # Clean up files on failure
+                # Clean up files on failure (a .part file is kept so a retry can resume it)
                 for path in [save_path, metadata_path, metadata.preview_url]:
                     if path and os.path.exists(path):
                         os.remove(path)
@@ -542,6 +544,15 @@ class DownloadManager:
                     except Exception as e:
                         logger.error(f"Error deleting partial file: {e}")
                 
+                # Delete the unfinished download and its resume state
+                for partial_path in (file_path + PART_SUFFIX, file_path + PART_SUFFIX + STATE_SUFFIX):
+                    if os.path.exists(partial_path):
+                        try:
+                            os.unlink(partial_path)
+                            logger.debug(f"Deleted partial download: {partial_path}")
+                        except Exception as e:
+                            logger.error(f"Error deleting partial file: {e}")
+                
                 # Delete metadata file if exists
                 metadata_path = os.path.splitext(file_path)[0] + '.metadata.json'
                 if os.path.exists(metadata_path):
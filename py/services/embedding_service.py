@@ -20,27 +20,27 @@ class EmbeddingService(BaseModelService):
         """
         super().__init__("embedding", scanner, EmbeddingMetadata)
     
-    async def format_response(self, embedding_data: Dict) -> Dict:
+    async def format_response(self, embedding_data: Dict, fields: Optional[set] = None) -> Dict:
         """Format Embedding data for API response"""
-        return {
-            "model_name": embedding_data["model_name"],
-            "file_name": embedding_data["file_name"],
-            "preview_url": config.get_preview_static_url(embedding_data.get("preview_url", "")),
-            "preview_nsfw_level": embedding_data.get("preview_nsfw_level", 0),
-            "base_model": embedding_data.get("base_model", ""),
-            "folder": embedding_data["folder"],
-            "sha256": embedding_data.get("sha256", ""),
-            "file_path": embedding_data["file_path"].replace(os.sep, "/"),
-            "file_size": embedding_data.get("size", 0),
-            "modified": embedding_data.get("modified", ""),
-            "tags": embedding_data.get("tags", []),
-            "modelDescription": embedding_data.get("modelDescription", ""),
-            "from_civitai": embedding_data.get("from_civitai", True),
-            "notes": embedding_data.get("notes", ""),
-            "model_type": embedding_data.get("model_type", "embedding"),
-            "favorite": embedding_data.get("favorite", False),
-            "civitai": ModelRouteUtils.filter_civitai_data(embedding_data.get("civitai", {}))
-        }
+        return self._project_fields({
+            "model_name": lambda: embedding_data["model_name"],
+            "file_name": lambda: embedding_data["file_name"],
+            "preview_url": lambda: config.get_preview_static_url(embedding_data.get("preview_url", "")),
+            "preview_nsfw_level": lambda: embedding_data.get("preview_nsfw_level", 0),
+            "base_model": lambda: embedding_data.get("base_model", ""),
+            "folder": lambda: embedding_data["folder"],
+            "sha256": lambda: embedding_data.get("sha256", ""),
+            "file_path": lambda: embedding_data["file_path"].replace(os.sep, "/"),
+            "file_size": lambda: embedding_data.get("size", 0),
+            "modified": lambda: embedding_data.get("modified", ""),
+            "tags": lambda: embedding_data.get("tags", []),
+            "modelDescription": lambda: embedding_data.get("modelDescription", ""),
+            "from_civitai": lambda: embedding_data.get("from_civitai", True),
+            "notes": lambda: embedding_data.get("notes", ""),
+            "model_type": lambda: embedding_data.get("model_type", "embedding"),
+            "favorite": lambda: embedding_data.get("favorite", False),
+            "civitai": lambda: ModelRouteUtils.filter_civitai_data(embedding_data.get("civitai", {}))
+        }, fields)
     
     def find_duplicate_hashes(self) -> Dict:
         """Find Embeddings with duplicate SHA256 hashes"""
@@ -0,0 +1,129 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.model_utils import is_cjk_character
+
+
+def get_letter_bucket(name: str) -> Optional[str]:
+    """Get the letter bucket for a name
+
+    Buckets:
+    - '#': Numbers (0-9)
+    - 'A'-'Z': Latin letters
+    - '漢': CJK characters
+    - '@': Special characters (not alphanumeric)
+    """
+    if not name:
+        return None
+
+    first_char = name[0].upper()
+
+    if first_char.isdigit():
+        return '#'
+    if 'A' <= first_char <= 'Z':
+        return first_char
+    if is_cjk_character(first_char):
+        return '漢'
+    if not first_char.isalnum():
+        return '@'
+    return None
+
+
+def _single(value) -> Tuple:
+    return (value,) if value else ()
+
+
+# Facet extractors for model caches: facet name -> item -> iterable of values
+MODEL_FACETS: Dict[str, Callable[[Dict], Iterable[str]]] = {
+    'tags': lambda item: item.get('tags') or (),
+    'base_model': lambda item: _single(item.get('base_model')),
+    'first_letter': lambda item: _single(get_letter_bucket(item.get('model_name', ''))),
+    'folder': lambda item: (item.get('folder', ''),),
+    'creator': lambda item: _single(((item.get('civitai') or {}).get('creator') or {}).get('username')),
+}
+
+# Facet extractors for the recipe cache
+RECIPE_FACETS: Dict[str, Callable[[Dict], Iterable[str]]] = {
+    'tags': lambda item: item.get('tags') or (),
+    'base_model': lambda item: _single(item.get('base_model')),
+}
+
+
+class FacetIndex:
+    """Incrementally maintained value counts for a set of cache facets
+
+    Each item's contribution is remembered by key, so removals and updates
+    stay correct even when the cached dict was mutated in place beforehand.
+    """
+
+    def __init__(self, extractors: Dict[str, Callable[[Dict], Iterable[str]]], key_func: Callable[[Dict], str]):
+        """Initialize the facet index
+
+        Args:
+            extractors: Mapping of facet name to a function returning the item's values
+            key_func: Function returning a unique key for an item
+        """
+        self._extractors = extractors
+        self._key_func = key_func
+        self._counts: Dict[str, Counter] = {name: Counter() for name in extractors}
+        self._contributions: Dict[str, Dict[str, Tuple]] = {}
+
+    def rebuild(self, items: Iterable[Dict]) -> None:
+        """Recount all facets from scratch"""
+        self.clear()
+        for item in items:
+            self.add(item)
+
+    def clear(self) -> None:
+        """Remove all counts"""
+        self._counts = {name: Counter() for name in self._extractors}
+        self._contributions = {}
+
+    def add(self, item: Dict) -> None:
+        """Count an item, replacing any previous contribution under the same key"""
+        key = self._key_func(item)
+        if key in self._contributions:
+            self.remove_key(key)
+
+        contribution = {}
+        for name, extract in self._extractors.items():
+            values = tuple(value for value in extract(item) if value is not None)
+            if values:
+                self._counts[name].update(values)
+                contribution[name] = values
+        self._contributions[key] = contribution
+
+    def remove(self, item: Dict) -> None:
+        """Uncount an item"""
+        self.remove_key(self._key_func(item))
+
+    def remove_key(self, key: str) -> None:
+        """Uncount the item stored under key"""
+        contribution = self._contributions.pop(key, None)
+        if not contribution:
+            return
+        for name, values in contribution.items():
+            counter = self._counts[name]
+            for value in values:
+                counter[value] -= 1
+                if counter[value] <= 0:
+                    del counter[value]
+
+    def update(self, item: Dict, old_key: str = None) -> None:
+        """Recount an item after it changed
+
+        Args:
+            item: The item's current data
+            old_key: Previous key if the item's key changed (e.g. after a move)
+        """
+        if old_key is not None:
+            self.remove_key(old_key)
+        self.add(item)
+
+    def get_counts(self, facet: str) -> Dict[str, int]:
+        """Get a copy of the value counts for a facet"""
+        return dict(self._counts[facet])
+
+    def get_top(self, facet: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Get (value, count) pairs for a facet sorted by count descending"""
+        return self._counts[facet].most_common(limit)
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+from .settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a single observation"""
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Render histogram sample lines for the given metric name and label string"""
+        lines = []
+        cumulative = 0
+        sep = ',' if labels else ''
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Process-wide request metrics and service gauges
+
+    Request metrics are only recorded when the `enable_metrics` setting is on.
+    Gauges and counters are cheap to update and always kept so the endpoint
+    stays useful.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tracked_routes = set()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._sizes: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        # name -> (help text, {label string: value})
+        self._gauges: Dict[str, Tuple[str, Dict[str, float]]] = {}
+        self._counters: Dict[str, Tuple[str, Dict[str, float]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether per-request metrics are being recorded"""
+        return bool(settings.get('enable_metrics', False))
+
+    def track_routes(self, canonical_paths: Iterable[str]) -> None:
+        """Register route paths whose requests should be recorded"""
+        self._tracked_routes.update(canonical_paths)
+
+    def is_tracked(self, route: str) -> bool:
+        return route in self._tracked_routes
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, size: int) -> None:
+        """Record a completed request"""
+        key = (method, route)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._sizes[key] = Histogram(SIZE_BUCKETS)
+            histogram.observe(duration)
+            self._sizes[key].observe(size)
+
+            count_key = (method, route, status)
+            self._requests[count_key] = self._requests.get(count_key, 0) + 1
+            if status >= 500:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None, help_text: str = '') -> None:
+        """Set a gauge value"""
+        label_str = _format_labels(labels or {})
+        with self._lock:
+            help_existing, values = self._gauges.get(name, (help_text, {}))
+            values[label_str] = value
+            self._gauges[name] = (help_text or help_existing, values)
+
+    def inc_gauge(self, name: str, amount: float = 1, labels: Optional[Dict[str, str]] = None, help_text: str = '') -> None:
+        """Increment (or decrement with a negative amount) a gauge value"""
+        label_str = _format_labels(labels or {})
+        with self._lock:
+            help_existing, values = self._gauges.get(name, (help_text, {}))
+            values[label_str] = values.get(label_str, 0) + amount
+            self._gauges[name] = (help_text or help_existing, values)
+
+    def inc_counter(self, name: str, amount: float = 1, labels: Optional[Dict[str, str]] = None, help_text: str = '') -> None:
+        """Increase a monotonic counter (by Prometheus convention its name ends in `_total`)"""
+        if amount < 0:
+            raise ValueError(f"Counter {name} can only increase")
+        label_str = _format_labels(labels or {})
+        with self._lock:
+            help_existing, values = self._counters.get(name, (help_text, {}))
+            values[label_str] = values.get(label_str, 0) + amount
+            self._counters[name] = (help_text or help_existing, values)
+
+    def reset(self) -> None:
+        """Clear all recorded request metrics"""
+        with self._lock:
+            self._latency.clear()
+            self._sizes.clear()
+            self._requests.clear()
+            self._errors.clear()
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP lm_http_request_duration_seconds Request latency by route')
+            lines.append('# TYPE lm_http_request_duration_seconds histogram')
+            for (method, route), histogram in sorted(self._latency.items()):
+                labels = _format_labels({'method': method, 'route': route})
+                lines.extend(histogram.render('lm_http_request_duration_seconds', labels))
+
+            lines.append('# HELP lm_http_response_size_bytes Response body size by route')
+            lines.append('# TYPE lm_http_response_size_bytes histogram')
+            for (method, route), histogram in sorted(self._sizes.items()):
+                labels = _format_labels({'method': method, 'route': route})
+                lines.extend(histogram.render('lm_http_response_size_bytes', labels))
+
+            lines.append('# HELP lm_http_requests_total Requests by route and status')
+            lines.append('# TYPE lm_http_requests_total counter')
+            for (method, route, status), count in sorted(self._requests.items()):
+                labels = _format_labels({'method': method, 'route': route, 'status': str(status)})
+                lines.append(f'lm_http_requests_total{{{labels}}} {count}')
+
+            lines.append('# HELP lm_http_request_errors_total Requests that failed with a 5xx status')
+            lines.append('# TYPE lm_http_request_errors_total counter')
+            for (method, route), count in sorted(self._errors.items()):
+                labels = _format_labels({'method': method, 'route': route})
+                lines.append(f'lm_http_request_errors_total{{{labels}}} {count}')
+
+            for metric_type, store in (('counter', self._counters), ('gauge', self._gauges)):
+                for name, (help_text, values) in sorted(store.items()):
+                    if help_text:
+                        lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {metric_type}')
+                    for label_str, value in sorted(values.items()):
+                        if label_str:
+                            lines.append(f'{name}{{{label_str}}} {value}')
+                        else:
+                            lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Global instance
+metrics = MetricsRegistry()
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    """Record latency, status and response size for LoRA Manager routes"""
+    if not metrics.enabled:
+        return await handler(request)
+
+    route = request.match_info.route.resource
+    route_path = route.canonical if route is not None else None
+    if route_path is None or not metrics.is_tracked(route_path):
+        return await handler(request)
+
+    start_time = time.perf_counter()
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        metrics.observe_request(request.method, route_path, e.status, time.perf_counter() - start_time, 0)
+        raise
+    except Exception:
+        metrics.observe_request(request.method, route_path, 500, time.perf_counter() - start_time, 0)
+        raise
+
+    size = getattr(response, 'body_length', 0) or response.content_length or 0
+    metrics.observe_request(request.method, route_path, response.status, time.perf_counter() - start_time, size)
+    return response
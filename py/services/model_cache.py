@@ -1,8 +1,9 @@
 import asyncio
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from operator import itemgetter
 from natsort import natsorted
+from .facet_index import FacetIndex, MODEL_FACETS
 
 # Supported sort modes: (sort_key, order)
 # order: 'asc' for ascending, 'desc' for descending
@@ -26,9 +27,35 @@ class ModelCache:
         # Cache for last sort: (sort_key, order) -> sorted list
         self._last_sort: Tuple[str, str] = (None, None)
         self._last_sorted_data: List[Dict] = []
+        # Incrementally maintained facet counts (tags, base_model, first_letter, folder, creator)
+        self.facets = FacetIndex(MODEL_FACETS, key_func=itemgetter('file_path'))
+        self.rebuild_indexes()
         # Default sort on init
         asyncio.create_task(self.resort())
 
+    def rebuild_indexes(self) -> None:
+        """Rebuild the path index and facet counts from raw_data"""
+        self._by_path: Dict[str, Dict] = {item['file_path']: item for item in self.raw_data}
+        self.facets.rebuild(self.raw_data)
+
+    def index_item(self, item: Dict) -> None:
+        """Add an item that was appended to raw_data to the indexes"""
+        self._by_path[item['file_path']] = item
+        self.facets.add(item)
+
+    def unindex_path(self, file_path: str) -> None:
+        """Drop the item stored under file_path from the indexes"""
+        self._by_path.pop(file_path, None)
+        self.facets.remove_key(file_path)
+
+    def refresh_folders(self) -> None:
+        """Rebuild the folder list from the folder facet"""
+        self.folders = sorted(self.facets.get_counts('folder'), key=lambda x: x.lower())
+
+    def get_item_by_path(self, file_path: str) -> Optional[Dict]:
+        """Get a cached model by its file path"""
+        return self._by_path.get(file_path)
+
     async def resort(self):
         """Resort cached data according to last sort mode if set"""
         async with self._lock:
@@ -36,11 +63,10 @@ class ModelCache:
                 sort_key, order = self._last_sort
                 sorted_data = self._sort_data(self.raw_data, sort_key, order)
                 self._last_sorted_data = sorted_data
-                # Update folder list
             # else: do nothing
 
-            all_folders = set(l['folder'] for l in self.raw_data)
-            self.folders = sorted(list(all_folders), key=lambda x: x.lower())
+            # Update folder list
+            self.refresh_folders()
 
     def _sort_data(self, data: List[Dict], sort_key: str, order: str) -> List[Dict]:
         """Sort data by sort_key and order"""
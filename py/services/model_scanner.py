@@ -4,7 +4,7 @@ import logging
 import asyncio
 import time
 import shutil
-from typing import List, Dict, Optional, Type, Set
+from typing import List, Dict, Optional, Type, Set, Tuple
 
 from ..utils.models import BaseModelMetadata
 from ..config import config
@@ -12,9 +12,10 @@ from ..utils.file_utils import find_preview_file
 from ..utils.metadata_manager import MetadataManager
 from .model_cache import ModelCache
 from .model_hash_index import ModelHashIndex
-from ..utils.constants import PREVIEW_EXTENSIONS
 from .service_registry import ServiceRegistry
 from .websocket_manager import ws_manager
+from .metrics import metrics
+from .rate_limiter import background_priority
 
 logger = logging.getLogger(__name__)
 
@@ -64,9 +65,9 @@ class ModelScanner:
         self.file_extensions = file_extensions
         self._cache = None
         self._hash_index = hash_index or ModelHashIndex()
-        self._tags_count = {}  # Dictionary to store tag counts
         self._is_initializing = False  # Flag to track initialization state
         self._excluded_models = []  # List to track excluded models
+        self._deferred_metadata_paths = []  # Models scanned in a thread that still need Civitai metadata
         self._initialized = True
         
         # Register this service
@@ -129,6 +130,7 @@ class ModelScanner:
             start_time = time.time()
             
             # Use thread pool to execute CPU-intensive operations with progress reporting
+            self._deferred_metadata_paths = []
             await loop.run_in_executor(
                 None,  # Use default thread pool
                 self._initialize_cache_sync,  # Run synchronous version in thread
@@ -136,6 +138,10 @@ class ModelScanner:
                 page_type  # Pass the page type for progress reporting
             )
             
+            # The scan thread's loop must not use the shared Civitai session, so missing
+            # descriptions and tags are fetched here once the cache is in place
+            await self._fetch_deferred_metadata()
+            
             # Send final progress update
             await ws_manager.broadcast_init_progress({
                 'stage': 'finalizing',
@@ -145,7 +151,10 @@ class ModelScanner:
                 'pageType': page_type
             })
             
-            logger.info(f"{self.model_type.capitalize()} cache initialized in {time.time() - start_time:.2f} seconds. Found {len(self._cache.raw_data)} models")
+            init_duration = time.time() - start_time
+            metrics.set_gauge('lm_cache_init_duration_seconds', init_duration, {'cache': self.model_type},
+                              'Duration of the last background cache initialization')
+            logger.info(f"{self.model_type.capitalize()} cache initialized in {init_duration:.2f} seconds. Found {len(self._cache.raw_data)} models")
             
             # Send completion message
             await asyncio.sleep(0.5)  # Small delay to ensure final progress message is sent
@@ -251,9 +260,12 @@ class ModelScanner:
                                                 ext = os.path.splitext(entry.name)[1].lower()
                                                 if ext in self.file_extensions:
                                                     file_path = entry.path.replace(os.sep, "/")
-                                                    result = await self._process_model_file(file_path, root_path)
+                                                    # Civitai lookups wait for the main loop (see _fetch_deferred_metadata)
+                                                    result = await self._process_model_file(file_path, root_path, fetch_metadata=False)
                                                     if result:
                                                         all_models.append(result)
+                                                        if self._needs_metadata_fetch(result):
+                                                            self._deferred_metadata_paths.append(result['file_path'])
                                                     
                                                     # Update progress counter
                                                     processed_files += 1
@@ -292,18 +304,14 @@ class ModelScanner:
                 # Run the progress-tracking scan function
                 raw_data = loop.run_until_complete(scan_with_progress())
                 
-                # Update hash index and tags count
+                # Update hash index
                 for model_data in raw_data:
                     if 'sha256' in model_data and 'file_path' in model_data:
                         self._hash_index.add_entry(model_data['sha256'].lower(), model_data['file_path'])
-                    
-                    # Count tags
-                    if 'tags' in model_data and model_data['tags']:
-                        for tag in model_data['tags']:
-                            self._tags_count[tag] = self._tags_count.get(tag, 0) + 1
                 
-                # Update cache
+                # Update cache and its indexes
                 self._cache.raw_data = raw_data
+                self._cache.rebuild_indexes()
                 loop.run_until_complete(self._cache.resort())
                 
                 return self._cache
@@ -348,26 +356,18 @@ class ModelScanner:
             # Clear existing hash index
             self._hash_index.clear()
             
-            # Clear existing tags count
-            self._tags_count = {}
-            
             # Determine the page type based on model type
             page_type = 'loras' if self.model_type == 'lora' else 'checkpoints'
             
             # Scan for new data
             raw_data = await self.scan_all_models()
             
-            # Build hash index and tags count
+            # Build hash index
             for model_data in raw_data:
                 if 'sha256' in model_data and 'file_path' in model_data:
                     self._hash_index.add_entry(model_data['sha256'].lower(), model_data['file_path'])
-                
-                # Count tags
-                if 'tags' in model_data and model_data['tags']:
-                    for tag in model_data['tags']:
-                        self._tags_count[tag] = self._tags_count.get(tag, 0) + 1
             
-            # Update cache
+            # Update cache (facet counts are built from raw_data)
             self._cache = ModelCache(
                 raw_data=raw_data,
                 folders=[]
@@ -397,7 +397,6 @@ class ModelScanner:
             
             # Get current cached file paths
             cached_paths = {item['file_path'] for item in self._cache.raw_data}
-            path_to_item = {item['file_path']: item for item in self._cache.raw_data}
             
             # Track found files and new files
             found_paths = set()
@@ -476,10 +475,8 @@ class ModelScanner:
                                     if 'sha256' in model_data and 'file_path' in model_data:
                                         self._hash_index.add_entry(model_data['sha256'].lower(), model_data['file_path'])
                                     
-                                    # Update tags count
-                                    if 'tags' in model_data and model_data['tags']:
-                                        for tag in model_data['tags']:
-                                            self._tags_count[tag] = self._tags_count.get(tag, 0) + 1
+                                    # Update path index and facet counts
+                                    self._cache.index_item(model_data)
                                             
                                     total_added += 1
                             else:
@@ -497,14 +494,8 @@ class ModelScanner:
                 # Process files to remove
                 for path in missing_files:
                     try:
-                        model_to_remove = path_to_item[path]
-                        
-                        # Update tags count
-                        for tag in model_to_remove.get('tags', []):
-                            if tag in self._tags_count:
-                                self._tags_count[tag] = max(0, self._tags_count[tag] - 1)
-                                if self._tags_count[tag] == 0:
-                                    del self._tags_count[tag]
+                        # Update path index and facet counts
+                        self._cache.unindex_path(path)
                         
                         # Remove from hash index
                         self._hash_index.remove_by_path(path)
@@ -517,11 +508,7 @@ class ModelScanner:
             
             # Resort cache if changes were made
             if total_added > 0 or total_removed > 0:
-                # Update folders list
-                all_folders = set(item.get('folder', '') for item in self._cache.raw_data)
-                self._cache.folders = sorted(list(all_folders), key=lambda x: x.lower())
-                
-                # Resort cache
+                # Resort cache (also updates the folders list)
                 await self._cache.resort()
                 
             logger.info(f"{self.model_type.capitalize()} Scanner: Cache reconciliation completed in {time.time() - start_time:.2f} seconds. Added {total_added}, removed {total_removed} models.")
@@ -594,7 +581,13 @@ class ModelScanner:
     
     async def _create_default_metadata(self, file_path: str) -> Optional[BaseModelMetadata]:
         """Get model file info and metadata (extensible for different model types)"""
-        return await MetadataManager.create_default_metadata(file_path, self.model_class)
+        # Default metadata hashes the whole model file
+        metrics.inc_gauge('lm_pending_hashes', 1, {'model_type': self.model_type},
+                          help_text='Model files currently being hashed')
+        try:
+            return await MetadataManager.create_default_metadata(file_path, self.model_class)
+        finally:
+            metrics.inc_gauge('lm_pending_hashes', -1, {'model_type': self.model_type})
     
     def _calculate_folder(self, file_path: str) -> str:
         """Calculate the folder path for a model file"""
@@ -608,8 +601,14 @@ class ModelScanner:
         """Hook for subclasses: adjust metadata during scanning"""
         return metadata
 
-    async def _process_model_file(self, file_path: str, root_path: str) -> Dict:
-        """Process a single model file and return its metadata"""
+    async def _process_model_file(self, file_path: str, root_path: str, fetch_metadata: bool = True) -> Dict:
+        """Process a single model file and return its metadata
+        
+        Args:
+            file_path: Path of the model file
+            root_path: Model root the file was found under
+            fetch_metadata: Whether to fetch missing description and tags from Civitai
+        """
         metadata = await MetadataManager.load_metadata(file_path, self.model_class)
         
         if metadata is None:
@@ -641,6 +640,7 @@ class ModelScanner:
                         
                         logger.debug(f"Restoring missing civitai data from .civitai.info for {file_path}")
                         metadata.civitai = version_info
+                        metadata.slim_civitai()
                         
                         # Ensure tags are also updated if they're missing
                         if (not metadata.tags or len(metadata.tags) == 0) and 'model' in version_info:
@@ -671,13 +671,47 @@ class ModelScanner:
             self._excluded_models.append(model_data['file_path'])
             return None
             
-        await self._fetch_missing_metadata(file_path, model_data)
+        if fetch_metadata:
+            await self._fetch_missing_metadata(file_path, model_data)
         rel_path = os.path.relpath(file_path, root_path)
         folder = os.path.dirname(rel_path)
         model_data['folder'] = folder.replace(os.path.sep, '/')
         
         return model_data
 
+    @staticmethod
+    def _needs_metadata_fetch(model_data: Dict) -> bool:
+        """Check whether a model's description or tags should be fetched from Civitai"""
+        if model_data.get('civitai_deleted', False):
+            return False
+        if not (model_data.get('civitai') or {}).get('modelId'):
+            return False
+        tags_missing = not model_data.get('tags') or len(model_data.get('tags', [])) == 0
+        desc_missing = not model_data.get('modelDescription') or model_data.get('modelDescription') in (None, "")
+        # TODO: not for now, but later we should check if the creator is missing
+        # creator_missing = not model_data.get('civitai', {}).get('creator')
+        creator_missing = False
+        return tags_missing or desc_missing or creator_missing
+
+    async def _fetch_deferred_metadata(self) -> None:
+        """Fetch the Civitai metadata skipped by the threaded cache initialization"""
+        file_paths, self._deferred_metadata_paths = self._deferred_metadata_paths, []
+        if not file_paths:
+            return
+        logger.debug(f"Fetching missing Civitai metadata for {len(file_paths)} {self.model_type} files")
+        with background_priority():
+            for file_path in file_paths:
+                model_data = self._cache.get_item_by_path(file_path)
+                if model_data is None:
+                    # Removed while waiting
+                    continue
+                # Tags may change, so keep the facet counts in step
+                self._cache.unindex_path(file_path)
+                try:
+                    await self._fetch_missing_metadata(file_path, model_data)
+                finally:
+                    self._cache.index_item(model_data)
+
     async def _fetch_missing_metadata(self, file_path: str, model_data: Dict) -> None:
         """Fetch missing description and tags from Civitai if needed"""
         try:
@@ -685,28 +719,12 @@ class ModelScanner:
                 logger.debug(f"Skipping metadata fetch for {file_path}: marked as deleted on Civitai")
                 return
 
-            needs_metadata_update = False
-            model_id = None
-            
-            if model_data.get('civitai'):
-                model_id = model_data['civitai'].get('modelId')
-                
-                if model_id:
-                    model_id = str(model_id)
-                    tags_missing = not model_data.get('tags') or len(model_data.get('tags', [])) == 0
-                    desc_missing = not model_data.get('modelDescription') or model_data.get('modelDescription') in (None, "")
-                    # TODO: not for now, but later we should check if the creator is missing
-                    # creator_missing = not model_data.get('civitai', {}).get('creator')
-                    creator_missing = False
-                    needs_metadata_update = tags_missing or desc_missing or creator_missing
-            
-            if needs_metadata_update and model_id:
+            if self._needs_metadata_fetch(model_data):
+                model_id = str(model_data['civitai']['modelId'])
                 logger.debug(f"Fetching missing metadata for {file_path} with model ID {model_id}")
-                from ..services.civitai_client import CivitaiClient
-                client = CivitaiClient()
+                client = await ServiceRegistry.get_civitai_client()
                 
                 model_metadata, status_code = await client.get_model_metadata(model_id)
-                await client.close()
                 
                 if status_code == 404:
                     logger.warning(f"Model {model_id} appears to be deleted from Civitai (404 response)")
@@ -748,15 +766,11 @@ class ModelScanner:
             
             # Add to cache
             self._cache.raw_data.append(metadata_dict)
+            self._cache.index_item(metadata_dict)
             
-            # Resort cache data
+            # Resort cache data (also updates the folders list)
             await self._cache.resort()
             
-            # Update folders list
-            all_folders = set(self._cache.folders)
-            all_folders.add(folder)
-            self._cache.folders = sorted(list(all_folders), key=lambda x: x.lower())
-            
             # Update the hash index
             self._hash_index.add_entry(metadata_dict['sha256'], metadata_dict['file_path'])
             return True
@@ -858,13 +872,8 @@ class ModelScanner:
         """Update cache after a model has been moved or modified"""
         cache = await self.get_cached_data()
         
-        existing_item = next((item for item in cache.raw_data if item['file_path'] == original_path), None)
-        if existing_item and 'tags' in existing_item:
-            for tag in existing_item.get('tags', []):
-                if tag in self._tags_count:
-                    self._tags_count[tag] = max(0, self._tags_count[tag] - 1)
-                    if self._tags_count[tag] == 0:
-                        del self._tags_count[tag]
+        # Drop the old index entries (tracked by path, so in-place edits are safe)
+        cache.unindex_path(original_path)
         
         self._hash_index.remove_by_path(original_path)
         
@@ -889,17 +898,47 @@ class ModelScanner:
             if 'sha256' in metadata:
                 self._hash_index.add_entry(metadata['sha256'].lower(), new_path)
             
-            all_folders = set(item['folder'] for item in cache.raw_data)
-            cache.folders = sorted(list(all_folders), key=lambda x: x.lower())
-            
-            if 'tags' in metadata:
-                for tag in metadata.get('tags', []):
-                    self._tags_count[tag] = self._tags_count.get(tag, 0) + 1
+            cache.index_item(metadata)
         
+        # Also updates the folders list
         await cache.resort()
         
         return True
         
+    async def update_models_cache_batch(self, updates: List[Tuple[str, Dict]]) -> int:
+        """Replace the cached entries of several models (paths unchanged) with a single resort
+        
+        Args:
+            updates: (file_path, metadata) pairs; later entries for the same path win
+            
+        Returns:
+            int: Number of cache entries replaced
+        """
+        cache = await self.get_cached_data()
+        by_path = dict(updates)
+        replaced = 0
+        
+        for index, item in enumerate(cache.raw_data):
+            metadata = by_path.get(item['file_path'])
+            if metadata is None:
+                continue
+            
+            cache.unindex_path(item['file_path'])
+            self._hash_index.remove_by_path(item['file_path'])
+            
+            metadata['folder'] = item.get('folder') or self._calculate_folder(item['file_path'])
+            cache.raw_data[index] = metadata
+            
+            if 'sha256' in metadata:
+                self._hash_index.add_entry(metadata['sha256'].lower(), item['file_path'])
+            cache.index_item(metadata)
+            replaced += 1
+        
+        if replaced:
+            await cache.resort()
+        
+        return replaced
+        
     def has_hash(self, sha256: str) -> bool:
         """Check if a model with given hash exists"""
         return self._hash_index.has_hash(sha256.lower())
@@ -916,48 +955,38 @@ class ModelScanner:
         """Get hash for a model by its filename without path"""
         return self._hash_index.get_hash_by_filename(filename)
 
-    # TODO: Adjust this method to use metadata instead of finding the file    
     def get_preview_url_by_hash(self, sha256: str) -> Optional[str]:
-        """Get preview static URL for a model by its hash"""
+        """Get preview static URL for a model by its hash
+        
+        Uses the preview_url already stored in the cache, so no filesystem access is needed.
+        """
         file_path = self._hash_index.get_path(sha256.lower())
-        if not file_path:
+        if not file_path or self._cache is None:
             return None
-            
-        base_name = os.path.splitext(file_path)[0]
         
-        for ext in PREVIEW_EXTENSIONS:
-            preview_path = f"{base_name}{ext}"
-            if os.path.exists(preview_path):
-                return config.get_preview_static_url(preview_path)
+        model = self._cache.get_item_by_path(file_path)
+        if not model or not model.get('preview_url'):
+            return None
         
-        return None
+        return config.get_preview_static_url(model['preview_url'])
         
     async def get_top_tags(self, limit: int = 20) -> List[Dict[str, any]]:
         """Get top tags sorted by count"""
-        await self.get_cached_data()
-        
-        sorted_tags = sorted(
-            [{"tag": tag, "count": count} for tag, count in self._tags_count.items()],
-            key=lambda x: x['count'],
-            reverse=True
-        )
+        cache = await self.get_cached_data()
         
-        return sorted_tags[:limit]
+        return [
+            {"tag": tag, "count": count}
+            for tag, count in cache.facets.get_top('tags', limit)
+        ]
         
     async def get_base_models(self, limit: int = 20) -> List[Dict[str, any]]:
         """Get base models sorted by frequency"""
         cache = await self.get_cached_data()
         
-        base_model_counts = {}
-        for model in cache.raw_data:
-            if 'base_model' in model and model['base_model']:
-                base_model = model['base_model']
-                base_model_counts[base_model] = base_model_counts.get(base_model, 0) + 1
-        
-        sorted_models = [{'name': model, 'count': count} for model, count in base_model_counts.items()]
-        sorted_models.sort(key=lambda x: x['count'], reverse=True)
-        
-        return sorted_models[:limit]
+        return [
+            {'name': model, 'count': count}
+            for model, count in cache.facets.get_top('base_model', limit)
+        ]
         
     async def get_model_info_by_name(self, name):
         """Get model information by name"""
@@ -1095,13 +1124,9 @@ class ModelScanner:
             if not models_to_remove:
                 return False
                 
-            # Update tag counts
+            # Update path index and facet counts
             for model in models_to_remove:
-                for tag in model.get('tags', []):
-                    if tag in self._tags_count:
-                        self._tags_count[tag] = max(0, self._tags_count[tag] - 1)
-                        if self._tags_count[tag] == 0:
-                            del self._tags_count[tag]
+                self._cache.unindex_path(model['file_path'])
             
             # Update hash index
             for model in models_to_remove:
@@ -0,0 +1,282 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+from .metrics import metrics
+from .settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Request priorities (lower is served first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Priority of Civitai requests made from the current task; bulk jobs switch it to background
+request_priority: ContextVar[int] = ContextVar('civitai_request_priority', default=PRIORITY_INTERACTIVE)
+
+# Statuses that make the limiter back off (and the request worth retrying)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Exponential backoff bounds in seconds
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+@contextmanager
+def background_priority():
+    """Run the enclosed Civitai requests (and tasks created inside) at background priority"""
+    token = request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Waiter:
+    """A request waiting for a token, ordered by priority then arrival"""
+
+    __slots__ = ('priority', 'sequence', 'loop', 'future')
+
+    def __init__(self, priority: int, sequence: int, loop: asyncio.AbstractEventLoop):
+        self.priority = priority
+        self.sequence = sequence
+        self.loop = loop
+        # Future the request currently sleeps on (belongs to `loop`)
+        self.future: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def wake(self) -> None:
+        """Wake the request from any thread"""
+        if self.future is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        except RuntimeError:
+            # The waiter's loop is already closed
+            pass
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """Process-wide token bucket shared by every request to one service
+
+    Tokens refill at `rate` per second up to `burst`. Waiting requests are
+    served by priority, then in arrival order, so interactive requests are
+    never stuck behind a background job's queue. Rate limit and server error
+    responses reported through `report()` pause the whole bucket, either for
+    the server's Retry-After or for an exponentially growing backoff.
+    """
+
+    def __init__(self, name: str, rate_setting: str, default_rate: float, default_burst: int):
+        """Initialize the limiter
+
+        Args:
+            name: Name used in logs and metrics
+            rate_setting: Setting holding the rate in requests per second (0 disables limiting)
+            default_rate: Rate used when the setting is missing
+            default_burst: Bucket size (at least one second worth of tokens is always allowed)
+        """
+        self.name = name
+        self._rate_setting = rate_setting
+        self._default_rate = default_rate
+        self._default_burst = default_burst
+        self._tokens = float(default_burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        # Scanners call Civitai from their own threads and event loops, so the bucket
+        # and the queue are guarded by a thread lock and waiters are woken on their own loop
+        self._lock = threading.Lock()
+        # Heap of waiting requests (see _Waiter)
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def rate(self) -> float:
+        return max(0.0, float(settings.get(self._rate_setting, self._default_rate) or 0))
+
+    @property
+    def burst(self) -> float:
+        return max(float(self._default_burst), self.rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        """Wait for permission to send one request
+
+        Args:
+            priority: Request priority (defaults to the current task's request_priority)
+        """
+        if self.rate <= 0 and time.monotonic() >= self._blocked_until:
+            return
+        if priority is None:
+            priority = request_priority.get()
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._sequence), loop)
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+        metrics.inc_gauge('lm_rate_limiter_waiting', 1, {'limiter': self.name},
+                          help_text='Requests waiting for a rate limiter token')
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_take(waiter)
+                    if delay == 0:
+                        return
+                    # Created under the lock so a wakeup from another thread is never missed
+                    waiter.future = loop.create_future()
+                if delay is None:
+                    # Not at the head of the queue: wait until the request ahead is served
+                    await waiter.future
+                else:
+                    # At the head: wait for the next token (or a wakeup, e.g. after a settings change)
+                    await asyncio.wait((waiter.future,), timeout=delay)
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    # Cancelled while waiting
+                    self._remove_waiter(waiter)
+            metrics.inc_gauge('lm_rate_limiter_waiting', -1, {'limiter': self.name})
+
+    def _try_take(self, waiter: '_Waiter') -> Optional[float]:
+        """Take a token for the waiter if it is first in line (call with the lock held)
+
+        Returns:
+            0 when a token was taken, the seconds until the next token when the
+            waiter is first in line, or None when other requests are ahead of it
+        """
+        if self._waiters[0] is not waiter:
+            return None
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            return delay
+
+        rate = self.rate
+        if rate > 0:
+            self._refill()
+            if self._tokens < 1:
+                return (1 - self._tokens) / rate
+            self._tokens -= 1
+        self._remove_waiter(waiter)
+        return 0
+
+    def _remove_waiter(self, waiter: '_Waiter') -> None:
+        """Drop a waiter from the queue and wake the next one in line (call with the lock held)"""
+        if self._waiters[0] is waiter:
+            heapq.heappop(self._waiters)
+        else:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        if self._waiters:
+            self._waiters[0].wake()
+
+    def report(self, status: int, retry_after: Optional[str] = None) -> None:
+        """Report a response status so the limiter can back off or recover
+
+        Args:
+            status: HTTP status of the response
+            retry_after: Value of the Retry-After header, if any
+        """
+        if status not in RETRY_STATUSES:
+            with self._lock:
+                self._failures = 0
+            return
+
+        with self._lock:
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = min(MAX_BACKOFF, BASE_BACKOFF * (2 ** self._failures)) * random.uniform(0.8, 1.2)
+            self._failures += 1
+            blocked_until = time.monotonic() + delay
+            paused = blocked_until > self._blocked_until
+            if paused:
+                self._blocked_until = blocked_until
+                # Resume with at most one token instead of a burst saved up during the pause
+                self._refill()
+                self._tokens = min(self._tokens, 1.0)
+                self._updated_at = blocked_until
+        if paused:
+            logger.warning(f"{self.name}: got status {status}, pausing requests for {delay:.1f}s")
+        metrics.inc_counter('lm_rate_limiter_backoffs_total', 1, {'limiter': self.name, 'status': str(status)},
+                            help_text='Responses that made a rate limiter back off')
+
+    def stats(self) -> dict:
+        """Current limiter state"""
+        with self._lock:
+            self._refill()
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2),
+                'waiting': len(self._waiters),
+                'paused_for': round(max(0.0, self._blocked_until - time.monotonic()), 2),
+                'consecutive_failures': self._failures
+            }
+
+
+# Global instances: Civitai API calls, media (images, previews) served by the Civitai CDN,
+# and model file downloads (including the byte ranges of segmented downloads)
+civitai_limiter = RateLimiter('civitai_api', 'civitai_rate_limit', default_rate=4.0, default_burst=8)
+civitai_media_limiter = RateLimiter('civitai_media', 'civitai_media_rate_limit', default_rate=16.0, default_burst=32)
+civitai_download_limiter = RateLimiter('civitai_download', 'civitai_download_rate_limit', default_rate=4.0, default_burst=16)
+
+
+# Attempts after the first for rate limited or failing requests
+MAX_RETRIES = 3
+
+
+@asynccontextmanager
+async def limited_request(session, method: str, url: str, limiter: RateLimiter = civitai_limiter, **kwargs):
+    """Send a request through a rate limiter, retrying 429 and 5xx responses after the limiter's backoff
+
+    Usage mirrors `session.request()`: `async with limited_request(session, 'POST', url) as response:`.
+    The last response is yielded as is when all retries failed.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        response = await session.request(method, url, **kwargs)
+        limiter.report(response.status, response.headers.get('Retry-After'))
+        if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+            response.release()
+            continue
+        try:
+            yield response
+        finally:
+            response.release()
+        return
+
+
+def limited_get(session, url: str, limiter: RateLimiter = civitai_limiter, **kwargs):
+    """GET a URL through a rate limiter (see limited_request)"""
+    return limited_request(session, 'GET', url, limiter, **kwargs)
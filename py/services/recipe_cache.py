@@ -1,32 +1,210 @@
 import asyncio
-from typing import List, Dict
+from functools import total_ordering
+from typing import Iterable, List, Dict, Optional, Sequence, Set, Tuple
 from dataclasses import dataclass
-from operator import itemgetter
-from natsort import natsorted
+from natsort import natsort_keygen
+from sortedcontainers import SortedKeyList
+from .facet_index import FacetIndex, RECIPE_FACETS
+from .search_index import TextSearchIndex, RECIPE_SEARCH_FIELDS, RECIPE_FIELD_WEIGHTS
+
+# Same ordering natsorted() uses for titles (case-insensitive)
+_title_key = natsort_keygen(key=lambda x: x.get('title', '').lower())
+
+def _recipe_key(recipe: Dict) -> str:
+    """Normalized id used as the key of every recipe index"""
+    return str(recipe.get('id', ''))
+
+@total_ordering
+class _Descending:
+    """Wraps a value so that it sorts in reverse order"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+def _sort_keys(recipe: Dict) -> Tuple[Tuple, Tuple]:
+    """Keys of a recipe in the name and date views (the id breaks ties)"""
+    key = _recipe_key(recipe)
+    name_key = (_title_key(recipe), key)
+    date_key = (_Descending((recipe.get('created_date', 0), recipe.get('file_path', ''))), key)
+    return name_key, date_key
+
+def _lora_hashes(recipe: Dict) -> Set[str]:
+    """Lowercase hashes of all LoRAs used by a recipe"""
+    return {
+        lora['hash'].lower()
+        for lora in recipe.get('loras', [])
+        if lora.get('hash')
+    }
 
 @dataclass
 class RecipeCache:
     """Cache structure for Recipe data"""
     raw_data: List[Dict]
-    sorted_by_name: List[Dict]
-    sorted_by_date: List[Dict]
+    sorted_by_name: Sequence[Dict]
+    sorted_by_date: Sequence[Dict]
     
     def __post_init__(self):
         self._lock = asyncio.Lock()
+        # Incrementally maintained facet counts (tags, base_model)
+        self.facets = FacetIndex(RECIPE_FACETS, key_func=_recipe_key)
+        # Token/trigram index for title, tag and LoRA name search
+        self.search_index = TextSearchIndex(RECIPE_SEARCH_FIELDS, key_func=_recipe_key, weights=RECIPE_FIELD_WEIGHTS)
+        # IDs passed to remove_recipes, only recorded once set to a set (see RecipeScanner.initialize_in_background)
+        self.removed_ids: Optional[Set[str]] = None
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """Rebuild all lookup indexes from raw_data"""
+        self._by_id: Dict[str, Dict] = {_recipe_key(recipe): recipe for recipe in self.raw_data}
+        # Inverted index: lowercase LoRA hash -> recipe ids, plus each recipe's indexed hashes
+        self._ids_by_lora_hash: Dict[str, Set[str]] = {}
+        self._hashes_by_id: Dict[str, Set[str]] = {}
+        # Fingerprint -> recipe ids multimap, plus the fingerprints shared by several recipes
+        self._ids_by_fingerprint: Dict[str, Set[str]] = {}
+        self._fingerprint_by_id: Dict[str, str] = {}
+        self._duplicate_fingerprints: Set[str] = set()
+        for recipe in self.raw_data:
+            self._index_lora_hashes(recipe)
+            self._index_fingerprint(recipe)
+        self.facets.rebuild(self.raw_data)
+        self.search_index.rebuild(self.raw_data)
+        self._rebuild_sorted_views()
+
+    def _rebuild_sorted_views(self) -> None:
+        """Fully sort both views
+
+        The views are SortedKeyLists, so single inserts and deletes stay
+        O(log n) instead of shifting a whole list. Each recipe's sort keys are
+        remembered so it can still be found after being edited in place.
+        """
+        self._sort_keys_by_id: Dict[str, Tuple[Tuple, Tuple]] = {
+            _recipe_key(recipe): _sort_keys(recipe) for recipe in self.raw_data
+        }
+        self.sorted_by_name = SortedKeyList(self.raw_data, key=lambda r: self._sort_keys_by_id[_recipe_key(r)][0])
+        self.sorted_by_date = SortedKeyList(self.raw_data, key=lambda r: self._sort_keys_by_id[_recipe_key(r)][1])
+
+    def _insert_sorted(self, recipe: Dict) -> None:
+        """Insert a recipe into both sorted views at its keyed position"""
+        self._sort_keys_by_id[_recipe_key(recipe)] = _sort_keys(recipe)
+        self.sorted_by_name.add(recipe)
+        self.sorted_by_date.add(recipe)
 
-    async def resort(self, name_only: bool = False):
-        """Resort all cached data views"""
+    def _delete_sorted(self, recipe: Dict) -> None:
+        """Remove a recipe from both sorted views using the keys it was inserted with"""
+        key = _recipe_key(recipe)
+        if key not in self._sort_keys_by_id:
+            return
+        self.sorted_by_name.discard(recipe)
+        self.sorted_by_date.discard(recipe)
+        del self._sort_keys_by_id[key]
+
+    def _index_lora_hashes(self, recipe: Dict) -> None:
+        key = _recipe_key(recipe)
+        hashes = _lora_hashes(recipe)
+        self._hashes_by_id[key] = hashes
+        for hash_value in hashes:
+            self._ids_by_lora_hash.setdefault(hash_value, set()).add(key)
+
+    def _unindex_lora_hashes(self, key: str) -> None:
+        for hash_value in self._hashes_by_id.pop(key, ()):
+            recipe_ids = self._ids_by_lora_hash.get(hash_value)
+            if recipe_ids is not None:
+                recipe_ids.discard(key)
+                if not recipe_ids:
+                    del self._ids_by_lora_hash[hash_value]
+
+    def _index_fingerprint(self, recipe: Dict) -> None:
+        fingerprint = recipe.get('fingerprint')
+        if not fingerprint:
+            return
+        key = _recipe_key(recipe)
+        self._fingerprint_by_id[key] = fingerprint
+        recipe_ids = self._ids_by_fingerprint.setdefault(fingerprint, set())
+        recipe_ids.add(key)
+        if len(recipe_ids) > 1:
+            self._duplicate_fingerprints.add(fingerprint)
+
+    def _unindex_fingerprint(self, key: str) -> None:
+        fingerprint = self._fingerprint_by_id.pop(key, None)
+        if fingerprint is None:
+            return
+        recipe_ids = self._ids_by_fingerprint.get(fingerprint)
+        if recipe_ids is None:
+            return
+        recipe_ids.discard(key)
+        if len(recipe_ids) < 2:
+            self._duplicate_fingerprints.discard(fingerprint)
+        if not recipe_ids:
+            del self._ids_by_fingerprint[fingerprint]
+
+    def reindex_recipe(self, recipe_id: str) -> bool:
+        """Refresh the indexes of a recipe after its LoRAs, fingerprint or tags were changed in place"""
+        recipe = self.get_recipe(recipe_id)
+        if recipe is None:
+            return False
+        key = _recipe_key(recipe)
+        self._unindex_lora_hashes(key)
+        self._index_lora_hashes(recipe)
+        self._unindex_fingerprint(key)
+        self._index_fingerprint(recipe)
+        self.facets.update(recipe)
+        self.search_index.update(recipe)
+        return True
+
+    def get_recipes_by_fingerprint(self, fingerprint: str) -> List[Dict]:
+        """Get the recipes with this fingerprint"""
+        return [self._by_id[key] for key in self._ids_by_fingerprint.get(fingerprint, ())]
+
+    def get_duplicate_groups(self) -> Dict[str, List[str]]:
+        """Get fingerprint -> recipe ids for every fingerprint shared by more than one recipe"""
+        return {
+            fingerprint: list(self._ids_by_fingerprint[fingerprint])
+            for fingerprint in self._duplicate_fingerprints
+        }
+
+    def get_recipe_ids_by_lora_hash(self, lora_hash: str) -> Set[str]:
+        """Get the ids of recipes that use the LoRA with this hash"""
+        return set(self._ids_by_lora_hash.get(lora_hash.lower(), ()))
+
+    def get_recipes_by_lora_hash(self, lora_hash: str, sort_by: str = 'date') -> List[Dict]:
+        """Get the recipes that use the LoRA with this hash
+        
+        Args:
+            lora_hash: SHA256 hash of the LoRA
+            sort_by: 'date' for newest first (as sorted_by_date), 'name' for the sorted_by_name order
+        """
+        view = 0 if sort_by == 'name' else 1
+        recipes = [self._by_id[key] for key in self._ids_by_lora_hash.get(lora_hash.lower(), ())]
+        recipes.sort(key=lambda recipe: self._sort_keys_by_id[_recipe_key(recipe)][view])
+        return recipes
+
+    def count_recipes_for_hashes(self, lora_hashes: Iterable[str]) -> Dict[str, int]:
+        """Count recipes per LoRA hash (keys are the lowercased input hashes)"""
+        return {
+            hash_value.lower(): len(self._ids_by_lora_hash.get(hash_value.lower(), ()))
+            for hash_value in lora_hashes
+            if hash_value
+        }
+
+    def get_recipe(self, recipe_id: str) -> Optional[Dict]:
+        """Get a cached recipe by ID"""
+        return self._by_id.get(str(recipe_id))
+
+    async def resort(self):
+        """Fully resort all cached data views
+        
+        Only needed after recipes were edited in place outside of this class;
+        add/update/remove keep the views sorted incrementally.
+        """
         async with self._lock:
-            self.sorted_by_name = natsorted(
-                self.raw_data, 
-                key=lambda x: x.get('title', '').lower()  # Case-insensitive sort
-            )
-            if not name_only:
-                self.sorted_by_date = sorted(
-                    self.raw_data, 
-                    key=itemgetter('created_date', 'file_path'), 
-                    reverse=True
-                )
+            self._rebuild_sorted_views()
     
     async def update_recipe_metadata(self, recipe_id: str, metadata: Dict) -> bool:
         """Update metadata for a specific recipe in all cached data
@@ -38,17 +216,16 @@ class RecipeCache:
         Returns:
             bool: True if the update was successful, False if the recipe wasn't found
         """
-
-        # Update in raw_data
-        for item in self.raw_data:
-            if item.get('id') == recipe_id:
-                item.update(metadata)
-                break
-        else:
+        item = self.get_recipe(recipe_id)
+        if item is None:
             return False  # Recipe not found
-            
-        # Resort to reflect changes
-        await self.resort()
+
+        async with self._lock:
+            # Reposition the recipe in the sorted views
+            self._delete_sorted(item)
+            item.update(metadata)
+            self.reindex_recipe(recipe_id)
+            self._insert_sorted(item)
         return True
             
     async def add_recipe(self, recipe_data: Dict) -> None:
@@ -58,8 +235,26 @@ class RecipeCache:
             recipe_data: The recipe data to add
         """
         async with self._lock:
-            self.raw_data.append(recipe_data)
-            await self.resort() 
+            # Replace an existing entry with the same ID instead of duplicating it
+            key = _recipe_key(recipe_data)
+            existing = self._by_id.get(key)
+            if existing is not None:
+                self._unindex_lora_hashes(key)
+                self._unindex_fingerprint(key)
+                self._delete_sorted(existing)
+                # Overwrite the cached entry in place, so raw_data keeps its position without a search
+                if existing is not recipe_data:
+                    existing.clear()
+                    existing.update(recipe_data)
+                    recipe_data = existing
+            else:
+                self.raw_data.append(recipe_data)
+                self._by_id[key] = recipe_data
+            self._index_lora_hashes(recipe_data)
+            self._index_fingerprint(recipe_data)
+            self.facets.add(recipe_data)
+            self.search_index.add(recipe_data)
+            self._insert_sorted(recipe_data)
 
     async def remove_recipe(self, recipe_id: str) -> bool:
         """Remove a recipe from the cache by ID
@@ -70,17 +265,36 @@ class RecipeCache:
         Returns:
             bool: True if the recipe was found and removed, False otherwise
         """
-        # Find the recipe in raw_data
-        recipe_index = next((i for i, recipe in enumerate(self.raw_data) 
-                             if recipe.get('id') == recipe_id), None)
-        
-        if recipe_index is None:
-            return False
-        
-        # Remove from raw_data
-        self.raw_data.pop(recipe_index)
-        
-        # Resort to update sorted lists
-        await self.resort()
-        
-        return True 
\ No newline at end of file
+        removed = await self.remove_recipes([recipe_id])
+        return bool(removed)
+
+    async def remove_recipes(self, recipe_ids: Iterable[str]) -> List[Dict]:
+        """Remove several recipes at once
+
+        Args:
+            recipe_ids: IDs of the recipes to remove
+
+        Returns:
+            List of the removed recipe entries
+        """
+        async with self._lock:
+            removed = []
+            for recipe_id in recipe_ids:
+                if self.removed_ids is not None:
+                    self.removed_ids.add(str(recipe_id))
+                recipe = self._by_id.pop(str(recipe_id), None)
+                if recipe is not None:
+                    removed.append(recipe)
+                    self._unindex_lora_hashes(_recipe_key(recipe))
+                    self._unindex_fingerprint(_recipe_key(recipe))
+                    self._delete_sorted(recipe)
+                    self.facets.remove(recipe)
+                    self.search_index.remove(recipe)
+
+            if not removed:
+                return removed
+
+            removed_objs = {id(recipe) for recipe in removed}
+            self.raw_data = [recipe for recipe in self.raw_data if id(recipe) not in removed_objs]
+
+        return removed
@@ -2,14 +2,17 @@ import os
 import logging
 import asyncio
 import json
+import threading
 import time
-from typing import List, Dict, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Any, Tuple
 from ..config import config
 from .recipe_cache import RecipeCache
+from .recipe_snapshot import RecipeCacheSnapshot, SNAPSHOT_FILENAME
 from .service_registry import ServiceRegistry
+from .metrics import metrics
+from .settings_manager import settings
 from .lora_scanner import LoraScanner
-from ..utils.utils import fuzzy_match
-from natsort import natsorted
 import sys
 
 logger = logging.getLogger(__name__)
@@ -45,6 +48,17 @@ class RecipeScanner:
             self._initialization_lock = asyncio.Lock()
             self._initialization_task: Optional[asyncio.Task] = None
             self._is_initializing = False
+            # Every recipe JSON write (from the loop's executor threads) holds this lock
+            self._recipe_file_lock = threading.Lock()
+            # Background recipe file rewrites (run in order by the lock)
+            self._rewrite_lock = asyncio.Lock()
+            self._rewrite_tasks = set()
+            # (hash, file_name) LoRA renames to apply to the cache being loaded
+            self._pending_lora_renames: List[Tuple[str, str]] = []
+            self._snapshot = RecipeCacheSnapshot(os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                'cache', SNAPSHOT_FILENAME
+            ))
             if lora_scanner:
                 self._lora_scanner = lora_scanner
             self._initialized = True
@@ -68,6 +82,8 @@ class RecipeScanner:
             
             # Mark as initializing to prevent concurrent initializations
             self._is_initializing = True
+            # Remember recipes deleted while loading, the loaded data may still contain them
+            self._cache.removed_ids = set()
             
             try:
                 # Start timer
@@ -80,13 +96,37 @@ class RecipeScanner:
                     self._initialize_recipe_cache_sync  # Run synchronous version in thread
                 )
                 
+                if cache is not None:
+                    # Swap the new cache in on the loop so readers never see half-built indexes
+                    async with self._cache._lock:
+                        placeholder_ids = {str(recipe.get('id', '')) for recipe in self._cache.raw_data}
+                        removed = [recipe_id for recipe_id in self._cache.removed_ids if recipe_id not in placeholder_ids]
+                        loaded_ids = {str(recipe.get('id', '')) for recipe in cache.raw_data}
+                        # Keep recipes added to the placeholder cache while loading
+                        added = [recipe for recipe in self._cache.raw_data
+                                 if str(recipe.get('id', '')) not in loaded_ids]
+                        for recipe in added:
+                            await cache.add_recipe(recipe)
+                        # Drop recipes deleted while loading
+                        if removed:
+                            await cache.remove_recipes(removed)
+                        self._cache = cache
+                        # Renames made while loading only reached the files, the loaded data may predate them
+                        pending_renames, self._pending_lora_renames = self._pending_lora_renames, []
+                        for hash_value, new_file_name in pending_renames:
+                            self._patch_cached_lora_file_names(hash_value, new_file_name)
+                        self._is_initializing = False
+                
                 # Calculate elapsed time and log it
                 elapsed_time = time.time() - start_time
                 recipe_count = len(cache.raw_data) if cache and hasattr(cache, 'raw_data') else 0
+                metrics.set_gauge('lm_cache_init_duration_seconds', elapsed_time, {'cache': 'recipe'},
+                                  'Duration of the last background cache initialization')
                 logger.info(f"Recipe cache initialized in {elapsed_time:.2f} seconds. Found {recipe_count} recipes")
             finally:
                 # Mark initialization as complete regardless of outcome
                 self._is_initializing = False
+                self._cache.removed_ids = None
         except Exception as e:
             logger.error(f"Recipe Scanner: Error initializing cache in background: {e}")
     
@@ -108,88 +148,93 @@ class RecipeScanner:
                     logger.warning(f"Recipes directory not found: {recipes_dir}")
                     return recipes
                 
-                # Get all recipe JSON files in the recipes directory
-                recipe_files = []
-                for root, _, files in os.walk(recipes_dir):
-                    recipe_count = sum(1 for f in files if f.lower().endswith('.recipe.json'))
-                    if recipe_count > 0:
-                        for file in files:
-                            if file.lower().endswith('.recipe.json'):
-                                recipe_files.append(os.path.join(root, file))
+                # Get all recipe JSON files with their stat signatures
+                recipe_files = RecipeCacheSnapshot.list_recipe_files(recipes_dir)
+                snapshot_entries = self._snapshot.load(recipes_dir)
+                new_entries = {}
+                reused_count = 0
                 
-                # Process each recipe file
-                for recipe_path in recipe_files:
-                    try:
-                        with open(recipe_path, 'r', encoding='utf-8') as f:
-                            recipe_data = json.load(f)
-                        
-                        # Validate recipe data
-                        if not recipe_data or not isinstance(recipe_data, dict):
-                            logger.warning(f"Invalid recipe data in {recipe_path}")
-                            continue
-                        
-                        # Ensure required fields exist
-                        required_fields = ['id', 'file_path', 'title']
-                        if not all(field in recipe_data for field in required_fields):
-                            logger.warning(f"Missing required fields in {recipe_path}")
-                            continue
-                        
-                        # Ensure the image file exists
-                        image_path = recipe_data.get('file_path')
-                        if not os.path.exists(image_path):
-                            recipe_dir = os.path.dirname(recipe_path)
-                            image_filename = os.path.basename(image_path)
-                            alternative_path = os.path.join(recipe_dir, image_filename)
-                            if os.path.exists(alternative_path):
-                                recipe_data['file_path'] = alternative_path
-                        
-                        # Ensure loras array exists
-                        if 'loras' not in recipe_data:
-                            recipe_data['loras'] = []
-                        
-                        # Ensure gen_params exists
-                        if 'gen_params' not in recipe_data:
-                            recipe_data['gen_params'] = {}
-                        
-                        # Add to list without async operations
+                # Read files that changed since the snapshot in parallel
+                changed_paths = [
+                    recipe_path for recipe_path, signature in recipe_files
+                    if (snapshot_entries.get(recipe_path) or {}).get('sig') != signature
+                ]
+                parallelism = max(1, int(settings.get('recipe_load_parallelism', 8)))
+                with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='recipe_load') as executor:
+                    changed_data = dict(zip(changed_paths, executor.map(self._read_recipe_file_sync, changed_paths)))
+                
+                # Process each recipe file, reusing snapshot data for unchanged files
+                for recipe_path, signature in recipe_files:
+                    if recipe_path in changed_data:
+                        recipe_data = changed_data[recipe_path]
+                    else:
+                        recipe_data = snapshot_entries[recipe_path]['data']
+                        reused_count += 1
+                    
+                    if recipe_data:
                         recipes.append(recipe_data)
-                    except Exception as e:
-                        logger.error(f"Error loading recipe file {recipe_path}: {e}")
-                        import traceback
-                        traceback.print_exc(file=sys.stderr)
+                        new_entries[recipe_path] = {'sig': signature, 'data': recipe_data}
                 
-                # Update cache with the collected data
-                self._cache.raw_data = recipes
+                logger.info(f"Recipe cache: reused {reused_count} recipes from snapshot, read {len(recipes) - reused_count} changed files")
+                self._snapshot.save(recipes_dir, new_entries)
                 
-                # Create a simplified resort function that doesn't use await
-                if hasattr(self._cache, "resort"):
-                    try:
-                        # Sort by name
-                        self._cache.sorted_by_name = natsorted(
-                            self._cache.raw_data,
-                            key=lambda x: x.get('title', '').lower()
-                        )
-                        
-                        # Sort by date (modified or created)
-                        self._cache.sorted_by_date = sorted(
-                            self._cache.raw_data,
-                            key=lambda x: x.get('modified', x.get('created_date', 0)),
-                            reverse=True
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sorting recipe cache: {e}")
-                
-                return self._cache
+                # Build a new cache off the loop; the caller swaps it in
+                return RecipeCache(
+                    raw_data=recipes,
+                    sorted_by_name=[],
+                    sorted_by_date=[]
+                )
             
             # Run our sync initialization that avoids lock conflicts
             return sync_initialize_cache()
         except Exception as e:
             logger.error(f"Error in thread-based recipe cache initialization: {e}")
-            return self._cache if hasattr(self, '_cache') else None
+            return None
         finally:
             # Clean up the event loop
             loop.close()
 
+    def _read_recipe_file_sync(self, recipe_path: str) -> Optional[Dict]:
+        """Read and validate a recipe JSON file without touching LoRA information"""
+        try:
+            with open(recipe_path, 'r', encoding='utf-8') as f:
+                recipe_data = json.load(f)
+            
+            # Validate recipe data
+            if not recipe_data or not isinstance(recipe_data, dict):
+                logger.warning(f"Invalid recipe data in {recipe_path}")
+                return None
+            
+            # Ensure required fields exist
+            required_fields = ['id', 'file_path', 'title']
+            if not all(field in recipe_data for field in required_fields):
+                logger.warning(f"Missing required fields in {recipe_path}")
+                return None
+            
+            # Ensure the image file exists
+            image_path = recipe_data.get('file_path')
+            if not os.path.exists(image_path):
+                recipe_dir = os.path.dirname(recipe_path)
+                image_filename = os.path.basename(image_path)
+                alternative_path = os.path.join(recipe_dir, image_filename)
+                if os.path.exists(alternative_path):
+                    recipe_data['file_path'] = alternative_path
+            
+            # Ensure loras array exists
+            if 'loras' not in recipe_data:
+                recipe_data['loras'] = []
+            
+            # Ensure gen_params exists
+            if 'gen_params' not in recipe_data:
+                recipe_data['gen_params'] = {}
+            
+            return recipe_data
+        except Exception as e:
+            logger.error(f"Error loading recipe file {recipe_path}: {e}")
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            return None
+
     @property
     def recipes_dir(self) -> str:
         """Get path to recipes directory"""
@@ -224,16 +269,13 @@ class RecipeScanner:
                         # Scan for recipe data directly
                         raw_data = await self.scan_all_recipes()
                         
-                        # Update cache
+                        # Update cache (sorted views are built on creation)
                         self._cache = RecipeCache(
                             raw_data=raw_data,
                             sorted_by_name=[],
                             sorted_by_date=[]
                         )
                         
-                        # Resort cache
-                        await self._cache.resort()
-                        
                         return self._cache
                     
                     except Exception as e:
@@ -264,62 +306,77 @@ class RecipeScanner:
             logger.warning(f"Recipes directory not found: {recipes_dir}")
             return recipes
         
-        # Get all recipe JSON files in the recipes directory
-        recipe_files = []
-        for root, _, files in os.walk(recipes_dir):
-            recipe_count = sum(1 for f in files if f.lower().endswith('.recipe.json'))
-            if recipe_count > 0:
-                for file in files:
-                    if file.lower().endswith('.recipe.json'):
-                        recipe_files.append(os.path.join(root, file))
-        
-        # Process each recipe file
-        for recipe_path in recipe_files:
-            recipe_data = await self._load_recipe_file(recipe_path)
-            if recipe_data:
-                recipes.append(recipe_data)
+        # Get all recipe JSON files with their stat signatures
+        loop = asyncio.get_event_loop()
+        recipe_files = await loop.run_in_executor(None, RecipeCacheSnapshot.list_recipe_files, recipes_dir)
+        snapshot_entries = await loop.run_in_executor(None, self._snapshot.load, recipes_dir)
+        new_entries = {}
+        
+        # Split into unchanged files (reused from the snapshot) and files to re-read
+        loaded = {}
+        changed_paths = []
+        for recipe_path, signature in recipe_files:
+            entry = snapshot_entries.get(recipe_path)
+            if entry and entry.get('sig') == signature:
+                loaded[recipe_path] = entry['data']
+            else:
+                changed_paths.append(recipe_path)
+        reused_count = len(loaded)
+        
+        # Load changed files in parallel; file IO runs on a bounded thread pool
+        if changed_paths:
+            parallelism = max(1, int(settings.get('recipe_load_parallelism', 8)))
+            semaphore = asyncio.Semaphore(parallelism)
+            pending_writes = []
+            
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='recipe_load') as executor:
+                async def load_one(recipe_path):
+                    async with semaphore:
+                        return await self._load_recipe_file(recipe_path, executor, pending_writes)
+                
+                results = await asyncio.gather(*(load_one(path) for path in changed_paths))
+                for recipe_path, recipe_data in zip(changed_paths, results):
+                    if recipe_data:
+                        loaded[recipe_path] = recipe_data
+                
+                # Write back missing fingerprints in a single batch off the event loop
+                if pending_writes:
+                    await loop.run_in_executor(executor, self._write_recipe_files, pending_writes)
+        
+        # Build the recipe list and the new snapshot in directory order
+        changed_set = set(changed_paths)
+        for recipe_path, signature in recipe_files:
+            recipe_data = loaded.get(recipe_path)
+            if not recipe_data:
+                continue
+            recipes.append(recipe_data)
+            if recipe_path in changed_set:
+                # Fingerprint write-back changes the file, so take a fresh signature
+                signature = RecipeCacheSnapshot.stat_signature(recipe_path)
+            if signature is not None:
+                new_entries[recipe_path] = {'sig': signature, 'data': recipe_data}
+        
+        logger.info(f"Recipe scan: reused {reused_count} recipes from snapshot, read {len(recipes) - reused_count} changed files")
+        await loop.run_in_executor(None, self._snapshot.save, recipes_dir, new_entries)
         
         return recipes
     
-    async def _load_recipe_file(self, recipe_path: str) -> Optional[Dict]:
-        """Load recipe data from a JSON file"""
+    async def _load_recipe_file(self, recipe_path: str, executor=None, pending_writes: Optional[List] = None) -> Optional[Dict]:
+        """Load recipe data from a JSON file
+        
+        Args:
+            recipe_path: Path of the .recipe.json file
+            executor: Optional executor for the blocking file read (default thread pool if None)
+            pending_writes: If given, fingerprint write-backs are queued here as
+                (path, data) tuples instead of being written immediately
+        """
         try:
-            with open(recipe_path, 'r', encoding='utf-8') as f:
-                recipe_data = json.load(f)
-            
-            # Validate recipe data
-            if not recipe_data or not isinstance(recipe_data, dict):
-                logger.warning(f"Invalid recipe data in {recipe_path}")
+            # Read and validate the file off the event loop
+            loop = asyncio.get_event_loop()
+            recipe_data = await loop.run_in_executor(executor, self._read_recipe_file_sync, recipe_path)
+            if not recipe_data:
                 return None
             
-            # Ensure required fields exist
-            required_fields = ['id', 'file_path', 'title']
-            for field in required_fields:
-                if field not in recipe_data:
-                    logger.warning(f"Missing required field '{field}' in {recipe_path}")
-                    return None
-            
-            # Ensure the image file exists
-            image_path = recipe_data.get('file_path')
-            if not os.path.exists(image_path):
-                logger.warning(f"Recipe image not found: {image_path}")
-                # Try to find the image in the same directory as the recipe
-                recipe_dir = os.path.dirname(recipe_path)
-                image_filename = os.path.basename(image_path)
-                alternative_path = os.path.join(recipe_dir, image_filename)
-                if os.path.exists(alternative_path):
-                    recipe_data['file_path'] = alternative_path
-                else:
-                    logger.warning(f"Could not find alternative image path for {image_path}")
-            
-            # Ensure loras array exists
-            if 'loras' not in recipe_data:
-                recipe_data['loras'] = []
-            
-            # Ensure gen_params exists
-            if 'gen_params' not in recipe_data:
-                recipe_data['gen_params'] = {}
-            
             # Update lora information with local paths and availability
             await self._update_lora_information(recipe_data)
 
@@ -330,12 +387,10 @@ class RecipeScanner:
                 recipe_data['fingerprint'] = fingerprint
                 
                 # Write updated recipe data back to file
-                try:
-                    with open(recipe_path, 'w', encoding='utf-8') as f:
-                        json.dump(recipe_data, f, indent=4, ensure_ascii=False)
-                    logger.info(f"Added fingerprint to recipe: {recipe_path}")
-                except Exception as e:
-                    logger.error(f"Error writing updated recipe with fingerprint: {e}")
+                if pending_writes is not None:
+                    pending_writes.append((recipe_path, recipe_data))
+                else:
+                    await loop.run_in_executor(executor, self._write_recipe_files, [(recipe_path, recipe_data)])
             
             return recipe_data
         except Exception as e:
@@ -344,6 +399,22 @@ class RecipeScanner:
             traceback.print_exc(file=sys.stderr)
             return None
     
+    def _write_recipe_files(self, writes: List[Tuple[str, Dict]]) -> None:
+        """Write recipe JSON files (used to persist fingerprints in a batch)"""
+        for recipe_path, recipe_data in writes:
+            def add_fingerprint(file_data: Dict, fingerprint=recipe_data['fingerprint']) -> bool:
+                # The file may have changed since it was read, so only the fingerprint is written back
+                if file_data.get('fingerprint') == fingerprint:
+                    return False
+                file_data['fingerprint'] = fingerprint
+                return True
+            
+            try:
+                self._modify_recipe_file_sync(recipe_path, add_fingerprint)
+                logger.info(f"Added fingerprint to recipe: {recipe_path}")
+            except Exception as e:
+                logger.error(f"Error writing updated recipe with fingerprint: {e}")
+    
     async def _update_lora_information(self, recipe_data: Dict) -> bool:
         """Update LoRA information with hash and file_name
         
@@ -355,6 +426,8 @@ class RecipeScanner:
         
         metadata_updated = False
         
+        # Collect version ids that still need a hash (library first, Civitai for the rest)
+        unresolved = {}
         for lora in recipe_data['loras']:
             # Skip deleted loras that were already marked
             if lora.get('isDeleted', False):
@@ -364,30 +437,35 @@ class RecipeScanner:
             if 'hash' in lora and 'file_name' in lora and lora['file_name']:
                 continue
                 
-            # If has modelVersionId but no hash, look in lora cache first, then fetch from Civitai
             if 'modelVersionId' in lora and not lora.get('hash'):
                 model_version_id = lora['modelVersionId']
-
-                # Try to find in lora cache first
                 hash_from_cache = await self._find_hash_in_lora_cache(model_version_id)
                 if hash_from_cache:
                     lora['hash'] = hash_from_cache
                     metadata_updated = True
                 else:
-                    # If not in cache, fetch from Civitai
-                    result = await self._get_hash_from_civitai(model_version_id)
-                    if isinstance(result, tuple):
-                        hash_from_civitai, is_deleted = result
-                        if hash_from_civitai:
-                            lora['hash'] = hash_from_civitai
-                            metadata_updated = True
-                        elif is_deleted:
-                            # Mark the lora as deleted if it was not found on Civitai
-                            lora['isDeleted'] = True
-                            logger.warning(f"Marked lora with modelVersionId {model_version_id} as deleted")
-                            metadata_updated = True
-                    else:
-                        logger.debug(f"Could not get hash for modelVersionId {model_version_id}")
+                    unresolved.setdefault(str(model_version_id), []).append(lora)
+        
+        # Resolve all unknown version ids at once (deduplicated, concurrent, cached)
+        if unresolved:
+            resolver = await ServiceRegistry.get_version_hash_resolver()
+            civitai_client = await self._get_civitai_client()
+            resolved = await resolver.resolve_many(unresolved.keys(), civitai_client)
+            for model_version_id, loras in unresolved.items():
+                hash_from_civitai, is_deleted = resolved.get(model_version_id, (None, False))
+                for lora in loras:
+                    if hash_from_civitai:
+                        lora['hash'] = hash_from_civitai
+                        metadata_updated = True
+                    elif is_deleted:
+                        # Mark the lora as deleted if it was not found on Civitai
+                        lora['isDeleted'] = True
+                        logger.warning(f"Marked lora with modelVersionId {model_version_id} as deleted")
+                        metadata_updated = True
+        
+        for lora in recipe_data['loras']:
+            if lora.get('isDeleted', False):
+                continue
             
             # If has hash but no file_name, look up in lora library
             if 'hash' in lora and (not lora.get('file_name') or not lora['file_name']):
@@ -428,36 +506,6 @@ class RecipeScanner:
             logger.error(f"Error finding hash in lora cache: {e}")
             return None
     
-    async def _get_hash_from_civitai(self, model_version_id: str) -> Optional[str]:
-        """Get hash from Civitai API"""
-        try:
-            # Get CivitaiClient from ServiceRegistry
-            civitai_client = await self._get_civitai_client()
-            if not civitai_client:
-                logger.error("Failed to get CivitaiClient from ServiceRegistry")
-                return None
-                
-            version_info, error_msg = await civitai_client.get_model_version_info(model_version_id)
-            
-            if not version_info:
-                if error_msg and "model not found" in error_msg.lower():
-                    logger.warning(f"Model with version ID {model_version_id} was not found on Civitai - marking as deleted")
-                    return None, True  # Return None hash and True for isDeleted flag
-                else:
-                    logger.debug(f"Could not get hash for modelVersionId {model_version_id}: {error_msg}")
-                    return None, False  # Return None hash but not marked as deleted
-                    
-            # Get hash from the first file
-            for file_info in version_info.get('files', []):
-                if file_info.get('hashes', {}).get('SHA256'):
-                    return file_info['hashes']['SHA256'], False  # Return hash with False for isDeleted flag
-                    
-            logger.debug(f"No SHA256 hash found in version info for ID: {model_version_id}")
-            return None, False
-        except Exception as e:
-            logger.error(f"Error getting hash from Civitai: {e}")
-            return None, False
-
     async def _determine_base_model(self, loras: List[Dict]) -> Optional[str]:
         """Determine the most common base model among LoRAs"""
         base_models = {}
@@ -496,7 +544,7 @@ class RecipeScanner:
             logger.error(f"Error getting base model for lora: {e}")
             return None
 
-    async def get_paginated_data(self, page: int, page_size: int, sort_by: str = 'date', search: str = None, filters: dict = None, search_options: dict = None, lora_hash: str = None, bypass_filters: bool = True):
+    async def get_paginated_data(self, page: int, page_size: int, sort_by: str = 'date', search: str = None, filters: dict = None, search_options: dict = None, lora_hash: str = None, bypass_filters: bool = True, fields: set = None):
         """Get paginated and filtered recipe data
         
         Args:
@@ -508,27 +556,54 @@ class RecipeScanner:
             search_options: Dictionary of search options to apply
             lora_hash: Optional SHA256 hash of a LoRA to filter recipes by
             bypass_filters: If True, ignore other filters when a lora_hash is provided
+            fields: Optional set of recipe keys to include in each item (None = all)
         """
-        cache = await self.get_cached_data()
+        filtered_data = await self.get_filtered_data(
+            sort_by=sort_by,
+            search=search,
+            filters=filters,
+            search_options=search_options,
+            lora_hash=lora_hash,
+            bypass_filters=bypass_filters
+        )
 
-        # Get base dataset
-        filtered_data = cache.sorted_by_date if sort_by == 'date' else cache.sorted_by_name
+        # Calculate pagination
+        total_items = len(filtered_data)
+        start_idx = (page - 1) * page_size
+        end_idx = min(start_idx + page_size, total_items)
+        
+        # Get paginated items
+        paginated_items = self.prepare_list_items(filtered_data[start_idx:end_idx], fields)
         
+        result = {
+            'items': paginated_items,
+            'total': total_items,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': (total_items + page_size - 1) // page_size
+        }
+        
+        return result
+    
+    async def get_filtered_data(self, sort_by: str = 'date', search: str = None, filters: dict = None, search_options: dict = None, lora_hash: str = None, bypass_filters: bool = True) -> List[Dict]:
+        """Get the full sorted and filtered recipe list without pagination
+        
+        Accepts the same filters as get_paginated_data.
+        """
+        cache = await self.get_cached_data()
+
         # Special case: Filter by LoRA hash (takes precedence if bypass_filters is True)
         if lora_hash:
-            # Filter recipes that contain this LoRA hash
-            filtered_data = [
-                item for item in filtered_data
-                if 'loras' in item and any(
-                    lora.get('hash', '').lower() == lora_hash.lower() 
-                    for lora in item['loras']
-                )
-            ]
+            # Only the recipes that contain this LoRA hash, from the inverted hash index
+            filtered_data = cache.get_recipes_by_lora_hash(lora_hash, 'date' if sort_by == 'date' else 'name')
             
             if bypass_filters:
                 # Skip other filters if bypass_filters is True
                 pass
             # Otherwise continue with normal filtering after applying LoRA hash filter
+        else:
+            # Get base dataset
+            filtered_data = cache.sorted_by_date if sort_by == 'date' else cache.sorted_by_name
         
         # Skip further filtering if we're only filtering by LoRA hash with bypass enabled
         if not (lora_hash and bypass_filters):
@@ -543,36 +618,17 @@ class RecipeScanner:
                         'lora_model': True
                     }
                 
-                # Build the search predicate based on search options
-                def matches_search(item):
-                    # Search in title if enabled
-                    if search_options.get('title', True):
-                        if fuzzy_match(str(item.get('title', '')), search):
-                            return True
-                    
-                    # Search in tags if enabled
-                    if search_options.get('tags', True) and 'tags' in item:
-                        for tag in item['tags']:
-                            if fuzzy_match(tag, search):
-                                return True
-                    
-                    # Search in lora file names if enabled
-                    if search_options.get('lora_name', True) and 'loras' in item:
-                        for lora in item['loras']:
-                            if fuzzy_match(str(lora.get('file_name', '')), search):
-                                return True
-                    
-                    # Search in lora model names if enabled
-                    if search_options.get('lora_model', True) and 'loras' in item:
-                        for lora in item['loras']:
-                            if fuzzy_match(str(lora.get('modelName', '')), search):
-                                return True
-                    
-                    # No match found
-                    return False
+                # Query the search index with the enabled fields
+                search_fields = [
+                    field for field in ('title', 'tags', 'lora_name', 'lora_model')
+                    if search_options.get(field, True)
+                ]
+                scores = cache.search_index.search(search, search_fields)
+                filtered_data = [item for item in filtered_data if str(item.get('id', '')) in scores]
                 
-                # Filter the data using the search predicate
-                filtered_data = [item for item in filtered_data if matches_search(item)]
+                # Rank by relevance if requested (stable, so ties keep date order)
+                if sort_by == 'relevance':
+                    filtered_data.sort(key=lambda item: scores[str(item.get('id', ''))], reverse=True)
             
             # Apply additional filters
             if filters:
@@ -590,32 +646,33 @@ class RecipeScanner:
                         if any(tag in item.get('tags', []) for tag in filters['tags'])
                     ]
 
-        # Calculate pagination
-        total_items = len(filtered_data)
-        start_idx = (page - 1) * page_size
-        end_idx = min(start_idx + page_size, total_items)
-        
-        # Get paginated items
-        paginated_items = filtered_data[start_idx:end_idx]
-        
-        # Add inLibrary information for each lora
-        for item in paginated_items:
-            if 'loras' in item:
-                for lora in item['loras']:
-                    if 'hash' in lora and lora['hash']:
-                        lora['inLibrary'] = self._lora_scanner.has_hash(lora['hash'].lower())
-                        lora['preview_url'] = self._lora_scanner.get_preview_url_by_hash(lora['hash'].lower())
-                        lora['localPath'] = self._lora_scanner.get_path_by_hash(lora['hash'].lower())
+        return filtered_data
+    
+    def prepare_list_items(self, items: List[Dict], fields: set = None) -> List[Dict]:
+        """Enrich recipe LoRAs with library info and apply field projection
         
-        result = {
-            'items': paginated_items,
-            'total': total_items,
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (total_items + page_size - 1) // page_size
-        }
+        Args:
+            items: Recipe entries from the cache
+            fields: Optional set of recipe keys to keep (None = all)
+        """
+        # Add inLibrary information for each lora (skipped when loras are not requested)
+        if fields is None or 'loras' in fields:
+            for item in items:
+                if 'loras' in item:
+                    for lora in item['loras']:
+                        if 'hash' in lora and lora['hash']:
+                            lora['inLibrary'] = self._lora_scanner.has_hash(lora['hash'].lower())
+                            lora['preview_url'] = self._lora_scanner.get_preview_url_by_hash(lora['hash'].lower())
+                            lora['localPath'] = self._lora_scanner.get_path_by_hash(lora['hash'].lower())
+        
+        # Project items down to the requested fields
+        if fields is not None:
+            items = [
+                {key: item[key] for key in fields if key in item}
+                for item in items
+            ]
         
-        return result
+        return items
     
     async def get_recipe_by_id(self, recipe_id: str) -> dict:
         """Get a single recipe by ID with all metadata and formatted URLs
@@ -633,7 +690,7 @@ class RecipeScanner:
         cache = await self.get_cached_data()
         
         # Find the recipe with the specified ID
-        recipe = next((r for r in cache.raw_data if str(r.get('id', '')) == recipe_id), None)
+        recipe = cache.get_recipe(recipe_id)
         
         if not recipe:
             return None
@@ -696,7 +753,6 @@ class RecipeScanner:
             bool: True if successful, False otherwise
         """
         import os
-        import json
         
         # First, find the recipe JSON file path
         recipe_json_path = os.path.join(self.recipes_dir, f"{recipe_id}.recipe.json")
@@ -705,17 +761,19 @@ class RecipeScanner:
             return False
             
         try:
-            # Load existing recipe data
-            with open(recipe_json_path, 'r', encoding='utf-8') as f:
-                recipe_data = json.load(f)
+            # Keep the fingerprint in sync when the LoRA list changes
+            if 'loras' in metadata:
+                from ..utils.utils import calculate_recipe_fingerprint
+                metadata = {**metadata, 'fingerprint': calculate_recipe_fingerprint(metadata['loras'])}
                 
-            # Update fields
-            for key, value in metadata.items():
-                recipe_data[key] = value
+            def update_fields(recipe_data: Dict) -> bool:
+                recipe_data.update(metadata)
+                return True
                 
-            # Save updated recipe
-            with open(recipe_json_path, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=4, ensure_ascii=False)
+            # Load, update and save the recipe file
+            recipe_data = await self.modify_recipe_file(recipe_json_path, update_fields)
+            if recipe_data is None:
+                return False
                 
             # Update the cache if it exists
             if self._cache is not None:
@@ -736,12 +794,15 @@ class RecipeScanner:
     async def update_lora_filename_by_hash(self, hash_value: str, new_file_name: str) -> Tuple[int, int]:
         """Update file_name in all recipes that contain a LoRA with the specified hash.
         
+        Affected recipes are found through the cache's LoRA hash index and patched
+        in memory right away; their JSON files are rewritten in a background batch.
+        
         Args:
             hash_value: The SHA256 hash value of the LoRA
             new_file_name: The new file_name to set
             
         Returns:
-            Tuple[int, int]: (number of recipes updated in files, number of recipes updated in cache)
+            Tuple[int, int]: (number of recipe files scheduled for update, number of recipes updated in cache)
         """
         if not hash_value or not new_file_name:
             return 0, 0
@@ -754,68 +815,140 @@ class RecipeScanner:
         if not recipes_dir or not os.path.exists(recipes_dir):
             logger.warning(f"Recipes directory not found: {recipes_dir}")
             return 0, 0
-            
-        # Check if cache is initialized
-        cache_initialized = self._cache is not None
-        cache_updated_count = 0
-        file_updated_count = 0
         
-        # Get all recipe JSON files in the recipes directory
-        recipe_files = []
-        for root, _, files in os.walk(recipes_dir):
-            for file in files:
-                if file.lower().endswith('.recipe.json'):
-                    recipe_files.append(os.path.join(root, file))
+        if self._cache is None or self._is_initializing:
+            # No (complete) index yet: fall back to checking every recipe file
+            if self._is_initializing:
+                # The cache being loaded is patched when it is swapped in
+                self._pending_lora_renames.append((hash_value, new_file_name))
+            recipe_paths = [path for path, _ in RecipeCacheSnapshot.list_recipe_files(recipes_dir)]
+            loop = asyncio.get_event_loop()
+            file_updated_count = await loop.run_in_executor(
+                None, self._rewrite_lora_file_names, recipe_paths, hash_value, new_file_name
+            )
+            return file_updated_count, 0
+        
+        # Patch cached recipes in memory
+        recipes = self._patch_cached_lora_file_names(hash_value, new_file_name)
+        recipe_paths = [os.path.join(recipes_dir, f"{recipe['id']}.recipe.json") for recipe in recipes]
+        
+        if recipe_paths:
+            self._schedule_recipe_rewrite(recipe_paths, hash_value, new_file_name)
+            
+        return len(recipe_paths), len(recipes)
+    
+    def _patch_cached_lora_file_names(self, hash_value: str, new_file_name: str) -> List[Dict]:
+        """Set file_name for LoRAs matching hash_value in the cached recipes
+        
+        Returns:
+            List[Dict]: The cached recipes using the LoRA
+        """
+        recipes = self._cache.get_recipes_by_lora_hash(hash_value)
+        for recipe in recipes:
+            for lora in recipe.get('loras', []):
+                if lora.get('hash', '').lower() == hash_value:
+                    lora['file_name'] = new_file_name
+            # Refresh the search index for the new LoRA name
+            self._cache.reindex_recipe(recipe['id'])
+        return recipes
+    
+    def _schedule_recipe_rewrite(self, recipe_paths: List[str], hash_value: str, new_file_name: str) -> None:
+        """Rewrite recipe files in the background, one batch at a time"""
+        async def rewrite():
+            async with self._rewrite_lock:
+                loop = asyncio.get_event_loop()
+                try:
+                    updated = await loop.run_in_executor(
+                        None, self._rewrite_lora_file_names, recipe_paths, hash_value, new_file_name
+                    )
+                    logger.info(f"Updated LoRA file_name in {updated} recipe files")
+                except Exception as e:
+                    logger.error(f"Error rewriting recipe files for LoRA {hash_value}: {e}", exc_info=True)
+        
+        task = asyncio.create_task(rewrite())
+        self._rewrite_tasks.add(task)
+        task.add_done_callback(self._rewrite_tasks.discard)
+    
+    def _rewrite_lora_file_names(self, recipe_paths: List[str], hash_value: str, new_file_name: str) -> int:
+        """Set file_name for LoRAs matching hash_value in the given recipe files
         
-        # Process each recipe file
-        for recipe_path in recipe_files:
+        Returns:
+            int: Number of files that were rewritten
+        """
+        def rename_loras(recipe_data: Dict) -> bool:
+            file_updated = False
+            for lora in recipe_data.get('loras', []):
+                if lora.get('hash', '').lower() == hash_value and lora.get('file_name') != new_file_name:
+                    lora['file_name'] = new_file_name
+                    file_updated = True
+            return file_updated
+        
+        updated_count = 0
+        for recipe_path in recipe_paths:
             try:
-                # Load the recipe data
-                with open(recipe_path, 'r', encoding='utf-8') as f:
-                    recipe_data = json.load(f)
-                
-                # Skip if no loras or invalid structure
-                if not recipe_data or not isinstance(recipe_data, dict) or 'loras' not in recipe_data:
-                    continue
-                
-                # Check if any lora has matching hash
-                file_updated = False
-                for lora in recipe_data.get('loras', []):
-                    if 'hash' in lora and lora['hash'].lower() == hash_value:
-                        # Update file_name
-                        old_file_name = lora.get('file_name', '')
-                        lora['file_name'] = new_file_name
-                        file_updated = True
-                        logger.info(f"Updated file_name in recipe {recipe_path}: {old_file_name} -> {new_file_name}")
-                
-                # If updated, save the file
-                if file_updated:
-                    with open(recipe_path, 'w', encoding='utf-8') as f:
-                        json.dump(recipe_data, f, indent=4, ensure_ascii=False)
-                    file_updated_count += 1
-                    
-                    # Also update in cache if it exists
-                    if cache_initialized:
-                        recipe_id = recipe_data.get('id')
-                        if recipe_id:
-                            for cache_item in self._cache.raw_data:
-                                if cache_item.get('id') == recipe_id:
-                                    # Replace loras array with updated version
-                                    cache_item['loras'] = recipe_data['loras']
-                                    cache_updated_count += 1
-                                    break
-            
+                if self._modify_recipe_file_sync(recipe_path, rename_loras, only_changed=True) is not None:
+                    updated_count += 1
+            except FileNotFoundError:
+                logger.warning(f"Recipe file not found while updating LoRA file_name: {recipe_path}")
             except Exception as e:
                 logger.error(f"Error updating recipe file {recipe_path}: {e}")
-                import traceback
-                traceback.print_exc(file=sys.stderr)
+        return updated_count
+    
+    def _modify_recipe_file_sync(self, recipe_path: str, modify: Callable[[Dict], bool],
+                                 only_changed: bool = False) -> Optional[Dict]:
+        """Read, modify and save a recipe JSON file under the recipe file lock
         
-        # Resort cache if updates were made
-        if cache_initialized and cache_updated_count > 0:
-            await self._cache.resort()
-            logger.info(f"Resorted recipe cache after updating {cache_updated_count} items")
+        Args:
+            recipe_path: Path of the .recipe.json file
+            modify: Called with the file's data; returns whether the file should be saved
+            only_changed: Return None instead of the data when nothing was saved
             
-        return file_updated_count, cache_updated_count
+        Returns:
+            Optional[Dict]: The file's data, or None if it is not a recipe object
+        """
+        with self._recipe_file_lock:
+            with open(recipe_path, 'r', encoding='utf-8') as f:
+                recipe_data = json.load(f)
+            if not isinstance(recipe_data, dict):
+                return None
+            changed = modify(recipe_data)
+            if changed:
+                self._atomic_write_json(recipe_path, recipe_data)
+            return recipe_data if changed or not only_changed else None
+    
+    def _write_recipe_file_sync(self, recipe_path: str, recipe_data: Dict) -> None:
+        """Save a recipe JSON file under the recipe file lock"""
+        with self._recipe_file_lock:
+            self._atomic_write_json(recipe_path, recipe_data)
+    
+    def _remove_recipe_file_sync(self, recipe_path: str) -> None:
+        """Delete a recipe JSON file under the recipe file lock"""
+        with self._recipe_file_lock:
+            os.remove(recipe_path)
+    
+    async def modify_recipe_file(self, recipe_path: str, modify: Callable[[Dict], bool]) -> Optional[Dict]:
+        """Read, modify and save a recipe JSON file (see _modify_recipe_file_sync)"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._modify_recipe_file_sync, recipe_path, modify)
+    
+    async def write_recipe_file(self, recipe_path: str, recipe_data: Dict) -> None:
+        """Save a recipe JSON file without racing other recipe writes"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write_recipe_file_sync, recipe_path, recipe_data)
+    
+    async def remove_recipe_file(self, recipe_path: str) -> None:
+        """Delete a recipe JSON file without racing other recipe writes"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._remove_recipe_file_sync, recipe_path)
+    
+    @staticmethod
+    def _atomic_write_json(file_path: str, data: Dict) -> None:
+        """Write JSON to a temp file and move it into place"""
+        # Unique per writer, so writers never share a half-written temp file
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, file_path)
 
     async def find_recipes_by_fingerprint(self, fingerprint: str) -> list:
         """Find recipes with a matching fingerprint
@@ -832,19 +965,18 @@ class RecipeScanner:
         # Get all recipes from cache
         cache = await self.get_cached_data()
         
-        # Find recipes with matching fingerprint
+        # Look up recipes with matching fingerprint in the fingerprint index
         matching_recipes = []
-        for recipe in cache.raw_data:
-            if recipe.get('fingerprint') == fingerprint:
-                recipe_details = {
-                    'id': recipe.get('id'),
-                    'title': recipe.get('title'),
-                    'file_url': self._format_file_url(recipe.get('file_path')),
-                    'modified': recipe.get('modified'),
-                    'created_date': recipe.get('created_date'),
-                    'lora_count': len(recipe.get('loras', []))
-                }
-                matching_recipes.append(recipe_details)
+        for recipe in cache.get_recipes_by_fingerprint(fingerprint):
+            recipe_details = {
+                'id': recipe.get('id'),
+                'title': recipe.get('title'),
+                'file_url': self._format_file_url(recipe.get('file_path')),
+                'modified': recipe.get('modified'),
+                'created_date': recipe.get('created_date'),
+                'lora_count': len(recipe.get('loras', []))
+            }
+            matching_recipes.append(recipe_details)
         
         return matching_recipes
         
@@ -857,19 +989,5 @@ class RecipeScanner:
         # Get all recipes from cache
         cache = await self.get_cached_data()
         
-        # Group recipes by fingerprint
-        fingerprint_groups = {}
-        for recipe in cache.raw_data:
-            fingerprint = recipe.get('fingerprint')
-            if not fingerprint:
-                continue
-                
-            if fingerprint not in fingerprint_groups:
-                fingerprint_groups[fingerprint] = []
-                
-            fingerprint_groups[fingerprint].append(recipe.get('id'))
-        
-        # Filter to only include groups with more than one recipe
-        duplicate_groups = {k: v for k, v in fingerprint_groups.items() if len(v) > 1}
-        
-        return duplicate_groups
+        # Groups with more than one recipe are maintained by the fingerprint index
+        return cache.get_duplicate_groups()
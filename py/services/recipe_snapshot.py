@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# File name of the snapshot inside the cache folder
+SNAPSHOT_FILENAME = 'recipe_cache.json'
+
+
+class RecipeCacheSnapshot:
+    """Persistent snapshot of parsed recipe files keyed by file stat signature
+
+    On startup only recipe files whose (size, mtime) changed since the last
+    snapshot need to be read and parsed again.
+    """
+
+    def __init__(self, snapshot_path: str):
+        """Initialize the snapshot
+
+        Args:
+            snapshot_path: Path of the JSON snapshot file
+        """
+        self.snapshot_path = snapshot_path
+
+    @staticmethod
+    def stat_signature(file_path: str) -> Optional[List[int]]:
+        """Get the [size, mtime_ns] signature of a file, or None if it is missing"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def list_recipe_files(recipes_dir: str) -> List[Tuple[str, List[int]]]:
+        """List recipe JSON files under recipes_dir with their stat signatures"""
+        recipe_files = []
+        for root, _, files in os.walk(recipes_dir):
+            for file in files:
+                if file.lower().endswith('.recipe.json'):
+                    recipe_path = os.path.join(root, file)
+                    signature = RecipeCacheSnapshot.stat_signature(recipe_path)
+                    if signature is not None:
+                        recipe_files.append((recipe_path, signature))
+        return recipe_files
+
+    def load(self, recipes_dir: str) -> Dict[str, Dict]:
+        """Load snapshot entries (recipe path -> {'sig': [...], 'data': {...}})
+
+        Returns an empty dict if the snapshot is missing, unreadable, from a
+        different version or was built for a different recipes directory.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable recipe cache snapshot: {e}")
+            return {}
+
+        if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('recipes_dir') != recipes_dir:
+            return {}
+        return snapshot.get('entries', {})
+
+    def save(self, recipes_dir: str, entries: Dict[str, Dict]) -> None:
+        """Atomically write the snapshot"""
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            temp_path = f"{self.snapshot_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': SNAPSHOT_VERSION,
+                    'recipes_dir': recipes_dir,
+                    'entries': entries
+                }, f, ensure_ascii=False)
+            os.replace(temp_path, self.snapshot_path)
+        except Exception as e:
+            logger.error(f"Error saving recipe cache snapshot: {e}")
+
+    def clear(self) -> None:
+        """Delete the snapshot file"""
+        try:
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+        except OSError as e:
+            logger.error(f"Error removing recipe cache snapshot: {e}")
@@ -0,0 +1,211 @@
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Similarity threshold used for fuzzy token matches (same as utils.fuzzy_match)
+FUZZY_THRESHOLD = 0.85
+
+# Score of a search word against a token, by match kind
+EXACT_SCORE = 4
+PREFIX_SCORE = 3
+SUBSTRING_SCORE = 2
+FUZZY_SCORE = 1
+
+
+def _text_values(values) -> Tuple[str, ...]:
+    return tuple(str(value) for value in values if value)
+
+
+# Searchable recipe fields, named after the recipe search options
+RECIPE_SEARCH_FIELDS: Dict[str, Callable[[Dict], Iterable[str]]] = {
+    'title': lambda item: _text_values((item.get('title'),)),
+    'tags': lambda item: _text_values(item.get('tags') or ()),
+    'lora_name': lambda item: _text_values(lora.get('file_name') for lora in item.get('loras', [])),
+    'lora_model': lambda item: _text_values(lora.get('modelName') for lora in item.get('loras', [])),
+}
+
+# Relative weight of a match in each field when ranking
+RECIPE_FIELD_WEIGHTS: Dict[str, float] = {
+    'title': 3.0,
+    'tags': 2.0,
+    'lora_name': 1.0,
+    'lora_model': 1.0,
+}
+
+
+def _trigrams(token: str) -> Set[str]:
+    """Trigrams of a token padded with boundary markers"""
+    padded = f"\x02{token}\x03"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TextSearchIndex:
+    """Incrementally maintained token and trigram index for text search
+
+    Every indexed text (a title, a single tag, a LoRA name...) gets its own id
+    and is split on whitespace into tokens. A query matches a text when every
+    query word matches one of its tokens exactly, as a prefix, as a substring
+    or fuzzily - the same semantics as utils.fuzzy_match, without scanning
+    every item.
+    """
+
+    def __init__(self, fields: Dict[str, Callable[[Dict], Iterable[str]]], key_func: Callable[[Dict], str],
+                 weights: Optional[Dict[str, float]] = None):
+        """Initialize the search index
+
+        Args:
+            fields: Mapping of field name to a function returning the item's texts
+            key_func: Function returning a unique key for an item
+            weights: Optional ranking weight per field (default 1.0)
+        """
+        self._fields = fields
+        self._key_func = key_func
+        self._weights = weights or {}
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all indexed items"""
+        self._next_text_id = 0
+        self._text_owner: Dict[int, Tuple[str, str]] = {}  # text id -> (key, field)
+        self._text_tokens: Dict[int, Tuple[str, ...]] = {}
+        self._texts_by_key: Dict[str, List[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}  # token -> text ids
+        self._trigram_tokens: Dict[str, Set[str]] = {}  # trigram -> tokens
+
+    def rebuild(self, items: Iterable[Dict]) -> None:
+        """Reindex all items from scratch"""
+        self.clear()
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Dict) -> None:
+        """Index an item, replacing any previous entry under the same key"""
+        key = self._key_func(item)
+        if key in self._texts_by_key:
+            self.remove_key(key)
+
+        text_ids = []
+        for field, extract in self._fields.items():
+            for text in extract(item):
+                tokens = tuple(set(text.lower().split()))
+                if not tokens:
+                    continue
+                text_id = self._next_text_id
+                self._next_text_id += 1
+                self._text_owner[text_id] = (key, field)
+                self._text_tokens[text_id] = tokens
+                text_ids.append(text_id)
+                for token in tokens:
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        posting = self._postings[token] = set()
+                        for trigram in _trigrams(token):
+                            self._trigram_tokens.setdefault(trigram, set()).add(token)
+                    posting.add(text_id)
+        self._texts_by_key[key] = text_ids
+
+    def remove(self, item: Dict) -> None:
+        """Remove an item from the index"""
+        self.remove_key(self._key_func(item))
+
+    def remove_key(self, key: str) -> None:
+        """Remove the item stored under key"""
+        for text_id in self._texts_by_key.pop(key, ()):
+            del self._text_owner[text_id]
+            for token in self._text_tokens.pop(text_id):
+                posting = self._postings[token]
+                posting.discard(text_id)
+                if not posting:
+                    # Last use of the token: drop it from the vocabulary
+                    del self._postings[token]
+                    for trigram in _trigrams(token):
+                        tokens = self._trigram_tokens.get(trigram)
+                        if tokens is not None:
+                            tokens.discard(token)
+                            if not tokens:
+                                del self._trigram_tokens[trigram]
+
+    def update(self, item: Dict) -> None:
+        """Reindex an item after it changed"""
+        self.add(item)
+
+    def _match_tokens(self, word: str) -> Dict[str, int]:
+        """Find vocabulary tokens matching a query word, with their match score"""
+        if len(word) < 3:
+            # Too short for trigrams: scan the vocabulary (substring only, fuzzy can't match)
+            candidates = (token for token in self._postings if word in token)
+        else:
+            # Tokens containing the word contain all of its inner trigrams
+            inner = [word[i:i + 3] for i in range(len(word) - 2)]
+            token_sets = sorted((self._trigram_tokens.get(trigram, set()) for trigram in inner), key=len)
+            candidates = set(token_sets[0]).intersection(*token_sets[1:]) if token_sets else set()
+
+        matches = {}
+        for token in candidates:
+            if token == word:
+                matches[token] = EXACT_SCORE
+            elif token.startswith(word):
+                matches[token] = PREFIX_SCORE
+            elif word in token:
+                matches[token] = SUBSTRING_SCORE
+
+        if len(word) >= 3:
+            # Fuzzy candidates share at least one padded trigram with the word
+            fuzzy_candidates = set()
+            for trigram in _trigrams(word):
+                fuzzy_candidates.update(self._trigram_tokens.get(trigram, ()))
+            word_len = len(word)
+            for token in fuzzy_candidates:
+                if token in matches:
+                    continue
+                # Upper bound of the ratio from the lengths alone
+                if 2 * min(word_len, len(token)) / (word_len + len(token)) < FUZZY_THRESHOLD:
+                    continue
+                matcher = SequenceMatcher(None, token, word)
+                if matcher.quick_ratio() >= FUZZY_THRESHOLD and matcher.ratio() >= FUZZY_THRESHOLD:
+                    matches[token] = FUZZY_SCORE
+
+        return matches
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Find items matching every word of the query within a single text
+
+        Args:
+            query: Search text, split into words on whitespace
+            fields: Field names to search in (all fields if None)
+
+        Returns:
+            Dict of matching item key -> relevance score (higher is better)
+        """
+        words = list(dict.fromkeys(query.lower().split()))
+        if not words:
+            return {}
+        enabled = set(self._fields if fields is None else fields)
+
+        # Per text id: summed best score over all words (texts missing a word drop out)
+        text_scores: Optional[Dict[int, int]] = None
+        # Match the most selective (longest) words first to shrink the candidate set early
+        for word in sorted(words, key=len, reverse=True):
+            word_scores: Dict[int, int] = {}
+            for token, score in self._match_tokens(word).items():
+                for text_id in self._postings[token]:
+                    if text_scores is None:
+                        if self._text_owner[text_id][1] not in enabled:
+                            continue
+                    elif text_id not in text_scores:
+                        continue
+                    if score > word_scores.get(text_id, 0):
+                        word_scores[text_id] = score
+            if text_scores is None:
+                text_scores = word_scores
+            else:
+                text_scores = {text_id: text_scores[text_id] + score for text_id, score in word_scores.items()}
+            if not text_scores:
+                return {}
+
+        results: Dict[str, float] = {}
+        for text_id, score in text_scores.items():
+            key, field = self._text_owner[text_id]
+            weighted = score * self._weights.get(field, 1.0)
+            if weighted > results.get(key, 0):
+                results[key] = weighted
+        return results
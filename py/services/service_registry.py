@@ -145,6 +145,27 @@ class ServiceRegistry:
             logger.debug(f"Created and registered {service_name}")
             return client
     
+    @classmethod
+    async def get_version_hash_resolver(cls):
+        """Get or create the Civitai version hash resolver instance"""
+        service_name = "version_hash_resolver"
+        
+        if service_name in cls._services:
+            return cls._services[service_name]
+        
+        async with cls._get_lock(service_name):
+            # Double-check after acquiring lock
+            if service_name in cls._services:
+                return cls._services[service_name]
+            
+            # Import here to avoid circular imports
+            from .version_hash_resolver import VersionHashResolver
+            
+            resolver = await VersionHashResolver.get_instance()
+            cls._services[service_name] = resolver
+            logger.debug(f"Created and registered {service_name}")
+            return resolver
+    
     @classmethod
     async def get_download_manager(cls):
         """Get or create Download manager instance"""
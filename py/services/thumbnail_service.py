@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from ..config import config
+from ..utils.constants import THUMBNAIL_SIZES
+from .settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Source extensions that can be rendered to a still thumbnail
+THUMBNAIL_SOURCE_EXTENSIONS = {'.webp', '.png', '.jpg', '.jpeg', '.gif'}
+# Source paths whose resolved path and stat signature are remembered for list requests
+SOURCE_INFO_CACHE_SIZE = 8192
+# Seconds a remembered signature is trusted before the file is stat'ed again
+SOURCE_INFO_TTL = 60
+
+
+def _render_thumbnail(source_path: str, dest_path: str, width: int, quality: int) -> str:
+    """Resize an image to the given width and save it as webp (runs in a worker thread)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as img:
+        # Animated images only use their first frame
+        img.seek(0)
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+        # Never upscale
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        temp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(temp_path, format='WEBP', quality=quality, method=4)
+
+    os.replace(temp_path, dest_path)
+    return dest_path
+
+
+class ThumbnailService:
+    """Serves lazily generated, content-addressed preview thumbnails
+
+    Variants are keyed by the source file's path and stat signature, so a
+    changed preview gets a new URL and cached responses can be immutable.
+    """
+
+    def __init__(self):
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.cache_dir = os.path.join(project_dir, 'cache', 'thumbnails')
+        self._executor = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # source path -> (checked at, real path, signature), in LRU order
+        self._source_info: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def parse_card_size(value: Optional[str]) -> Optional[int]:
+        """Parse a `card_size` query value (card width in pixels)"""
+        try:
+            card_size = int(value or 0)
+        except ValueError:
+            return None
+        return card_size if card_size > 0 else None
+
+    @staticmethod
+    def pick_size(requested: int) -> int:
+        """Snap a requested card width to the smallest variant that covers it"""
+        for size in THUMBNAIL_SIZES:
+            if requested <= size:
+                return size
+        return THUMBNAIL_SIZES[-1]
+
+    @staticmethod
+    def _signature(real_path: str) -> Optional[str]:
+        """Build the content key for a source file from its stat signature"""
+        try:
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+        key = f"{real_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get_thumbnail_url(self, source_path: str, width: int) -> str:
+        """Get the thumbnail URL for a preview file
+
+        Falls back to the regular static URL for videos or unsupported files.
+
+        Args:
+            source_path: Local path of the preview image
+            width: Requested card width in pixels
+        """
+        if not source_path:
+            return ''
+
+        ext = os.path.splitext(source_path)[1].lower()
+        if ext not in THUMBNAIL_SOURCE_EXTENSIONS:
+            return config.get_preview_static_url(source_path)
+
+        real_path, signature = self._get_source_info(source_path)
+        if not signature:
+            return config.get_preview_static_url(source_path)
+
+        query = urllib.parse.urlencode({
+            'path': real_path,
+            'w': self.pick_size(width),
+            'v': signature[:16]
+        })
+        return f"/api/lm/thumbnail?{query}"
+
+    def _get_source_info(self, source_path: str) -> Tuple[str, Optional[str]]:
+        """Resolve a source path and its signature, memoized for SOURCE_INFO_TTL seconds
+
+        List pages reference the same previews over and over, so this saves a
+        realpath and a stat per item on most requests.
+        """
+        now = time.monotonic()
+        info = self._source_info.get(source_path)
+        if info is not None and now - info[0] < SOURCE_INFO_TTL:
+            self._source_info.move_to_end(source_path)
+            return info[1], info[2]
+
+        real_path = os.path.realpath(source_path).replace(os.sep, '/')
+        signature = self._signature(real_path)
+        self._source_info[source_path] = (now, real_path, signature)
+        self._source_info.move_to_end(source_path)
+        if len(self._source_info) > SOURCE_INFO_CACHE_SIZE:
+            self._source_info.popitem(last=False)
+        return real_path, signature
+
+    @staticmethod
+    def is_allowed_source(real_path: str) -> bool:
+        """Only serve files that live under a configured model root"""
+        if os.path.splitext(real_path)[1].lower() not in THUMBNAIL_SOURCE_EXTENSIONS:
+            return False
+        for root in config._route_mappings:
+            root = root.rstrip('/')
+            if real_path == root or real_path.startswith(root + '/'):
+                return True
+        return False
+
+    def _get_executor(self):
+        # Threads rather than processes: forking the ComfyUI server is unsafe and
+        # spawning re-imports it, while Pillow releases the GIL while resizing
+        if self._executor is None:
+            workers = max(1, int(settings.get('thumbnail_workers', 2)))
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lm-thumbnail')
+        return self._executor
+
+    async def get_thumbnail_path(self, source_path: str, width: int) -> Optional[str]:
+        """Get the cached thumbnail for a source image, generating it if needed
+
+        Args:
+            source_path: Real path of the source image
+            width: One of THUMBNAIL_SIZES
+
+        Returns:
+            Path to the cached webp thumbnail, or None if the source is missing
+        """
+        signature = self._signature(source_path)
+        if not signature:
+            return None
+
+        dest_path = os.path.join(self.cache_dir, str(width), signature[:2], f"{signature}.webp")
+        if os.path.exists(dest_path):
+            return dest_path
+
+        # Deduplicate concurrent requests for the same variant
+        task_key = f"{width}:{signature}"
+        future = self._in_flight.get(task_key)
+        if future is None:
+            future = asyncio.ensure_future(self._generate(source_path, dest_path, width))
+            self._in_flight[task_key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(task_key, None))
+
+        return await asyncio.shield(future)
+
+    async def _generate(self, source_path: str, dest_path: str, width: int) -> str:
+        loop = asyncio.get_event_loop()
+        quality = int(settings.get('thumbnail_quality', 80))
+        return await loop.run_in_executor(
+            self._get_executor(), _render_thumbnail, source_path, dest_path, width, quality
+        )
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+thumbnail_service = ThumbnailService()
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from .settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Delay before dirty cache entries are written, so a batch results in a single write
+SAVE_DELAY = 2.0
+# Seconds a "not found on Civitai" result is trusted before the version is requested again
+NEGATIVE_TTL = 24 * 3600
+
+
+def extract_version_hash(version_info: Dict) -> Optional[str]:
+    """Get the SHA256 of a model version's primary file (or first hashed file), as Civitai reports it"""
+    files = version_info.get('files', []) if version_info else []
+    primary = next((f for f in files if f.get('type') == 'Model' and f.get('primary')), None)
+    for file_info in ([primary] if primary else []) + files:
+        sha256 = (file_info.get('hashes') or {}).get('SHA256')
+        if sha256:
+            return sha256
+    return None
+
+
+class VersionHashResolver:
+    """Resolves Civitai model version ids to SHA256 hashes
+
+    Results are kept in a persistent cache so each version id is requested
+    only once. Versions not found on Civitai are asked again after NEGATIVE_TTL,
+    since they may have been unpublished only temporarily (e.g. early access). Concurrent
+    lookups of the same id share one request, and requests run in parallel
+    under the `civitai_concurrency` limit.
+    """
+
+    _instance = None
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def get_instance(cls):
+        """Get singleton instance of VersionHashResolver"""
+        async with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.cache_path = os.path.join(project_dir, 'cache', 'version_hashes.json')
+        # version id -> {'sha256': str or None, 'deleted': bool, 'checked_at': epoch seconds (deleted only)}
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+
+    def _get_entries(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable version hash cache: {e}")
+        return self._entries
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, int(settings.get('civitai_concurrency', 4))))
+        return self._semaphore
+
+    def get_cached(self, version_id) -> Optional[Tuple[Optional[str], bool]]:
+        """Get a known (sha256, is_deleted) result without any request
+
+        Deleted results older than NEGATIVE_TTL are treated as unknown.
+        """
+        entry = self._get_entries().get(str(version_id))
+        if entry is None:
+            return None
+        if entry.get('deleted') and time.time() - entry.get('checked_at', 0) > NEGATIVE_TTL:
+            return None
+        return entry.get('sha256'), entry.get('deleted', False)
+
+    def record(self, version_id, sha256: Optional[str] = None, deleted: bool = False) -> None:
+        """Remember the hash (or deleted state) of a model version"""
+        if not version_id or (not sha256 and not deleted):
+            return
+        entry = {'sha256': sha256 or None, 'deleted': deleted}
+        if deleted:
+            entry['checked_at'] = time.time()
+        entries = self._get_entries()
+        if entries.get(str(version_id)) != entry:
+            entries[str(version_id)] = entry
+            self._schedule_save()
+
+    def record_version_info(self, version_id, version_info: Optional[Dict], error_msg: Optional[str] = None) -> None:
+        """Remember the outcome of a model version info request"""
+        if version_info:
+            self.record(version_id, sha256=extract_version_hash(version_info))
+        elif error_msg and 'model not found' in error_msg.lower():
+            self.record(version_id, deleted=True)
+
+    async def fetch_version_info(self, version_id, civitai_client) -> Tuple[Optional[Dict], Optional[str]]:
+        """Fetch model version info, sharing the request with concurrent callers"""
+        key = str(version_id)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, civitai_client))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, version_id: str, civitai_client) -> Tuple[Optional[Dict], Optional[str]]:
+        async with self._get_semaphore():
+            version_info, error_msg = await civitai_client.get_model_version_info(version_id)
+        self.record_version_info(version_id, version_info, error_msg)
+        return version_info, error_msg
+
+    async def fetch_version_infos(self, version_ids: Iterable, civitai_client) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        """Fetch info for several model versions concurrently
+
+        Returns:
+            Dict of str(version_id) -> (version_info, error_msg); duplicate ids are fetched once
+        """
+        keys = list(dict.fromkeys(str(version_id) for version_id in version_ids if version_id))
+        results = await asyncio.gather(
+            *(self.fetch_version_info(key, civitai_client) for key in keys),
+            return_exceptions=True
+        )
+        infos = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching model version info for {key}: {result}")
+                infos[key] = (None, str(result))
+            else:
+                infos[key] = result
+        return infos
+
+    async def resolve_many(self, version_ids: Iterable, civitai_client) -> Dict[str, Tuple[Optional[str], bool]]:
+        """Resolve several version ids to (sha256, is_deleted)
+
+        Cached results are returned directly; only unknown ids are requested.
+        Ids that could not be resolved (e.g. network errors) map to (None, False).
+        """
+        results = {}
+        unknown = []
+        for key in dict.fromkeys(str(version_id) for version_id in version_ids if version_id):
+            cached = self.get_cached(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                unknown.append(key)
+
+        if unknown and civitai_client:
+            infos = await self.fetch_version_infos(unknown, civitai_client)
+            for key in unknown:
+                cached = self.get_cached(key)
+                results[key] = cached if cached is not None else (None, False)
+                if cached is None:
+                    logger.debug(f"Could not get hash for modelVersionId {key}: {infos[key][1]}")
+        return results
+
+    def _schedule_save(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(SAVE_DELAY, self._start_save, loop)
+
+    def _start_save(self, loop) -> None:
+        self._save_handle = None
+        loop.run_in_executor(None, self._save, dict(self._get_entries()))
+
+    def _save(self, entries: Optional[Dict] = None) -> None:
+        """Atomically write the cache file"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries if entries is not None else self._get_entries(), f)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"Error saving version hash cache: {e}")
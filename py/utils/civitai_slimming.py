@@ -0,0 +1,170 @@
+import copy
+import gzip
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from ..services.settings_manager import settings
+
+logger = logging.getLogger(__name__)
+
+# Side file next to the model holding what slimming removed from its Civitai data
+SIDE_FILE_SUFFIX = '.civitai.json.gz'
+
+# Default ingest-time slimming policy (overridable with the `civitai_slim_policy` setting)
+DEFAULT_SLIM_POLICY = {
+    'enabled': True,
+    # Keys kept in each image's generation `meta` (None keeps all); these are the ones the showcase shows
+    'image_meta_keys': [
+        'prompt', 'negativePrompt', 'negative_prompt', 'seed', 'steps',
+        'sampler', 'cfgScale', 'clipSkip', 'Size', 'Model'
+    ],
+    # Number of images kept (0 keeps all)
+    'max_images': 0,
+    # Keep only the primary file entry
+    'primary_file_only': True,
+    # Hash types kept for each file (None keeps all)
+    'file_hashes': ['SHA256', 'AutoV2'],
+}
+
+
+def get_slim_policy() -> Dict:
+    """Get the slimming policy with user overrides applied"""
+    return {**DEFAULT_SLIM_POLICY, **(settings.get('civitai_slim_policy') or {})}
+
+
+def _file_key(file_info: Dict) -> str:
+    return str(file_info.get('id') or file_info.get('name', ''))
+
+
+def slim_civitai_data(data: Optional[Dict], policy: Optional[Dict] = None) -> Tuple[Optional[Dict], Dict]:
+    """Trim a Civitai version payload before it is stored
+
+    The input is left untouched. Everything removed goes into the remainder so
+    restore_civitai_data can rebuild the full payload:
+    {'image_meta': {url: removed meta}, 'images': [dropped images],
+     'files': [dropped files], 'file_hashes': {file id: removed hashes}}
+
+    Returns:
+        Tuple[Optional[Dict], Dict]: The slimmed data and the remainder (empty if nothing was trimmed)
+    """
+    if policy is None:
+        policy = get_slim_policy()
+    if not data or not policy.get('enabled'):
+        return data, {}
+
+    slim = copy.deepcopy(data)
+    remainder = {}
+
+    images = slim.get('images')
+    if isinstance(images, list):
+        max_images = int(policy.get('max_images') or 0)
+        if max_images > 0 and len(images) > max_images:
+            remainder['images'] = images[max_images:]
+            slim['images'] = images = images[:max_images]
+
+        meta_keys = policy.get('image_meta_keys')
+        if meta_keys is not None:
+            meta_keys = set(meta_keys)
+            for image in images:
+                meta = image.get('meta')
+                if not isinstance(meta, dict) or not image.get('url'):
+                    continue
+                removed = {k: v for k, v in meta.items() if k not in meta_keys}
+                if removed:
+                    image['meta'] = {k: v for k, v in meta.items() if k in meta_keys}
+                    remainder.setdefault('image_meta', {})[image['url']] = removed
+
+    files = slim.get('files')
+    if isinstance(files, list):
+        if policy.get('primary_file_only'):
+            kept = [f for f in files if f.get('primary')]
+            if kept and len(kept) < len(files):
+                remainder['files'] = [f for f in files if not f.get('primary')]
+                slim['files'] = files = kept
+
+        hash_types = policy.get('file_hashes')
+        if hash_types is not None:
+            hash_types = set(hash_types)
+            for file_info in files:
+                hashes = file_info.get('hashes')
+                if not isinstance(hashes, dict):
+                    continue
+                removed = {k: v for k, v in hashes.items() if k not in hash_types}
+                if removed:
+                    file_info['hashes'] = {k: v for k, v in hashes.items() if k in hash_types}
+                    remainder.setdefault('file_hashes', {})[_file_key(file_info)] = removed
+
+    return slim, remainder
+
+
+def restore_civitai_data(slim: Optional[Dict], remainder: Optional[Dict]) -> Optional[Dict]:
+    """Rebuild the full Civitai payload from slimmed data and its remainder"""
+    if not slim or not remainder:
+        return slim
+
+    full = copy.deepcopy(slim)
+
+    image_meta = remainder.get('image_meta') or {}
+    images = full.get('images')
+    if isinstance(images, list):
+        for image in images:
+            removed = image_meta.get(image.get('url'))
+            if removed:
+                image['meta'] = {**(image.get('meta') or {}), **removed}
+        images.extend(remainder.get('images') or [])
+
+    file_hashes = remainder.get('file_hashes') or {}
+    files = full.get('files')
+    if isinstance(files, list):
+        for file_info in files:
+            removed = file_hashes.get(_file_key(file_info))
+            if removed:
+                file_info['hashes'] = {**(file_info.get('hashes') or {}), **removed}
+        files.extend(remainder.get('files') or [])
+
+    return full
+
+
+def side_file_path(path: str) -> str:
+    """Get the side file path for a model file or its .metadata.json"""
+    if path.endswith('.metadata.json'):
+        base = path[:-len('.metadata.json')]
+    else:
+        base = os.path.splitext(path)[0]
+    return f"{base}{SIDE_FILE_SUFFIX}"
+
+
+def save_remainder(path: str, remainder: Dict) -> None:
+    """Write the remainder next to a model, or remove a stale side file when nothing was trimmed
+
+    Args:
+        path: Model file or .metadata.json path
+        remainder: Remainder returned by slim_civitai_data
+    """
+    side_path = side_file_path(path)
+    try:
+        if not remainder:
+            if os.path.exists(side_path):
+                os.remove(side_path)
+            return
+        temp_path = f"{side_path}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(remainder, f, ensure_ascii=False)
+        os.replace(temp_path, side_path)
+    except Exception as e:
+        logger.error(f"Error saving Civitai side file {side_path}: {e}")
+
+
+def load_remainder(path: str) -> Dict:
+    """Load the remainder stored next to a model (empty if there is none)"""
+    side_path = side_file_path(path)
+    if not os.path.exists(side_path):
+        return {}
+    try:
+        with gzip.open(side_path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading Civitai side file {side_path}: {e}")
+        return {}
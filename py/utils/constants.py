@@ -36,6 +36,9 @@ PREVIEW_EXTENSIONS = [
 # Card preview image width
 CARD_PREVIEW_WIDTH = 480
 
+# Thumbnail variant widths served for grid cards (ascending)
+THUMBNAIL_SIZES = (160, 240, 480)
+
 # Width for optimized example images
 EXAMPLE_IMAGE_WIDTH = 832
 
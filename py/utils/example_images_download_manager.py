@@ -6,6 +6,7 @@ import time
 import aiohttp
 from aiohttp import web
 from ..services.service_registry import ServiceRegistry
+from ..services.rate_limiter import request_priority, PRIORITY_BACKGROUND
 from .example_images_processor import ExampleImagesProcessor
 from .example_images_metadata import MetadataUpdater
 
@@ -39,9 +40,10 @@ class DownloadManager:
         {
             "output_dir": "path/to/output",  # Base directory to save example images
             "optimize": true,                # Whether to optimize images (default: true)
-            "model_types": ["lora", "checkpoint"], # Model types to process (default: both)
-            "delay": 1.0                     # Delay between downloads to avoid rate limiting (default: 1.0)
+            "model_types": ["lora", "checkpoint"] # Model types to process (default: both)
         }
+        
+        Requests are paced by the shared Civitai media rate limiter at background priority.
         """
         global download_task, is_downloading, download_progress
         
@@ -63,7 +65,6 @@ class DownloadManager:
             output_dir = data.get('output_dir')
             optimize = data.get('optimize', True)
             model_types = data.get('model_types', ['lora', 'checkpoint'])
-            delay = float(data.get('delay', 0.2)) # Default to 0.2 seconds
             
             if not output_dir:
                 return web.json_response({
@@ -104,8 +105,7 @@ class DownloadManager:
                 DownloadManager._download_all_example_images(
                     output_dir, 
                     optimize, 
-                    model_types,
-                    delay
+                    model_types
                 )
             )
             
@@ -186,10 +186,13 @@ class DownloadManager:
             }, status=400)
     
     @staticmethod
-    async def _download_all_example_images(output_dir, optimize, model_types, delay):
+    async def _download_all_example_images(output_dir, optimize, model_types):
         """Download example images for all models"""
         global is_downloading, download_progress
         
+        # Runs in its own task: let interactive Civitai requests go first
+        request_priority.set(PRIORITY_BACKGROUND)
+        
         # Create independent download session
         connector = aiohttp.TCPConnector(
             ssl=True,
@@ -233,19 +236,20 @@ class DownloadManager:
             logger.debug(f"Found {download_progress['total']} models to process")
             
             # Process each model
-            for i, (scanner_type, model, scanner) in enumerate(all_models):
+            stale_models = []
+            for scanner_type, model, scanner in all_models:
                 # Main logic for processing model is here, but actual operations are delegated to other classes
-                was_remote_download = await DownloadManager._process_model(
+                await DownloadManager._process_model(
                     scanner_type, model, scanner, 
-                    output_dir, optimize, independent_session
+                    output_dir, optimize, independent_session, stale_models
                 )
                 
                 # Update progress
                 download_progress['completed'] += 1
-                
-                # Only add delay after remote download of models, and not after processing the last model
-                if was_remote_download and i < len(all_models) - 1 and download_progress['status'] == 'running':
-                    await asyncio.sleep(delay)
+            
+            # Refresh models with stale metadata together, with batched hash lookups
+            if stale_models and download_progress['status'] == 'running':
+                await DownloadManager._refresh_stale_models(stale_models, optimize, independent_session)
             
             # Mark as completed
             download_progress['status'] = 'completed'
@@ -277,8 +281,52 @@ class DownloadManager:
             is_downloading = False
     
     @staticmethod
-    async def _process_model(scanner_type, model, scanner, output_dir, optimize, independent_session):
-        """Process a single model download"""
+    async def _refresh_stale_models(stale_models, optimize, independent_session):
+        """Refresh the metadata of models with stale Civitai images and retry their downloads
+        
+        All hashes are looked up with batched requests that skip cached responses.
+        """
+        civitai_client = await ServiceRegistry.get_civitai_client()
+        prefetched = await civitai_client.get_models_by_hashes(
+            (model.get('sha256', '') for _, model, _, _ in stale_models), refresh=True
+        )
+        
+        for scanner_type, model, scanner, model_dir in stale_models:
+            while download_progress['status'] == 'paused':
+                await asyncio.sleep(1)
+            if download_progress['status'] != 'running':
+                logger.info(f"Download stopped: {download_progress['status']}")
+                return
+            
+            model_hash = model.get('sha256', '').lower()
+            model_name = model.get('model_name', 'Unknown')
+            download_progress['current_model'] = f"{model_name} ({model_hash[:8]})"
+            
+            await MetadataUpdater.refresh_model_metadata(
+                model_hash, model_name, scanner_type, scanner, prefetched
+            )
+            
+            # Get the updated model data
+            updated_model = await MetadataUpdater.get_updated_model(
+                model_hash, scanner
+            )
+            
+            if updated_model and updated_model.get('civitai', {}).get('images'):
+                # Retry download with updated metadata
+                updated_images = updated_model.get('civitai', {}).get('images', [])
+                success, _ = await ExampleImagesProcessor.download_model_images(
+                    model_hash, model_name, updated_images, model_dir, optimize, independent_session
+                )
+                if success:
+                    download_progress['processed_models'].add(model_hash)
+    
+    @staticmethod
+    async def _process_model(scanner_type, model, scanner, output_dir, optimize, independent_session, stale_models):
+        """Process a single model download
+        
+        Models whose Civitai images are gone (stale metadata) are appended to
+        stale_models as (scanner_type, model, scanner, model_dir) for a later refresh.
+        """
         global download_progress
         
         # Check if download is paused
@@ -334,23 +382,10 @@ class DownloadManager:
                     model_hash, model_name, images, model_dir, optimize, independent_session
                 )
                 
-                # If metadata is stale, try to refresh it
+                # If metadata is stale, refresh it after the main pass
                 if is_stale and model_hash not in download_progress['refreshed_models']:
-                    await MetadataUpdater.refresh_model_metadata(
-                        model_hash, model_name, scanner_type, scanner
-                    )
-                    
-                    # Get the updated model data
-                    updated_model = await MetadataUpdater.get_updated_model(
-                        model_hash, scanner
-                    )
-                    
-                    if updated_model and updated_model.get('civitai', {}).get('images'):
-                        # Retry download with updated metadata
-                        updated_images = updated_model.get('civitai', {}).get('images', [])
-                        success, _ = await ExampleImagesProcessor.download_model_images(
-                            model_hash, model_name, updated_images, model_dir, optimize, independent_session
-                        )
+                    stale_models.append((scanner_type, model, scanner, model_dir))
+                    return True
                 
                 # Only mark as processed if all images were downloaded successfully
                 if success:
@@ -13,7 +13,7 @@ class MetadataUpdater:
     """Handles updating model metadata related to example images"""
     
     @staticmethod
-    async def refresh_model_metadata(model_hash, model_name, scanner_type, scanner):
+    async def refresh_model_metadata(model_hash, model_name, scanner_type, scanner, prefetched=None):
         """Refresh model metadata from CivitAI
         
         Args:
@@ -21,6 +21,7 @@ class MetadataUpdater:
             model_name: Model name (for logging)
             scanner_type: Scanner type ('lora' or 'checkpoint')
             scanner: Scanner instance for this model type
+            prefetched: Optional results of a batched hash lookup (see CivitaiClient.get_models_by_hashes)
             
         Returns:
             bool: True if metadata was successfully refreshed, False otherwise
@@ -57,7 +58,8 @@ class MetadataUpdater:
                 model_hash, 
                 file_path, 
                 model_data,
-                update_cache_func
+                update_cache_func,
+                prefetched
             )
             
             if success:
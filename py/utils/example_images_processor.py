@@ -8,6 +8,7 @@ from aiohttp import web
 from ..utils.constants import SUPPORTED_MEDIA_EXTENSIONS
 from ..services.service_registry import ServiceRegistry
 from ..services.settings_manager import settings
+from ..services.rate_limiter import civitai_media_limiter, limited_get
 from .example_images_metadata import MetadataUpdater
 from ..utils.metadata_manager import MetadataManager
 
@@ -78,8 +79,8 @@ class ExampleImagesProcessor:
             try:
                 logger.debug(f"Downloading {save_filename} for {model_name}")
                 
-                # Download directly using the independent session
-                async with independent_session.get(image_url, timeout=60) as response:
+                # Download using the independent session, paced by the shared media limiter
+                async with limited_get(independent_session, image_url, civitai_media_limiter, timeout=60) as response:
                     if response.status == 200:
                         with open(save_path, 'wb') as f:
                             async for chunk in response.content.iter_chunked(8192):
@@ -8,6 +8,7 @@ from typing import Dict, Optional, Type, Union
 from .models import BaseModelMetadata, LoraMetadata
 from .file_utils import normalize_path, find_preview_file, calculate_sha256
 from .lora_metadata import extract_lora_metadata, extract_checkpoint_metadata
+from .civitai_slimming import save_remainder
 
 logger = logging.getLogger(__name__)
 
@@ -146,6 +147,11 @@ class MetadataManager:
             
             # Atomic rename operation
             os.replace(temp_path, metadata_path)
+
+            # Write the Civitai data trimmed at ingest to its side file
+            if isinstance(metadata, BaseModelMetadata) and metadata._civitai_remainder is not None:
+                save_remainder(metadata_path, metadata._civitai_remainder)
+                metadata._civitai_remainder = None
             return True
             
         except Exception as e:
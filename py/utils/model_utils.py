@@ -26,4 +26,33 @@ def determine_base_model(version_string: Optional[str]) -> str:
             return value
     
     # TODO: Add more base model mappings
-    return version_string 
\ No newline at end of file
+    return version_string 
+
+# Unicode ranges of CJK characters
+CJK_RANGES = (
+    (0x4E00, 0x9FFF),   # CJK Unified Ideographs
+    (0x3400, 0x4DBF),   # CJK Unified Ideographs Extension A
+    (0x20000, 0x2A6DF), # CJK Unified Ideographs Extension B
+    (0x2A700, 0x2B73F), # CJK Unified Ideographs Extension C
+    (0x2B740, 0x2B81F), # CJK Unified Ideographs Extension D
+    (0x2B820, 0x2CEAF), # CJK Unified Ideographs Extension E
+    (0x2CEB0, 0x2EBEF), # CJK Unified Ideographs Extension F
+    (0x30000, 0x3134F), # CJK Unified Ideographs Extension G
+    (0xF900, 0xFAFF),   # CJK Compatibility Ideographs
+    (0x3300, 0x33FF),   # CJK Compatibility
+    (0x3200, 0x32FF),   # Enclosed CJK Letters and Months
+    (0x3100, 0x312F),   # Bopomofo
+    (0x31A0, 0x31BF),   # Bopomofo Extended
+    (0x3040, 0x309F),   # Hiragana
+    (0x30A0, 0x30FF),   # Katakana
+    (0x31F0, 0x31FF),   # Katakana Phonetic Extensions
+    (0xAC00, 0xD7AF),   # Hangul Syllables
+    (0x1100, 0x11FF),   # Hangul Jamo
+    (0xA960, 0xA97F),   # Hangul Jamo Extended-A
+    (0xD7B0, 0xD7FF),   # Hangul Jamo Extended-B
+)
+
+def is_cjk_character(char: str) -> bool:
+    """Check if character is a CJK character"""
+    code_point = ord(char)
+    return any(start <= code_point <= end for start, end in CJK_RANGES)
@@ -3,6 +3,7 @@ from typing import Dict, Optional, List, Any
 from datetime import datetime
 import os
 from .model_utils import determine_base_model
+from .civitai_slimming import slim_civitai_data
 
 @dataclass
 class BaseModelMetadata:
@@ -25,6 +26,7 @@ class BaseModelMetadata:
     favorite: bool = False      # Whether the model is a favorite
     exclude: bool = False       # Whether to exclude this model from the cache
     _unknown_fields: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)  # Store unknown fields
+    _civitai_remainder: Optional[Dict] = field(default=None, repr=False, compare=False)  # Trimmed Civitai data not yet written to the side file
 
     def __post_init__(self):
         # Initialize empty lists to avoid mutable default parameter issue
@@ -77,6 +79,13 @@ class BaseModelMetadata:
         """Update Civitai information"""
         self.civitai = civitai_data
 
+    def slim_civitai(self) -> None:
+        """Apply the ingest slimming policy to the Civitai data
+
+        The trimmed part is written to the side file by MetadataManager.save_metadata.
+        """
+        self.civitai, self._civitai_remainder = slim_civitai_data(self.civitai)
+
     def update_file_info(self, file_path: str) -> None:
         """Update metadata with actual file information"""
         if os.path.exists(file_path):
@@ -104,7 +113,7 @@ class LoraMetadata(BaseModelMetadata):
             if 'description' in version_info['model']:
                 description = version_info['model']['description']
         
-        return cls(
+        metadata = cls(
             file_name=os.path.splitext(file_name)[0],
             model_name=version_info.get('model').get('name', os.path.splitext(file_name)[0]),
             file_path=save_path.replace(os.sep, '/'),
@@ -119,6 +128,8 @@ class LoraMetadata(BaseModelMetadata):
             tags=tags,
             modelDescription=description
         )
+        metadata.slim_civitai()
+        return metadata
 
 @dataclass
 class CheckpointMetadata(BaseModelMetadata):
@@ -141,7 +152,7 @@ class CheckpointMetadata(BaseModelMetadata):
             if 'description' in version_info['model']:
                 description = version_info['model']['description']
         
-        return cls(
+        metadata = cls(
             file_name=os.path.splitext(file_name)[0],
             model_name=version_info.get('model').get('name', os.path.splitext(file_name)[0]),
             file_path=save_path.replace(os.sep, '/'),
@@ -157,6 +168,8 @@ class CheckpointMetadata(BaseModelMetadata):
             tags=tags,
             modelDescription=description
         )
+        metadata.slim_civitai()
+        return metadata
 
 @dataclass
 class EmbeddingMetadata(BaseModelMetadata):
@@ -179,7 +192,7 @@ class EmbeddingMetadata(BaseModelMetadata):
             if 'description' in version_info['model']:
                 description = version_info['model']['description']
         
-        return cls(
+        metadata = cls(
             file_name=os.path.splitext(file_name)[0],
             model_name=version_info.get('model').get('name', os.path.splitext(file_name)[0]),
             file_path=save_path.replace(os.sep, '/'),
@@ -195,4 +208,6 @@ class EmbeddingMetadata(BaseModelMetadata):
             tags=tags,
             modelDescription=description
         )
+        metadata.slim_civitai()
+        return metadata
 
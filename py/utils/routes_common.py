@@ -1,10 +1,11 @@
 import os
 import json
 import logging
-from typing import Dict, List, Callable, Awaitable
+from typing import Dict, List, Callable, Awaitable, Optional
 from aiohttp import web
 
 from .model_utils import determine_base_model
+from .civitai_slimming import SIDE_FILE_SUFFIX, slim_civitai_data, save_remainder
 from .constants import PREVIEW_EXTENSIONS, CARD_PREVIEW_WIDTH
 from ..config import config
 from ..services.civitai_client import CivitaiClient
@@ -44,9 +45,12 @@ class ModelRouteUtils:
         # Save existing trainedWords and customImages if they exist
         existing_civitai = local_metadata.get('civitai') or {}  # Use empty dict if None
 
+        # Trim the payload per the slimming policy; the remainder goes to the side file
+        slim_civitai, civitai_remainder = slim_civitai_data(civitai_metadata)
+
         # Create a new civitai metadata by updating existing with new
         merged_civitai = existing_civitai.copy()
-        merged_civitai.update(civitai_metadata)
+        merged_civitai.update(slim_civitai)
 
         # Special handling for trainedWords - ensure we don't lose any existing trained words
         if 'trainedWords' in existing_civitai:
@@ -156,14 +160,16 @@ class ModelRouteUtils:
                                 local_metadata['preview_nsfw_level'] = first_preview.get('nsfwLevel', 0)
 
         # Save updated metadata
-        await MetadataManager.save_metadata(metadata_path, local_metadata, True)
+        if await MetadataManager.save_metadata(metadata_path, local_metadata, True):
+            save_remainder(metadata_path, civitai_remainder)
 
     @staticmethod
     async def fetch_and_update_model(
         sha256: str, 
         file_path: str, 
         model_data: dict,
-        update_cache_func: Callable[[str, str, Dict], Awaitable[bool]]
+        update_cache_func: Callable[[str, str, Dict], Awaitable[bool]],
+        prefetched: Optional[Dict[str, Optional[Dict]]] = None
     ) -> bool:
         """Fetch and update metadata for a single model
         
@@ -172,11 +178,13 @@ class ModelRouteUtils:
             file_path: Path to the model file
             model_data: The model object in cache to update
             update_cache_func: Function to update the cache with new metadata
+            prefetched: Optional results of CivitaiClient.get_models_by_hashes; a hash
+                found in it (even with a None result) is not looked up again
             
         Returns:
             bool: True if successful, False otherwise
         """
-        client = CivitaiClient()
+        client = await ServiceRegistry.get_civitai_client()
         try:
             # Validate input parameters
             if not isinstance(model_data, dict):
@@ -188,8 +196,11 @@ class ModelRouteUtils:
             # Check if model metadata exists
             local_metadata = await ModelRouteUtils.load_local_metadata(metadata_path)
 
-            # Fetch metadata from Civitai
-            civitai_metadata = await client.get_model_by_hash(sha256)
+            # Fetch metadata from Civitai (unless a batch lookup already did)
+            if prefetched is not None and sha256.lower() in prefetched:
+                civitai_metadata = prefetched[sha256.lower()]
+            else:
+                civitai_metadata = await client.get_model_by_hash(sha256)
             if not civitai_metadata:
                 # Mark as not from CivitAI if not found
                 local_metadata['from_civitai'] = False
@@ -210,7 +221,7 @@ class ModelRouteUtils:
                 'model_name': local_metadata.get('model_name'),
                 'preview_url': local_metadata.get('preview_url'),
                 'from_civitai': True,
-                'civitai': civitai_metadata
+                'civitai': local_metadata.get('civitai')
             }
             model_data.update(update_dict)
             
@@ -225,8 +236,6 @@ class ModelRouteUtils:
         except Exception as e:
             logger.error(f"Error fetching CivitAI data: {str(e)}", exc_info=True)  # Include stack trace
             return False
-        finally:
-            await client.close()
     
     @staticmethod
     def filter_civitai_data(data: Dict) -> Dict:
@@ -255,6 +264,7 @@ class ModelRouteUtils:
         patterns = [
             f"{file_name}.safetensors",  # Required
             f"{file_name}.metadata.json",
+            f"{file_name}{SIDE_FILE_SUFFIX}",
         ]
         
         # Add all preview file extensions
@@ -324,6 +334,7 @@ class ModelRouteUtils:
             # Remove from cache
             cache = await scanner.get_cached_data()
             cache.raw_data = [item for item in cache.raw_data if item['file_path'] != file_path]
+            cache.unindex_path(file_path)
             await cache.resort()
 
             # Update hash index if available
@@ -359,24 +370,22 @@ class ModelRouteUtils:
             if not local_metadata or not local_metadata.get('sha256'):
                 return web.json_response({"success": False, "error": "No SHA256 hash found"}, status=400)
 
-            # Create a client for fetching from Civitai
-            client = CivitaiClient()
-            try:
-                # Fetch and update metadata
-                civitai_metadata = await client.get_model_by_hash(local_metadata["sha256"])
-                if not civitai_metadata:
-                    await ModelRouteUtils.handle_not_found_on_civitai(metadata_path, local_metadata)
-                    return web.json_response({"success": False, "error": "Not found on CivitAI"}, status=404)
+            # Use the shared client for fetching from Civitai
+            client = await ServiceRegistry.get_civitai_client()
+            
+            # Fetch and update metadata
+            civitai_metadata = await client.get_model_by_hash(local_metadata["sha256"])
+            if not civitai_metadata:
+                await ModelRouteUtils.handle_not_found_on_civitai(metadata_path, local_metadata)
+                return web.json_response({"success": False, "error": "Not found on CivitAI"}, status=404)
 
-                await ModelRouteUtils.update_model_metadata(metadata_path, local_metadata, civitai_metadata, client)
-                
-                # Update the cache
-                await scanner.update_single_model_cache(data['file_path'], data['file_path'], local_metadata)
-                
-                # Return the updated metadata along with success status
-                return web.json_response({"success": True, "metadata": local_metadata})
-            finally:
-                await client.close()
+            await ModelRouteUtils.update_model_metadata(metadata_path, local_metadata, civitai_metadata, client)
+            
+            # Update the cache
+            await scanner.update_single_model_cache(data['file_path'], data['file_path'], local_metadata)
+            
+            # Return the updated metadata along with success status
+            return web.json_response({"success": True, "metadata": local_metadata})
 
         except Exception as e:
             logger.error(f"Error fetching from CivitAI: {e}", exc_info=True)
@@ -534,12 +543,8 @@ class ModelRouteUtils:
             # Find and remove model from cache
             model_to_remove = next((item for item in cache.raw_data if item['file_path'] == file_path), None)
             if model_to_remove:
-                # Update tags count
-                for tag in model_to_remove.get('tags', []):
-                    if tag in scanner._tags_count:
-                        scanner._tags_count[tag] = max(0, scanner._tags_count[tag] - 1)
-                        if scanner._tags_count[tag] == 0:
-                            del scanner._tags_count[tag]
+                # Update path index and facet counts
+                cache.unindex_path(file_path)
 
                 # Remove from hash index if available
                 if hasattr(scanner, '_hash_index') and scanner._hash_index:
@@ -783,43 +788,40 @@ class ModelRouteUtils:
             # Check if model metadata exists
             local_metadata = await ModelRouteUtils.load_local_metadata(metadata_path)
             
-            # Create a client for fetching from Civitai
-            client = await CivitaiClient.get_instance()
-            try:
-                # Fetch metadata using get_model_version which includes more comprehensive data
-                civitai_metadata = await client.get_model_version(model_id, model_version_id)
-                if not civitai_metadata:
-                    error_msg = f"Model version not found on CivitAI for ID: {model_id}"
-                    if model_version_id:
-                        error_msg += f" with version: {model_version_id}"
-                    return web.json_response({"success": False, "error": error_msg}, status=404)
-                
-                # Try to find the primary model file to get the SHA256 hash
-                primary_model_file = None
-                for file in civitai_metadata.get('files', []):
-                    if file.get('primary', False) and file.get('type') == 'Model':
-                        primary_model_file = file
-                        break
-                
-                # Update the SHA256 hash in local metadata if available
-                if primary_model_file and primary_model_file.get('hashes', {}).get('SHA256'):
-                    local_metadata['sha256'] = primary_model_file['hashes']['SHA256'].lower()
-                
-                # Update metadata with CivitAI information
-                await ModelRouteUtils.update_model_metadata(metadata_path, local_metadata, civitai_metadata, client)
-                
-                # Update the cache
-                await scanner.update_single_model_cache(file_path, file_path, local_metadata)
-                
-                return web.json_response({
-                    "success": True,
-                    "message": f"Model successfully re-linked to Civitai model {model_id}" + 
-                               (f" version {model_version_id}" if model_version_id else ""),
-                    "hash": local_metadata.get('sha256', '')
-                })
-                
-            finally:
-                await client.close()
+            # Use the shared client for fetching from Civitai
+            client = await ServiceRegistry.get_civitai_client()
+            
+            # Fetch metadata using get_model_version which includes more comprehensive data
+            civitai_metadata = await client.get_model_version(model_id, model_version_id)
+            if not civitai_metadata:
+                error_msg = f"Model version not found on CivitAI for ID: {model_id}"
+                if model_version_id:
+                    error_msg += f" with version: {model_version_id}"
+                return web.json_response({"success": False, "error": error_msg}, status=404)
+            
+            # Try to find the primary model file to get the SHA256 hash
+            primary_model_file = None
+            for file in civitai_metadata.get('files', []):
+                if file.get('primary', False) and file.get('type') == 'Model':
+                    primary_model_file = file
+                    break
+            
+            # Update the SHA256 hash in local metadata if available
+            if primary_model_file and primary_model_file.get('hashes', {}).get('SHA256'):
+                local_metadata['sha256'] = primary_model_file['hashes']['SHA256'].lower()
+            
+            # Update metadata with CivitAI information
+            await ModelRouteUtils.update_model_metadata(metadata_path, local_metadata, civitai_metadata, client)
+            
+            # Update the cache
+            await scanner.update_single_model_cache(file_path, file_path, local_metadata)
+            
+            return web.json_response({
+                "success": True,
+                "message": f"Model successfully re-linked to Civitai model {model_id}" + 
+                           (f" version {model_version_id}" if model_version_id else ""),
+                "hash": local_metadata.get('sha256', '')
+            })
 
         except Exception as e:
             logger.error(f"Error re-linking to CivitAI: {e}", exc_info=True)
@@ -963,6 +965,7 @@ class ModelRouteUtils:
                 f"{old_file_name}.safetensors",  # Required
                 f"{old_file_name}.metadata.json",
                 f"{old_file_name}.metadata.json.bak",
+                f"{old_file_name}{SIDE_FILE_SUFFIX}",
             ]
             
             # Add all preview file extensions
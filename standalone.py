@@ -352,6 +352,9 @@ class StandaloneLoraManager(LoraManager):
         from py.services.websocket_manager import ws_manager
         
 
+        # Remember where our API routes start so metrics only cover them
+        route_start = len(app.router.resources())
+
         register_default_model_types()
 
         # Setup all model routes using the factory
@@ -371,6 +374,9 @@ class StandaloneLoraManager(LoraManager):
         app.router.add_get('/ws/download-progress', ws_manager.handle_download_connection)
         app.router.add_get('/ws/init-progress', ws_manager.handle_init_connection)
         
+        # Setup request metrics for the routes registered above
+        cls._setup_metrics(app, route_start)
+        
         # Schedule service initialization
         app.on_startup.append(lambda app: cls._initialize_services())
         
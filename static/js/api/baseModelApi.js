@@ -1,5 +1,5 @@
 import { state, getCurrentPageState } from '../state/index.js';
-import { showToast, updateFolderTags } from '../utils/uiHelpers.js';
+import { showToast, updateFolderTags, getCardThumbnailSize } from '../utils/uiHelpers.js';
 import { getSessionItem, saveMapToStorage } from '../utils/storageHelpers.js';
 import { 
     getCompleteApiConfig, 
@@ -54,7 +54,8 @@ export class BaseModelApiClient {
             const params = this._buildQueryParams({
                 page,
                 page_size: actualPageSize,
-                sort_by: pageState.sortBy
+                sort_by: pageState.sortBy,
+                card_size: getCardThumbnailSize()
             }, pageState);
 
             const response = await fetch(`${this.apiConfig.endpoints.list}?${params}`);
@@ -408,6 +409,13 @@ export class BaseModelApiClient {
                                 resolve();
                                 break;
                                 
+                            case 'cancelled':
+                                loading.setStatus(
+                                    `Cancelled: Updated ${data.success} of ${data.processed} ${this.apiConfig.config.displayName}s`
+                                );
+                                resolve();
+                                break;
+                                
                             case 'error':
                                 reject(new Error(data.error));
                                 break;
@@ -6,6 +6,49 @@ import { getSessionItem } from '../utils/storageHelpers.js';
  * LoRA-specific API client
  */
 export class LoraApiClient extends BaseModelApiClient {
+    /**
+     * Fetch a page of LoRAs along with the number of recipes using each of them
+     */
+    async fetchModelsPage(page = 1, pageSize = null) {
+        const result = await super.fetchModelsPage(page, pageSize);
+        const counts = await this.fetchRecipeCounts(result.items.map(item => item.sha256));
+        result.items.forEach(item => {
+            item.recipe_count = counts[(item.sha256 || '').toLowerCase()] || 0;
+        });
+        return result;
+    }
+
+    /**
+     * Get the number of recipes using each LoRA (for card badges)
+     * @param {string[]} hashes - SHA256 hashes of the LoRAs
+     * @returns {Promise<Object>} Recipe counts keyed by lowercased hash
+     */
+    async fetchRecipeCounts(hashes) {
+        const validHashes = hashes.filter(Boolean);
+        if (validHashes.length === 0) {
+            return {};
+        }
+
+        try {
+            const response = await fetch('/api/recipes/counts-for-loras', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ hashes: validHashes })
+            });
+
+            if (!response.ok) {
+                throw new Error(`Failed to fetch recipe counts: ${response.statusText}`);
+            }
+
+            const data = await response.json();
+            return data.counts || {};
+        } catch (error) {
+            // The badges are optional, the page still loads without them
+            console.error('Error fetching recipe counts:', error);
+            return {};
+        }
+    }
+
     /**
      * Add LoRA-specific parameters to query
      */
@@ -1,6 +1,6 @@
 import { RecipeCard } from '../components/RecipeCard.js';
 import { state, getCurrentPageState } from '../state/index.js';
-import { showToast } from '../utils/uiHelpers.js';
+import { showToast, getCardThumbnailSize } from '../utils/uiHelpers.js';
 
 /**
  * Fetch recipes with pagination for virtual scrolling
@@ -15,7 +15,8 @@ export async function fetchRecipesPage(page = 1, pageSize = 100) {
         const params = new URLSearchParams({
             page: page,
             page_size: pageSize || pageState.pageSize || 20,
-            sort_by: pageState.sortBy
+            sort_by: pageState.sortBy,
+            card_size: getCardThumbnailSize()
         });
         
         // If we have a specific recipe ID to load
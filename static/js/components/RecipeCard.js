@@ -35,8 +35,8 @@ class RecipeCard {
         const missingLorasCount = loras.filter(lora => !lora.inLibrary && !lora.isDeleted).length;
         const allLorasAvailable = missingLorasCount === 0 && lorasCount > 0;
         
-        // Ensure file_url exists, fallback to file_path if needed
-        const imageUrl = this.recipe.file_url || 
+        // Prefer the grid-sized thumbnail, then file_url, then a path derived from file_path
+        const imageUrl = this.recipe.thumbnail_url || this.recipe.file_url || 
                          (this.recipe.file_path ? `/loras_static/root1/preview/${this.recipe.file_path.split('/').pop()}` : 
                          '/loras_static/images/no-preview.png');
 
@@ -419,6 +419,8 @@ export function createModelCard(model, modelType) {
     const version = previewVersions.get(model.file_path);
     const previewUrl = model.preview_url || '/loras_static/images/no-preview.png';
     const versionedPreviewUrl = version ? `${previewUrl}?t=${version}` : previewUrl;
+    // Show the grid-sized thumbnail unless the preview was replaced in this session
+    const imageUrl = (!version && model.thumbnail_url) || versionedPreviewUrl;
 
     // Determine NSFW warning text based on level
     let nsfwText = "Mature Content";
@@ -460,7 +462,7 @@ export function createModelCard(model, modelType) {
                 `<video ${videoAttrs} style="pointer-events: none;">
                     <source src="${versionedPreviewUrl}" type="video/mp4">
                 </video>` :
-                `<img src="${versionedPreviewUrl}" alt="${model.model_name}">`
+                `<img src="${imageUrl}" alt="${model.model_name}">`
             }
             <div class="card-header">
                 ${shouldBlur ? 
@@ -486,6 +488,10 @@ export function createModelCard(model, modelType) {
                 <div class="model-info">
                     <span class="model-name">${model.model_name}</span>
                     ${model.civitai?.name ? `<span class="version-name">${model.civitai.name}</span>` : ''}
+                    ${model.recipe_count ? 
+                      `<span class="recipe-count-badge" title="Used in ${model.recipe_count} recipe${model.recipe_count === 1 ? '' : 's'}">
+                          <i class="fas fa-book-open"></i> ${model.recipe_count}
+                      </span>` : ''}
                 </div>
                 <div class="card-actions">
                     <i class="fas fa-folder-open" 
@@ -693,4 +693,13 @@ export function updateFolderTags(folders) {
   if (activeTag) {
       activeTag.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
   }
+}
+
+/**
+ * Get the card_size to request grid thumbnails with (card width in device pixels)
+ * @returns {number} - Width the preview images are displayed at
+ */
+export function getCardThumbnailSize() {
+    const cardWidth = state.virtualScroller?.itemWidth || 320;
+    return Math.ceil(cardWidth * (window.devicePixelRatio || 1));
 }
\ No newline at end of file
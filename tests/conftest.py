@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Make the `py` package and civitai_stub importable without ComfyUI
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# pytest imports its own `py` compatibility shim, which would shadow this repo's `py` package
+if not hasattr(sys.modules.get('py'), '__path__'):
+    sys.modules.pop('py', None)
@@ -0,0 +1,118 @@
+"""Batched hash lookups (CivitaiClient.get_models_by_hashes) against the local Civitai stub"""
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from civitai_stub import CivitaiStub, StubConfig
+from py.services import civitai_client as civitai_client_module
+from py.services.civitai_cache import civitai_cache
+from py.services.settings_manager import settings
+
+BATCH_ROUTE = '/api/v1/model-versions/by-hash'
+SINGLE_ROUTE = '/api/v1/model-versions/by-hash/{hash}'
+
+KNOWN_HASH = 'AB' * 32
+UNKNOWN_HASH = 'cd' * 32
+
+
+def make_version(version_id: int, sha256: str) -> dict:
+    return {
+        'id': version_id,
+        'modelId': version_id * 10,
+        'name': f"v{version_id}",
+        'files': [{'primary': True, 'name': f"model_{version_id}.safetensors", 'hashes': {'SHA256': sha256}}],
+        'images': [],
+    }
+
+
+class FailingBatchStub(CivitaiStub):
+    """Stub of a server without the batched by-hash endpoint"""
+
+    async def post_versions_by_hash(self, request: web.Request) -> web.Response:
+        return web.json_response({'error': 'Method not allowed'}, status=405)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Isolated response cache and no API key, so cache keys are the plain URLs
+    civitai_cache.close()
+    monkeypatch.setattr(civitai_cache, 'db_path', str(tmp_path / 'civitai_responses.sqlite'))
+    monkeypatch.setitem(settings.settings, 'civitai_cache_enabled', True)
+    monkeypatch.delitem(settings.settings, 'civitai_api_key', raising=False)
+    yield civitai_client_module.CivitaiClient()
+    civitai_cache.close()
+
+
+def run_with_stub(stub: CivitaiStub, client, coro_factory):
+    """Serve the stub on a local port, point the client at it and run coro_factory()"""
+    async def run():
+        server = TestServer(stub.create_app())
+        await server.start_server()
+        settings.settings['civitai_base_url'] = str(server.make_url('')).rstrip('/')
+        try:
+            return await coro_factory()
+        finally:
+            await client.close()
+            await server.close()
+
+    previous_base_url = settings.settings.get('civitai_base_url')
+    try:
+        return asyncio.run(run())
+    finally:
+        if previous_base_url is None:
+            settings.settings.pop('civitai_base_url', None)
+        else:
+            settings.settings['civitai_base_url'] = previous_base_url
+
+
+def make_stub(stub_class=CivitaiStub) -> CivitaiStub:
+    stub = stub_class(StubConfig())
+    stub.add_version(make_version(1, KNOWN_HASH))
+    return stub
+
+
+def test_batch_returns_hits_and_misses(client):
+    stub = make_stub()
+
+    results = run_with_stub(stub, client, lambda: client.get_models_by_hashes([KNOWN_HASH, UNKNOWN_HASH]))
+
+    assert set(results) == {KNOWN_HASH.lower(), UNKNOWN_HASH}
+    assert results[KNOWN_HASH.lower()]['id'] == 1
+    assert results[UNKNOWN_HASH] is None
+    assert stub.stats['requests'].get(BATCH_ROUTE) == 1
+    assert SINGLE_ROUTE not in stub.stats['requests']
+
+
+def test_batch_failure_falls_back_to_single_lookups(client):
+    stub = make_stub(FailingBatchStub)
+
+    results = run_with_stub(stub, client, lambda: client.get_models_by_hashes([KNOWN_HASH, UNKNOWN_HASH]))
+
+    assert results[KNOWN_HASH.lower()]['id'] == 1
+    assert results[UNKNOWN_HASH] is None
+    assert stub.stats['requests'].get(BATCH_ROUTE) == 1
+    assert stub.stats['requests'].get(SINGLE_ROUTE) == 2
+
+
+def test_batch_results_are_written_back_to_the_cache(client):
+    stub = make_stub()
+
+    async def lookups():
+        first = await client.get_models_by_hashes([KNOWN_HASH, UNKNOWN_HASH])
+        requests_after_batch = dict(stub.stats['requests'])
+        # Both the batched and the single lookups are now served from the cache
+        again = await client.get_models_by_hashes([KNOWN_HASH, UNKNOWN_HASH])
+        single_hit = await client.get_model_by_hash(KNOWN_HASH)
+        single_miss = await client.get_model_by_hash(UNKNOWN_HASH)
+        cached_miss = civitai_cache.lookup(client._by_hash_cache_key(UNKNOWN_HASH))
+        return first, again, single_hit, single_miss, cached_miss, requests_after_batch
+
+    first, again, single_hit, single_miss, cached_miss, requests_after_batch = run_with_stub(stub, client, lookups)
+
+    assert again == first
+    assert single_hit['id'] == 1
+    assert single_miss is None
+    assert stub.stats['requests'] == requests_after_batch
+    assert cached_miss['status'] == 404 and cached_miss['fresh']